@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark merging the chunks of long streaming chat completions.
+
+It compares the former `merge_incremental_chunk`, which walked the chunks in
+reverse and prepended each piece to the merged string, quadratic in the
+response length, with `ChunkAccumulator`, which collects the pieces in list
+buffers while the chunks arrive. Two responses are merged: a text response
+and a tool call whose arguments are streamed, one small piece per chunk.
+
+Usage:
+    python benchmarks/chunk_accumulator.py --chunks 10000
+"""
+
+import argparse
+import time
+from typing import Callable, List, Optional
+
+from openai.types.chat import ChatCompletionChunk
+
+from agentscope_bricks.utils.message_util import ChunkAccumulator
+from agentscope_bricks.utils.schemas.oai_llm import ToolCall
+from agentscope_runtime.engine.schemas.agent_schemas import (
+    FunctionCall,
+    Role,
+)
+
+
+def legacy_merge(
+    responses: List[ChatCompletionChunk],
+) -> Optional[ChatCompletionChunk]:
+    """The former merge, prepending the chunks in reverse order."""
+
+    if len(responses) == 0:
+        return None
+
+    if not isinstance(responses[0], ChatCompletionChunk):
+        return None
+
+    # get usage or finish reason
+    merged = ChatCompletionChunk(**responses[-1].__dict__)
+
+    # if the responses has usage info, then merge the finish reason chunk to
+    # usage chunk
+    if not merged.choices and len(responses) > 1:
+        merged.choices = responses[-2].choices
+
+    # might be multiple tool calls result
+    tool_calls_dict = {}
+
+    for resp in reversed(responses[:-1]):
+        for i, j in zip(merged.choices, resp.choices):
+            # jump the finish reason chunk
+            if (i.delta.content is None and j.delta.content is not None) and (
+                i.delta.tool_calls is None and j.delta.tool_calls is not None
+            ):
+                continue
+            elif j.delta.role == Role.TOOL:
+                continue
+            # merge content
+            elif not i.delta.content and isinstance(j.delta.content, str):
+                i.delta.content = j.delta.content
+            elif isinstance(i.delta.content, str) and isinstance(
+                j.delta.content,
+                str,
+            ):
+                i.delta.content = j.delta.content + i.delta.content
+
+            # merge tool calls
+            elif not i.delta.tool_calls and isinstance(
+                j.delta.tool_calls,
+                list,
+            ):
+                for tool_call in j.delta.tool_calls:
+                    if tool_call.index not in tool_calls_dict:
+                        tool_calls_dict[tool_call.index] = tool_call
+                        # make sure function.arguments is a string
+                        if not tool_call.function.arguments:
+                            tool_calls_dict[
+                                tool_call.index
+                            ].function.arguments = ""
+                    else:
+                        if tool_call.id != "":
+                            tool_calls_dict[tool_call.index].id = tool_call.id
+                        if tool_call.function.name:
+                            tool_calls_dict[tool_call.index].function.name = (
+                                tool_call.function.name
+                            )
+                        if (
+                            tool_call.function.arguments
+                            and not tool_calls_dict[
+                                tool_call.index
+                            ].function.arguments.startswith("{")
+                        ):
+                            tool_calls_dict[
+                                tool_call.index
+                            ].function.arguments = (
+                                tool_call.function.arguments
+                                + tool_calls_dict[
+                                    tool_call.index
+                                ].function.arguments
+                            )
+
+        if merged.usage and resp.usage:
+            merged.usage.prompt_tokens += resp.usage.prompt_tokens
+            merged.usage.completion_tokens += resp.usage.completion_tokens
+            merged.usage.total_tokens += resp.usage.total_tokens
+
+    if tool_calls_dict:
+        merged.choices[0].delta.tool_calls = [
+            ToolCall(
+                id=tool_call.id,
+                type=tool_call.type,
+                function=FunctionCall(**tool_call.function.__dict__),
+            )
+            for tool_call in tool_calls_dict.values()
+        ]
+    return merged
+
+
+def make_chunk(delta: dict, finish_reason: Optional[str] = None):
+    return ChatCompletionChunk(
+        id="chat-1",
+        created=0,
+        model="qwen-max",
+        object="chat.completion.chunk",
+        choices=[
+            {"index": 0, "delta": delta, "finish_reason": finish_reason},
+        ],
+    )
+
+
+def text_response(chunks: int) -> List[ChatCompletionChunk]:
+    return [make_chunk({"role": "assistant", "content": ""})] + [
+        make_chunk({"content": f"token{i} "}) for i in range(chunks)
+    ]
+
+
+def tool_call_response(chunks: int) -> List[ChatCompletionChunk]:
+    def tool_delta(arguments: str, **kwargs) -> dict:
+        return {
+            "tool_calls": [
+                {
+                    "index": 0,
+                    "function": {"arguments": arguments, **kwargs},
+                    **({"id": "call_0", "type": "function"} if kwargs else {}),
+                },
+            ],
+        }
+
+    return (
+        [make_chunk(tool_delta('{"text": "', name="write"))]
+        + [make_chunk(tool_delta(f"token{i} ")) for i in range(chunks)]
+        + [
+            make_chunk(tool_delta('"}')),
+            make_chunk({}, finish_reason="tool_calls"),
+        ]
+    )
+
+
+def accumulate(chunks: List[ChatCompletionChunk]) -> ChatCompletionChunk:
+    accumulator = ChunkAccumulator()
+    for chunk in chunks:
+        accumulator.add(chunk)
+    return accumulator.merged()
+
+
+def measure(
+    name: str,
+    merge: Callable[[List[ChatCompletionChunk]], ChatCompletionChunk],
+    make_chunks: Callable[[], List[ChatCompletionChunk]],
+    repeat: int,
+) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        # the former merge mutates the chunks, so build them every run
+        chunks = make_chunks()
+        start = time.perf_counter()
+        merge(chunks)
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<40}{best * 1e3:>12.2f} ms")
+    return best
+
+
+def main(chunks: int, repeat: int) -> None:
+    for label, make_chunks in (
+        ("text", lambda: text_response(chunks)),
+        ("tool call", lambda: tool_call_response(chunks)),
+    ):
+        legacy = measure(
+            f"{label}: former merge",
+            legacy_merge,
+            make_chunks,
+            repeat,
+        )
+        new = measure(
+            f"{label}: ChunkAccumulator",
+            accumulate,
+            make_chunks,
+            repeat,
+        )
+        print(f"{label} speedup: {legacy / new:.1f}x\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.chunks, args.repeat)
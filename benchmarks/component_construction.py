@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the construction cost of the built-in components.
+
+The cold cost is measured right after the class level schema cache is
+cleared, the warm cost is the average of the following constructions.
+
+Usage:
+    python benchmarks/component_construction.py --rounds 200
+"""
+
+import argparse
+import inspect
+import time
+from typing import List, Type
+
+from agentscope_bricks import components
+from agentscope_bricks.base.component import Component
+
+
+def builtin_components() -> List[Type[Component]]:
+    """Collect the component classes exported by
+    `agentscope_bricks.components`."""
+    return [
+        obj
+        for obj in vars(components).values()
+        if inspect.isclass(obj)
+        and issubclass(obj, Component)
+        and obj is not Component
+    ]
+
+
+def main(rounds: int) -> None:
+    classes = builtin_components()
+    Component.clear_schema_cache()
+
+    total_cold, total_warm = 0.0, 0.0
+    print(f"{'component':<48}{'cold (ms)':>12}{'warm (ms)':>12}")
+    for cls in classes:
+        start = time.perf_counter()
+        cls()
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            cls()
+        warm = (time.perf_counter() - start) / rounds
+
+        total_cold += cold
+        total_warm += warm
+        print(f"{cls.__name__:<48}{cold * 1e3:>12.3f}{warm * 1e3:>12.3f}")
+
+    print(
+        f"{'total (' + str(len(classes)) + ' components)':<48}"
+        f"{total_cold * 1e3:>12.3f}{total_warm * 1e3:>12.3f}",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    main(parser.parse_args().rounds)
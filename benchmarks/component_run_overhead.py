@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the overhead of calling `Component.run` from sync code.
+
+It compares the former `asgiref.sync.async_to_sync` path, which sets up
+loop machinery per call, with the event loop of the calling thread used by
+`Component.run` now. The component itself does no I/O, so the numbers are
+the pure per-call overhead. It then runs a component blocking its loop,
+as a sync SDK call would, from several threads, whose calls run in
+parallel on their own loops.
+
+Usage:
+    python benchmarks/component_run_overhead.py --calls 20000 --threads 8
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from asgiref.sync import async_to_sync
+from pydantic import BaseModel
+
+from agentscope_bricks.base.component import Component
+
+
+class EchoInput(BaseModel):
+    text: str
+
+
+class EchoOutput(BaseModel):
+    text: str
+
+
+class Echo(Component[EchoInput, EchoOutput]):
+    name = "echo"
+    description = "Return the input text"
+
+    async def _arun(self, args: EchoInput, **kwargs: Any) -> EchoOutput:
+        return EchoOutput(text=args.text)
+
+
+class BlockingEcho(Echo):
+    name = "blocking_echo"
+
+    async def _arun(self, args: EchoInput, **kwargs: Any) -> EchoOutput:
+        time.sleep(0.01)
+        return EchoOutput(text=args.text)
+
+
+def measure(name: str, call: Callable[[], Any], calls: int) -> float:
+    call()  # warm up
+    start = time.perf_counter()
+    for _ in range(calls):
+        call()
+    per_call = (time.perf_counter() - start) / calls
+    print(f"{name:<32}{per_call * 1e6:>12.1f} us/call")
+    return per_call
+
+
+def main(calls: int, threads: int) -> None:
+    component = Echo()
+    args = EchoInput(text="hello")
+
+    before = measure(
+        "async_to_sync per call",
+        lambda: async_to_sync(component.arun)(args),
+        calls,
+    )
+    after = measure(
+        "thread loop (run)",
+        lambda: component.run(args),
+        calls,
+    )
+    print(f"speedup: {before / after:.2f}x")
+
+    blocking = BlockingEcho()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(lambda _: blocking.run(args), range(threads * 10)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{threads * 10} blocking calls of 10 ms from {threads} threads: "
+        f"{elapsed:.2f} s ({threads * 10 * 0.01 / elapsed:.1f}x parallel)",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+    main(args.calls, args.threads)
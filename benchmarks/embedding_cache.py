@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the lookups of the embedding cache on a large number of cached
+vectors.
+
+The cache is filled with random vectors of synthetic texts, then opened
+again as by a new process, and the benchmark reports:
+
+- the size of the files and the time to load the hash index,
+- the latency percentiles of the lookups of one text and of a batch of
+  texts, all of them cached, and of texts not cached,
+- the resident memory of the process after the lookups, the vectors file
+  being memory mapped, only the hash index is loaded, and the pages of the
+  looked up vectors are page cache mapped into the process.
+
+Usage:
+    python benchmarks/embedding_cache.py --vectors 1000000 --dimension 256
+"""
+
+import argparse
+import os
+import random
+import resource
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from agentscope_bricks.utils.embedding_cache_util import EmbeddingCache
+
+MODEL = "text-embedding-v4"
+
+
+def rss_mb() -> Dict[str, float]:
+    """The resident memory of the process, anonymous and file backed, the
+    latter is page cache the kernel reclaims under memory pressure."""
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        return {
+            name: int(fields[name].split()[0]) / 2**10
+            for name in ("RssAnon", "RssFile")
+        }
+    except (OSError, KeyError):
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"RssAnon": maxrss / 2**10, "RssFile": 0.0}
+
+
+def percentiles(call: Callable[[], None], repeat: int) -> List[float]:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return [latencies[len(latencies) // 2], latencies[int(repeat * 0.99)]]
+
+
+def main(args: argparse.Namespace) -> None:
+    path = args.path or tempfile.mkdtemp(prefix="embedding_cache_")
+    cache = EmbeddingCache(path, fsync=False)
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for offset in range(0, args.vectors, args.batch):
+        count = min(args.batch, args.vectors - offset)
+        cache.add(
+            MODEL,
+            [f"document {i}" for i in range(offset, offset + count)],
+            rng.standard_normal((count, args.dimension), dtype="float32"),
+        )
+    elapsed = time.perf_counter() - start
+    size = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+    print(
+        f"filled {args.vectors} vectors of dimension {args.dimension} in "
+        f"{elapsed:.1f} s, {size / 2**20:.0f} MB on disk",
+    )
+    del cache
+
+    rss = rss_mb()
+    cache = EmbeddingCache(path, fsync=False)
+    start = time.perf_counter()
+    cache.lookup(MODEL, ["document 0"])
+    print(f"index loaded in {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+    picker = random.Random(0)
+
+    def one() -> None:
+        text = f"document {picker.randrange(args.vectors)}"
+        assert cache.lookup(MODEL, [text])[0] is not None
+
+    def batch() -> None:
+        texts = [
+            f"document {picker.randrange(args.vectors)}"
+            for _ in range(args.lookup_batch)
+        ]
+        cache.lookup(MODEL, texts)
+
+    def missing() -> None:
+        assert cache.lookup(MODEL, [f"missing {picker.random()}"])[0] is None
+
+    for name, call in (
+        ("one cached text", one),
+        (f"{args.lookup_batch} cached texts", batch),
+        ("one missing text", missing),
+    ):
+        p50, p99 = percentiles(call, args.lookups)
+        print(
+            f"lookup of {name}: p50 {p50 * 1e3:.3f} ms, "
+            f"p99 {p99 * 1e3:.3f} ms",
+        )
+    after = rss_mb()
+    print(
+        f"resident memory added by the cache: "
+        f"{after['RssAnon'] - rss['RssAnon']:.0f} MB anonymous, "
+        f"{after['RssFile'] - rss['RssFile']:.0f} MB of mapped page cache",
+    )
+
+    if not args.path:
+        shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=1000000)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--batch", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--lookup-batch", type=int, default=10)
+    parser.add_argument(
+        "--path",
+        default=None,
+        help="Directory of the cache, kept after the run, a temporary "
+        "directory by default",
+    )
+    main(parser.parse_args())
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark repeated LLM calls passing a per-call `api_key`.
+
+It compares the former behavior, building a new `AsyncOpenAI` client for
+every call, which opens a new connection each time, with the pooled
+clients used by `BaseLLM` now, which keep their connections alive across
+calls. By default the calls go to a local mock server over plain HTTP, so
+the difference is the client construction plus the TCP handshake; against
+a real HTTPS endpoint the TLS handshake is saved as well.
+
+Usage:
+    python benchmarks/llm_client_pool.py --calls 200
+    python benchmarks/llm_client_pool.py --calls 50 \
+        --base-url https://dashscope.aliyuncs.com/compatible-mode/v1 \
+        --api-key $DASHSCOPE_API_KEY --model qwen-turbo
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from aiohttp import web
+from openai import AsyncOpenAI
+
+from agentscope_bricks.models.llm import BaseLLM
+from agentscope_bricks.utils.client_pool_util import LLMClientPool
+
+MESSAGES = [{"role": "user", "content": "Say hi"}]
+
+
+async def chat_completion(request: web.Request) -> web.Response:
+    body = await request.json()
+    return web.json_response(
+        {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "hi"},
+                },
+            ],
+        },
+    )
+
+
+async def start_mock_server() -> web.AppRunner:
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat_completion)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+
+async def measure(
+    name: str,
+    call: Callable[[], Awaitable[None]],
+    calls: int,
+) -> List[float]:
+    await call()  # warm up
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(
+        f"{name:<28}"
+        f"mean {statistics.mean(latencies) * 1e3:>8.2f} ms   "
+        f"p50 {latencies[len(latencies) // 2] * 1e3:>8.2f} ms   "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e3:>8.2f} ms",
+    )
+    return latencies
+
+
+async def main(
+    calls: int,
+    base_url: Optional[str],
+    api_key: str,
+    model: str,
+) -> None:
+    runner = None
+    if base_url is None:
+        runner = await start_mock_server()
+        port = runner.addresses[0][1]
+        base_url = f"http://127.0.0.1:{port}/v1"
+
+    async def new_client_per_call() -> None:
+        client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        try:
+            await client.chat.completions.create(
+                model=model,
+                messages=MESSAGES,
+            )
+        finally:
+            await client.close()
+
+    pool = LLMClientPool()
+    llm = BaseLLM(client=AsyncOpenAI(api_key=api_key), client_pool=pool)
+
+    async def pooled_client() -> None:
+        await llm.arun(
+            model=model,
+            messages=MESSAGES,
+            api_key=api_key,
+            base_url=base_url,
+        )
+
+    try:
+        before = await measure(
+            "new client per call",
+            new_client_per_call,
+            calls,
+        )
+        after = await measure("pooled client", pooled_client, calls)
+        print(
+            f"mean speedup: "
+            f"{statistics.mean(before) / statistics.mean(after):.2f}x",
+        )
+    finally:
+        await pool.aclose()
+        if runner is not None:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument("--api-key", default="sk-mock")
+    parser.add_argument("--model", default="mock")
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.base_url, args.api_key, args.model))
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+Load test of the agent loop against the local mock model server.
+
+It drives one of the scenarios below at a series of target QPS, with the
+requests sent on a fixed schedule whether or not the previous ones are
+done, and reports for each target:
+
+- the achieved throughput, the latency percentiles and the errors,
+- the latency added by the library, the end-to-end latency minus the time
+  the mock server spent answering the upstream calls of the request,
+- the CPU time of this process per request, the mock server runs in a
+  separate process so that it is not counted,
+- the sustainability, a target is sustained if at least 95% of it is
+  achieved without error.
+
+The maximum sustainable throughput is the highest target sustained.
+
+Scenarios:
+    llm      BaseLLM.astream of a streamed text completion
+    agent    function_call_with_openai with one tool call round trip
+    server   the agent loop behind FastApiServer, called over ASGI
+
+Usage:
+    python benchmarks/load_test.py --scenario agent --qps 20,50,100,200
+    python benchmarks/load_test.py --scenario llm --ttft 0.3 \
+        --tokens-per-second 50 --completion-tokens 100 --duration 20
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List
+
+import aiohttp
+import httpx
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+
+from agentscope_bricks.base.component import Component
+from agentscope_bricks.models.llm import BaseLLM
+from agentscope_bricks.utils.schemas.modelstudio_llm import (
+    ModelstudioChatRequest,
+)
+from agentscope_bricks.utils.schemas.oai_llm import Parameters, UserMessage
+from agentscope_bricks.utils.server_utils.fastapi_server import FastApiServer
+from agentscope_bricks.utils.server_utils.mock_server import (
+    MockServerConfig,
+    MockToolCall,
+)
+from agentscope_bricks.utils.tool_call_utils import function_call_with_openai
+
+MODEL = "mock"
+
+
+class WeatherInput(BaseModel):
+    city: str
+
+
+class WeatherOutput(BaseModel):
+    forecast: str
+
+
+class Weather(Component[WeatherInput, WeatherOutput]):
+    name = "weather"
+    description = "Get the weather forecast of a city"
+
+    async def _arun(self, args: WeatherInput, **kwargs: Any) -> WeatherOutput:
+        return WeatherOutput(forecast=f"Sunny in {args.city}")
+
+
+def start_mock_server(config: MockServerConfig, port: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "agentscope_bricks.utils.server_utils.mock_server",
+            "--port",
+            str(port),
+            "--config",
+            config.model_dump_json(),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def mock_stats(session: aiohttp.ClientSession, url: str) -> Dict:
+    async with session.get(f"{url}/mock/stats") as response:
+        return await response.json()
+
+
+async def wait_ready(session: aiohttp.ClientSession, url: str) -> None:
+    for _ in range(100):
+        try:
+            await mock_stats(session, url)
+            return
+        except aiohttp.ClientError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Mock server at {url} did not start")
+
+
+def make_scenario(
+    scenario: str,
+    base_url: str,
+) -> Callable[[], Awaitable[None]]:
+    llm = BaseLLM(client=AsyncOpenAI(api_key="sk-mock", base_url=base_url))
+    components = {"weather": Weather()}
+
+    async def run_llm() -> None:
+        async for _ in llm.astream(
+            model=MODEL,
+            messages=[UserMessage(content="Tell me a story")],
+            parameters=Parameters(),
+        ):
+            pass
+
+    async def agent_loop(
+        messages: List[Any],
+    ) -> AsyncGenerator[Any, None]:
+        async for chunk in function_call_with_openai(
+            model=MODEL,
+            model_cls=llm,
+            messages=messages,
+            parameters=Parameters(),
+            available_components=components,
+        ):
+            yield chunk
+
+    async def run_agent() -> None:
+        messages = [UserMessage(content="Weather in Hangzhou?")]
+        async for _ in agent_loop(messages):
+            pass
+
+    if scenario == "llm":
+        return run_llm
+    if scenario == "agent":
+        return run_agent
+
+    async def handler(
+        request: ModelstudioChatRequest,
+    ) -> AsyncGenerator[str, None]:
+        async for chunk in agent_loop(list(request.messages)):
+            if chunk is not None:
+                yield chunk.model_dump_json(exclude_none=True)
+
+    server = FastApiServer(
+        func=handler,
+        endpoint_path="/api/v1/chat/completions",
+        request_model=ModelstudioChatRequest,
+    )
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=server.app),
+        base_url="http://agent",
+    )
+    body = {
+        "model": MODEL,
+        "messages": [{"role": "user", "content": "Weather in Hangzhou?"}],
+    }
+
+    async def run_server() -> None:
+        async with client.stream(
+            "POST",
+            "/api/v1/chat/completions",
+            json=body,
+        ) as response:
+            async for line in response.aiter_lines():
+                if '"code"' in line and '"message"' in line:
+                    raise RuntimeError(line)
+
+    return run_server
+
+
+async def run_level(
+    call: Callable[[], Awaitable[None]],
+    qps: float,
+    duration: float,
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    async def one() -> None:
+        start = time.perf_counter()
+        try:
+            await call()
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            return
+        latencies.append(time.perf_counter() - start)
+
+    count = max(1, int(qps * duration))
+    tasks = []
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    for i in range(count):
+        # open loop, the requests are sent on schedule even if the previous
+        # ones are late
+        delay = start + i / qps - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one()))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    return {
+        "count": count,
+        "latencies": sorted(latencies),
+        "errors": errors,
+        "elapsed": elapsed,
+        "cpu": time.process_time() - cpu_start,
+    }
+
+
+def percentile(values: List[float], q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def main(args: argparse.Namespace) -> None:
+    if not args.trace_logs:
+        logging.getLogger("agentscope_bricks").setLevel(logging.WARNING)
+    config = MockServerConfig(
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        tool_calls=(
+            [MockToolCall(name="weather", arguments={"city": "Hangzhou"})]
+            if args.scenario != "llm"
+            else []
+        ),
+    )
+    mock_url = f"http://127.0.0.1:{args.port}"
+    process = start_mock_server(config, args.port)
+    session = aiohttp.ClientSession()
+    try:
+        await wait_ready(session, mock_url)
+        call = make_scenario(args.scenario, f"{mock_url}/compatible-mode/v1")
+        await run_level(call, qps=10, duration=0.5)  # warm up
+
+        print(
+            f"{'target':>8} {'achieved':>9} {'p50 ms':>9} {'p99 ms':>9} "
+            f"{'added ms':>9} {'cpu ms':>8} {'errors':>7}  sustained",
+        )
+        max_sustained = 0.0
+        for qps in args.qps:
+            before = await mock_stats(session, mock_url)
+            level = await run_level(call, qps, args.duration)
+            after = await mock_stats(session, mock_url)
+
+            done = len(level["latencies"])
+            achieved = done / level["elapsed"]
+            sustained = not level["errors"] and achieved >= 0.95 * qps
+            if sustained:
+                max_sustained = max(max_sustained, qps)
+            upstream = after["upstream_time"] - before["upstream_time"]
+            added = (
+                statistics.mean(level["latencies"]) - upstream / done
+                if done
+                else float("nan")
+            )
+            cpu = level["cpu"] / level["count"]
+            p50 = percentile(level["latencies"], 0.5) if done else 0.0
+            p99 = percentile(level["latencies"], 0.99) if done else 0.0
+            print(
+                f"{qps:>8.0f} {achieved:>9.1f} {p50 * 1e3:>9.1f} "
+                f"{p99 * 1e3:>9.1f} {added * 1e3:>9.2f} {cpu * 1e3:>8.2f} "
+                f"{len(level['errors']):>7}  {'yes' if sustained else 'no'}",
+            )
+            if level["errors"]:
+                print(f"    first error: {level['errors'][0]}")
+        print(f"max sustainable throughput: {max_sustained:.0f} QPS")
+    finally:
+        await session.close()
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--scenario",
+        choices=["llm", "agent", "server"],
+        default="agent",
+    )
+    parser.add_argument(
+        "--qps",
+        type=lambda s: [float(q) for q in s.split(",")],
+        default=[10, 20, 50, 100, 200],
+        help="Comma separated target QPS, in increasing order",
+    )
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8910)
+    parser.add_argument("--ttft", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--completion-tokens", type=int, default=20)
+    parser.add_argument(
+        "--trace-logs",
+        action="store_true",
+        help="Keep the INFO trace logs, they are part of the overhead but "
+        "flood the output",
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the batched TextEmbedding on short documents against the local
+mock model server.
+
+The documents are short sentences drawn from a smaller pool, so that a
+share of them are duplicates as in a real corpus. The benchmark embeds
+them with:
+
+- a caller loop sending the documents in chunks of the provider batch
+  size one request after the other, without deduplication, on a sample
+  of the documents as it is slow,
+- a single `TextEmbedding.arun` call on all the documents, deduplicating,
+  chunking and dispatching the requests concurrently,
+
+and reports the requests sent, the wall time and the throughput of each.
+The mock server runs in a separate process and enforces the batch size.
+
+Usage:
+    python benchmarks/text_embedding.py --documents 100000 --unique 0.7 \
+        --latency 0.02 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+from typing import List
+
+import aiohttp
+from openai import AsyncOpenAI
+
+from agentscope_bricks.models.embedding import TextEmbedding
+from agentscope_bricks.utils.server_utils.mock_server import MockServerConfig
+
+WORDS = (
+    "agent tool model memory search plan answer user city weather price "
+    "flight hotel stock news video image music code test cloud data"
+).split()
+ENDPOINT = "/compatible-mode/v1/embeddings"
+
+
+def make_documents(size: int, unique: float) -> List[str]:
+    rng = random.Random(0)
+    pool = [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+        + f" #{i}"
+        for i in range(max(1, int(size * unique)))
+    ]
+    return pool + [rng.choice(pool) for _ in range(size - len(pool))]
+
+
+async def embedding_requests(session: aiohttp.ClientSession, url: str) -> int:
+    async with session.get(f"{url}/mock/stats") as response:
+        return (await response.json())["requests"].get(ENDPOINT, 0)
+
+
+async def wait_ready(session: aiohttp.ClientSession, url: str) -> None:
+    for _ in range(100):
+        try:
+            await embedding_requests(session, url)
+            return
+        except aiohttp.ClientError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Mock server at {url} did not start")
+
+
+async def main(args: argparse.Namespace) -> None:
+    config = MockServerConfig(
+        embedding_dimension=args.dimension,
+        embedding_latency=args.latency,
+        embedding_batch_size=args.batch_size,
+    )
+    url = f"http://127.0.0.1:{args.port}"
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "agentscope_bricks.utils.server_utils.mock_server",
+            "--port",
+            str(args.port),
+            "--config",
+            config.model_dump_json(),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    documents = make_documents(args.documents, args.unique)
+    client = AsyncOpenAI(
+        api_key="sk-mock",
+        base_url=f"{url}/compatible-mode/v1",
+    )
+    try:
+        async with aiohttp.ClientSession() as session:
+            await wait_ready(session, url)
+
+            sample = documents[: args.baseline_documents]
+            before = await embedding_requests(session, url)
+            start = time.perf_counter()
+            for i in range(0, len(sample), args.batch_size):
+                await client.embeddings.create(
+                    model="mock",
+                    input=sample[i : i + args.batch_size],
+                )
+            loop_time = time.perf_counter() - start
+            loop_requests = await embedding_requests(session, url) - before
+
+            embedding = TextEmbedding(
+                client=client,
+                batch_size=args.batch_size,
+                max_concurrency=args.concurrency,
+            )
+            before = await embedding_requests(session, url)
+            start = time.perf_counter()
+            response = await embedding.arun(documents, model="mock")
+            batched_time = time.perf_counter() - start
+            batched_requests = await embedding_requests(session, url) - before
+    finally:
+        process.terminate()
+        process.wait()
+
+    assert len(response.data) == len(documents)
+    print(
+        f"{len(documents)} documents, {len(set(documents))} unique, "
+        f"batch size {args.batch_size}, mock latency {args.latency * 1e3:.0f}"
+        f" ms",
+    )
+    loop_rate = len(sample) / loop_time
+    batched_rate = len(documents) / batched_time
+    print(
+        f"caller loop on {len(sample)} documents: {loop_requests} requests, "
+        f"{loop_time:.2f} s, {loop_rate:.0f} documents/s",
+    )
+    print(
+        f"TextEmbedding.arun on {len(documents)} documents: "
+        f"{batched_requests} requests, {batched_time:.2f} s, "
+        f"{batched_rate:.0f} documents/s ({batched_rate / loop_rate:.1f}x)",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument(
+        "--unique",
+        type=float,
+        default=0.7,
+        help="Share of unique documents",
+    )
+    parser.add_argument("--baseline-documents", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--port", type=int, default=8911)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the tool registry on a synthetic catalog of tools.
+
+The catalog has one tool per domain and action, e.g. `flight_search`,
+with a description and a few arguments. The benchmark reports:
+
+- the per-turn cost of preparing the tools of a request, the former
+  `check_and_update_available_tools` building the tool models of every
+  component at each call, against the pre-serialized schemas of the
+  registry, both including the serialization of the request parameters,
+- the prompt tokens of the tools offered with all the tools and with the
+  top-k selection, estimated with `estimate_tokens`,
+- the latency of the top-k selection and the share of the queries whose
+  target tool is selected.
+
+The tools and the queries are embedded locally by hashing their words, so
+the latency is the one of the registry, an embedding service adds the
+round trip of the query embedding, the tool vectors being cached.
+
+Usage:
+    python benchmarks/tool_registry.py --tools 500 --top-k 8
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+from openai.types import CreateEmbeddingResponse
+from pydantic import BaseModel, Field
+
+from agentscope_bricks.base.component import Component
+from agentscope_bricks.utils.schemas.oai_llm import Parameters
+from agentscope_bricks.utils.token_util import estimate_tokens
+from agentscope_bricks.utils.tool_call_utils import (
+    check_and_update_available_tools,
+)
+from agentscope_bricks.utils.tool_registry_util import ToolRegistry
+
+DOMAINS = [
+    "flight",
+    "hotel",
+    "weather",
+    "stock",
+    "calendar",
+    "email",
+    "invoice",
+    "contract",
+    "recipe",
+    "movie",
+    "music",
+    "podcast",
+    "taxi",
+    "train",
+    "parcel",
+    "pharmacy",
+    "insurance",
+    "mortgage",
+    "crypto",
+    "payroll",
+    "vacation",
+    "ticket",
+    "restaurant",
+    "gym",
+    "library",
+]
+ACTIONS = [
+    "search",
+    "create",
+    "update",
+    "cancel",
+    "list",
+    "summarize",
+    "export",
+    "share",
+    "archive",
+    "remind",
+    "compare",
+    "rate",
+    "translate",
+    "schedule",
+    "refund",
+    "track",
+    "verify",
+    "estimate",
+    "subscribe",
+    "report",
+]
+
+
+class CatalogInput(BaseModel):
+    query: str = Field(..., description="Free text query of the user")
+    limit: int = Field(default=10, description="Maximum number of results")
+    language: str = Field(default="en", description="Language of the reply")
+
+
+class CatalogOutput(BaseModel):
+    result: str
+
+
+class CatalogTool(Component[CatalogInput, CatalogOutput]):
+    async def _arun(self, args: CatalogInput, **kwargs: Any) -> CatalogOutput:
+        return CatalogOutput(result=self.name)
+
+
+class HashingEmbedding:
+    """Local bag of words embedding, each word is hashed to a dimension."""
+
+    def __init__(self, dimension: int = 1024) -> None:
+        self.dimension = dimension
+
+    def _vector(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        for word in text.lower().replace("_", " ").replace(":", "").split():
+            digest = hashlib.md5(word.encode()).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dimension] += 1
+        return vector
+
+    async def arun(
+        self,
+        input: List[str],
+        model: str,
+        **kwargs: Any,
+    ) -> CreateEmbeddingResponse:
+        return CreateEmbeddingResponse(
+            object="list",
+            model=model,
+            data=[
+                {
+                    "object": "embedding",
+                    "index": i,
+                    "embedding": self._vector(t),
+                }
+                for i, t in enumerate(input)
+            ],
+            usage={"prompt_tokens": 0, "total_tokens": 0},
+        )
+
+
+def make_catalog(size: int) -> Dict[str, Component]:
+    pairs = [(d, a) for a in ACTIONS for d in DOMAINS][:size]
+    return {
+        f"{domain}_{action}": CatalogTool(
+            name=f"{domain}_{action}",
+            description=f"{action.capitalize()} {domain} records of the user, "
+            f"e.g. to {action} a {domain} booking or {domain} item.",
+        )
+        for domain, action in pairs
+    }
+
+
+def measure(call: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - start) / repeat
+
+
+def tools_tokens(tools: List[Any]) -> int:
+    return estimate_tokens(
+        json.dumps(
+            [t if isinstance(t, dict) else t.model_dump() for t in tools],
+        ),
+    )
+
+
+async def main(size: int, top_k: int, queries: int, repeat: int) -> None:
+    catalog = make_catalog(size)
+    registry = ToolRegistry(HashingEmbedding())
+    registry.register_many(catalog)
+    names = list(catalog)
+
+    def legacy_turn() -> None:
+        parameters = Parameters()
+        _, parameters.tools = check_and_update_available_tools(
+            parameters.tools,
+            catalog,
+        )
+        parameters.model_dump(exclude_none=True)
+
+    def registry_turn() -> None:
+        parameters = Parameters()
+        parameters.tools = registry.schemas(names)
+        parameters.model_dump(exclude_none=True)
+
+    legacy = measure(legacy_turn, repeat)
+    pre_serialized = measure(registry_turn, repeat)
+    print(f"catalog of {size} tools")
+    print(
+        f"tool preparation per turn: legacy {legacy * 1e3:.2f} ms, "
+        f"registry {pre_serialized * 1e3:.2f} ms "
+        f"({legacy / pre_serialized:.1f}x)",
+    )
+
+    start = time.perf_counter()
+    await registry.embed_tools()
+    print(
+        f"tool embedding, once: {(time.perf_counter() - start) * 1e3:.1f} ms",
+    )
+
+    rng = random.Random(0)
+    latencies: List[float] = []
+    hits = 0
+    selected_tokens: List[int] = []
+    for _ in range(queries):
+        target = rng.choice(names)
+        domain, action = target.split("_")
+        query = f"Please {action} my {domain} for next week"
+        start = time.perf_counter()
+        selected = await registry.select(query, top_k)
+        latencies.append(time.perf_counter() - start)
+        hits += target in selected
+        selected_tokens.append(tools_tokens(registry.schemas(selected)))
+
+    all_tokens = tools_tokens(registry.schemas())
+    top_tokens = statistics.mean(selected_tokens)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"tool prompt tokens: all {all_tokens}, top-{top_k} {top_tokens:.0f} "
+        f"({1 - top_tokens / all_tokens:.1%} fewer)",
+    )
+    print(
+        f"top-{top_k} selection: p50 {p50 * 1e3:.2f} ms, "
+        f"p99 {p99 * 1e3:.2f} ms, "
+        f"target selected in {hits / queries:.1%} of the queries",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tools", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.tools, args.top_k, args.queries, args.repeat))
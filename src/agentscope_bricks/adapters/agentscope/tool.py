@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
-import concurrent.futures
+import asyncio
+import contextvars
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import (
     Any,
     Dict,
@@ -20,12 +22,27 @@ except ImportError:
     )
 
 from agentscope_bricks.base.component import Component
+from agentscope_bricks.utils.asyncio_util import run_sync
+from agentscope_bricks.utils.deadline_util import deadline
+
+# the threads running the async components when the tool is called from a
+# running event loop, each of them keeps its own loop across the calls
+_tool_executor = ThreadPoolExecutor(thread_name_prefix="agentscope-bricks")
+
+
+def _loop_running() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
 
 
 def agentscope_tool_adapter(
     component: Component,
     name: Optional[str] = None,
     description: Optional[str] = None,
+    timeout: Optional[float] = None,
 ) -> RegisteredToolFunction:
     """Convert an agentscope_bricks component to an AgentScope tool.
 
@@ -38,6 +55,8 @@ def agentscope_tool_adapter(
             component.name
         description (str, optional): Override the component description.
             Defaults to component.description
+        timeout (float, optional): Deadline of each call in seconds, bounded
+            by the deadline of the calling request. Defaults to None
 
     Returns:
         RegisteredToolFunction: The AgentScope tool function
@@ -67,8 +86,6 @@ def agentscope_tool_adapter(
     def func_wrapper(**kwargs: Any) -> ToolResponse:
         """Wrapper function that adapts component execution to AgentScope
         format."""
-        import asyncio
-
         # Validate input with component's input type
         if component.input_type:
             try:
@@ -86,24 +103,23 @@ def agentscope_tool_adapter(
         else:
             validated_input = kwargs
 
-        # Execute the component
+        # Execute the component, the caller's context is propagated so that
+        # the component is cancelled once the request deadline expires
         try:
-            if asyncio.iscoroutinefunction(component.arun):
-                # Check if we're already in an event loop
-                try:
-
-                    def run_async() -> Any:
-                        return asyncio.run(component.arun(validated_input))
-
-                    with concurrent.futures.ThreadPoolExecutor() as executor:
-                        future = executor.submit(run_async)
-                        result = future.result()
-                except RuntimeError:
-                    # No event loop running, safe to use asyncio.run
-                    result = asyncio.run(component.arun(validated_input))
-            else:
-                # Run sync component
-                result = component.run(validated_input)
+            with deadline(timeout=timeout):
+                if not asyncio.iscoroutinefunction(component.arun):
+                    # Run sync component
+                    result = component.run(validated_input)
+                elif _loop_running():
+                    # the running loop cannot be blocked on itself
+                    result = _tool_executor.submit(
+                        contextvars.copy_context().run,
+                        run_sync,
+                        component.arun,
+                        validated_input,
+                    ).result()
+                else:
+                    result = run_sync(component.arun, validated_input)
         except Exception as e:
             return ToolResponse(
                 content=[
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import json
 from typing import (
     Any,
@@ -21,6 +22,7 @@ except ImportError:
 from pydantic import BaseModel
 
 from agentscope_bricks.base.component import Component
+from agentscope_bricks.utils.deadline_util import deadline
 
 
 class AutogenToolAdapter(BaseTool[BaseModel, Any]):
@@ -37,6 +39,8 @@ class AutogenToolAdapter(BaseTool[BaseModel, Any]):
             component.name
         description (str, optional): Override the component description.
             Defaults to component.description
+        timeout (float, optional): Deadline of each call in seconds, bounded
+            by the deadline of the calling request. Defaults to None
 
     Examples:
         Basic usage with a search component:
@@ -82,6 +86,7 @@ class AutogenToolAdapter(BaseTool[BaseModel, Any]):
         component: Component,
         name: Optional[str] = None,
         description: Optional[str] = None,
+        timeout: Optional[float] = None,
     ) -> None:
         """Initialize the component tool adapter.
 
@@ -89,9 +94,11 @@ class AutogenToolAdapter(BaseTool[BaseModel, Any]):
             component: The agentscope_bricks component to wrap
             name: Optional override for the component name
             description: Optional override for the component description
+            timeout: Optional deadline of each call in seconds
         """
 
         self._component = component
+        self._timeout = timeout
 
         # Use provided name/description or fall back to component defaults
         tool_name = name or component.name
@@ -118,15 +125,23 @@ class AutogenToolAdapter(BaseTool[BaseModel, Any]):
             The result of the component execution
 
         Raises:
-            Exception: If the operation is cancelled or the component
-            execution fails
+            asyncio.CancelledError: If the cancellation token is cancelled
+            Exception: If the component execution fails, or the deadline
+            expires
         """
 
-        # Run the component
+        # Run the component, the execution is cancelled together with the
+        # cancellation token
+        with deadline(timeout=self._timeout):
+            task = asyncio.ensure_future(self._component.arun(args))
+        cancellation_token.link_future(task)
         try:
-            result = await self._component.arun(args)
+            result = await task
             # make sure return as string
             return json.dumps(result.model_dump(), ensure_ascii=False)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
         except Exception as e:
             # Re-raise with more context
             raise Exception(
@@ -18,6 +18,7 @@ from typing import (
 from pydantic import BaseModel
 
 from agentscope_bricks.base.component import Component
+from agentscope_bricks.utils.deadline_util import deadline
 
 try:
     from langchain_core.messages import ToolCall, ToolMessage
@@ -172,6 +173,9 @@ class LanggraphNodeAdapter(ToolNode):
         messages.
             The same key will be used for the output from the ToolNode.
             Defaults to "messages".
+        timeout: Deadline of each tool call in seconds, bounded by the
+            deadline of the calling request. The tool call is cancelled
+            once it expires. Defaults to None.
 
     The `ToolNode` is roughly analogous to:
 
@@ -208,6 +212,7 @@ class LanggraphNodeAdapter(ToolNode):
             tuple[type[Exception], ...],
         ] = True,
         messages_key: str = "messages",
+        timeout: Optional[float] = None,
     ) -> None:
         super().__init__(
             [],
@@ -221,6 +226,7 @@ class LanggraphNodeAdapter(ToolNode):
         self.tools_output: dict[str, BaseModel] = {}
         self.handle_tool_errors = handle_tool_errors
         self.messages_key = messages_key
+        self.timeout = timeout
         self.tool_schemas = []
         for tool_ in tools:
             self.tools_by_name[tool_.name] = tool_.arun
@@ -315,14 +321,15 @@ class LanggraphNodeAdapter(ToolNode):
                 config,
                 tool_name=call["name"],
             )
-            response = asyncio.run(
-                async_tool_call(
-                    self.tools_by_name,
-                    call["name"],
-                    tool_input,
-                    **kwargs,
-                ),
-            )
+            with deadline(timeout=self.timeout):
+                response = asyncio.run(
+                    async_tool_call(
+                        self.tools_by_name,
+                        call["name"],
+                        tool_input,
+                        **kwargs,
+                    ),
+                )
             response = self._format_output(
                 response,
                 call["id"],
@@ -392,12 +399,13 @@ class LanggraphNodeAdapter(ToolNode):
                 config,
                 tool_name=call["name"],
             )
-            response = await async_tool_call(
-                self.tools_by_name,
-                call["name"],
-                tool_input,
-                **kwargs,
-            )
+            with deadline(timeout=self.timeout):
+                response = await async_tool_call(
+                    self.tools_by_name,
+                    call["name"],
+                    tool_input,
+                    **kwargs,
+                )
 
             response = self._format_output(
                 response,
@@ -1,11 +1,18 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import json
+import threading
+import time
+import weakref
 from typing import (
     Any,
+    AsyncGenerator,
     Dict,
     Generic,
     List,
+    NamedTuple,
     Optional,
+    Tuple,
     Type,
     TypeVar,
     Union,
@@ -14,14 +21,22 @@ from typing import (
 )
 
 import jsonref
-from asgiref.sync import async_to_sync
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, ConfigDict, ValidationError
 
 from agentscope_runtime.engine.schemas.agent_schemas import (
     FunctionParameters,
     FunctionTool,
 )
 
+from agentscope_bricks.utils.asyncio_util import run_sync
+from agentscope_bricks.utils.cache_util import ResultCache, canonical_hash
+from agentscope_bricks.utils.deadline_util import wait_with_deadline
+from agentscope_bricks.utils.hedging_util import HedgePolicy
+from agentscope_bricks.utils.rate_limit_util import (
+    RateLimitConfig,
+    RateLimiter,
+    get_rate_limiter,
+)
 from .__base import BaseComponent
 
 # A type variable bounded by BaseModel, meaning it can represent BaseModel or
@@ -30,6 +45,46 @@ ComponentArgsT = TypeVar("ComponentArgsT", bound=BaseModel, contravariant=True)
 ComponentReturnT = TypeVar("ComponentReturnT", bound=BaseModel, covariant=True)
 
 
+class FrozenFunctionParameters(FunctionParameters):
+    """Read-only parameter schema shared by every instance of a component
+    class."""
+
+    model_config = ConfigDict(frozen=True)
+
+
+class BatchResult(BaseModel):
+    """The result of one item in a batch execution."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: int
+    """The index of the item in the input list."""
+
+    result: Optional[Any] = None
+    """The component output, None if the item failed."""
+
+    error: Optional[BaseException] = None
+    """The exception raised by the item, None if the item succeeded."""
+
+    start_time: float = 0.0
+    """The timestamp when the item started to run."""
+
+    elapsed: float = 0.0
+    """The execution time of the item in seconds, queueing excluded."""
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+class ComponentSchema(NamedTuple):
+    """Class level schema information of a component."""
+
+    input_type: Type[BaseModel]
+    return_type: Type[BaseModel]
+    parameters: FunctionParameters
+
+
 class Component(BaseComponent, Generic[ComponentArgsT, ComponentReturnT]):
     """Base class for all zh, supporting both async and streaming
     capabilities.
@@ -37,6 +92,34 @@ class Component(BaseComponent, Generic[ComponentArgsT, ComponentReturnT]):
 
     name: str
     description: str
+    result_cache: Optional[ResultCache] = None
+    # concurrent calls with the same arguments share one in-flight `_arun`,
+    # opt-in for the idempotent components only (searches, retrieval), the
+    # key is the input model plus the kwargs of the call, except the per
+    # request ones listed in `single_flight_ignored_kwargs`
+    single_flight: bool = False
+    single_flight_ignored_kwargs: Tuple[str, ...] = (
+        "trace_event",
+        "trace_context",
+        "context",
+    )
+    # concurrency and rate limits shared by all the instances with the same
+    # component name in the process, e.g.
+    # `rate_limit = RateLimitConfig(max_concurrency=5, rate=10, timeout=30)`
+    rate_limit: Optional[RateLimitConfig] = None
+    # hedged requests for read-only components only, see `HedgePolicy`
+    hedge_policy: Optional[HedgePolicy] = None
+
+    # the schema only depends on the class, so it is generated once per
+    # subclass and shared by all of its instances
+    _schema_cache: "weakref.WeakKeyDictionary[type, ComponentSchema]" = (
+        weakref.WeakKeyDictionary()
+    )
+    _schema_cache_lock = threading.RLock()
+
+    # in-flight calls shared by the single flight layer, keyed by the event
+    # loop and the canonical arguments
+    _in_flight_calls: Dict[str, asyncio.Future] = {}
 
     def __init__(
         self,
@@ -49,7 +132,15 @@ class Component(BaseComponent, Generic[ComponentArgsT, ComponentReturnT]):
         Args:
             name: The name of the component.
             description: The description of the component.
-            **kwargs: Other arguments if needed.
+            **kwargs: Other arguments if needed, including:
+                - result_cache: Optional ResultCache to enable result caching
+                  for idempotent components.
+                - single_flight: Optional bool overriding the class level
+                  single flight setting.
+                - rate_limit: Optional RateLimitConfig overriding the class
+                  level limits.
+                - hedge_policy: Optional HedgePolicy to hedge the calls of
+                  read-only components.
 
         Raises:
             ValueError: If component name and description are not provided.
@@ -62,9 +153,18 @@ class Component(BaseComponent, Generic[ComponentArgsT, ComponentReturnT]):
             raise ValueError(
                 "Component name and description must be provided.",
             )
-        self.input_type = self._input_type()
-        self.return_type = self._return_type()
-        self.parameters = self._parameters_parser()
+        if kwargs.get("result_cache") is not None:
+            self.result_cache = kwargs["result_cache"]
+        if kwargs.get("single_flight") is not None:
+            self.single_flight = kwargs["single_flight"]
+        if kwargs.get("rate_limit") is not None:
+            self.rate_limit = kwargs["rate_limit"]
+        if kwargs.get("hedge_policy") is not None:
+            self.hedge_policy = kwargs["hedge_policy"]
+        schema = self._get_component_schema()
+        self.input_type = schema.input_type
+        self.return_type = schema.return_type
+        self.parameters = schema.parameters
         self.function_schema = FunctionTool(
             name=self.name,
             description=self.description,
@@ -106,6 +206,8 @@ class Component(BaseComponent, Generic[ComponentArgsT, ComponentReturnT]):
 
         Raises:
             TypeError: If input or return types don't match expected schemas.
+            DeadlineExceeded: If the deadline of the current request expires
+                before the execution finishes.
         """
         if not isinstance(args, self.input_type):
             raise TypeError(
@@ -117,19 +219,199 @@ class Component(BaseComponent, Generic[ComponentArgsT, ComponentReturnT]):
         if not kwargs:
             kwargs = {}
 
-        result = await self._arun(args, **kwargs)
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self.result_cache.make_key(self.name, args, kwargs)
+            cached = await self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # the execution is cancelled once the request deadline expires
+        if self.single_flight:
+            result = await wait_with_deadline(
+                self._single_flight_arun(args, **kwargs),
+            )
+        else:
+            result = await wait_with_deadline(
+                self._hedged_arun(args, **kwargs),
+            )
         if not isinstance(result, self.return_type):
             raise TypeError(
                 f"The return must in the format of "
                 f"{self.return_type.__name__} or its subclass",
             )
+        if cache_key is not None and not self.is_degraded(result):
+            await self.result_cache.set(cache_key, result)
         return result
 
+    async def _single_flight_arun(
+        self,
+        args: ComponentArgsT,
+        **kwargs: Any,
+    ) -> ComponentReturnT:
+        """Run `_arun`, sharing one in-flight execution among the concurrent
+        calls with the same component and the same canonical arguments. All
+        the kwargs are part of the key except the per request ones listed in
+        `single_flight_ignored_kwargs`, e.g. the `trace_event`.
+
+        The first caller executes `_arun`, the others wait for it and get a
+        copy of the same result, or the same exception. If the first caller
+        is cancelled, the waiting callers run `_arun` by themselves.
+
+        Args:
+            args: Input parameters adhering to the input schema.
+            **kwargs: Other arguments if needed.
+
+        Returns:
+            ComponentReturnT: Output parameters adhering to the output schema.
+        """
+        loop = asyncio.get_running_loop()
+        selected = {
+            k: v
+            for k, v in kwargs.items()
+            if k not in self.single_flight_ignored_kwargs
+        }
+        key = (
+            f"{id(loop)}:"
+            f"{canonical_hash(type(self), self.name, args, selected)}"
+        )
+
+        future = Component._in_flight_calls.get(key)
+        if future is not None:
+            await asyncio.wait({future})
+            if future.cancelled():
+                return await self._hedged_arun(args, **kwargs)
+            result = future.result()
+            if isinstance(result, BaseModel):
+                return result.model_copy(deep=True)
+            return result
+
+        future = loop.create_future()
+        Component._in_flight_calls[key] = future
+        try:
+            result = await self._hedged_arun(args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # mark the exception as retrieved in case of no waiting caller
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            Component._in_flight_calls.pop(key, None)
+
+    @property
+    def rate_limiter(self) -> Optional[RateLimiter]:
+        """The process wide rate limiter keyed by the component name, None if
+        the component has no limits."""
+        if self.rate_limit is None:
+            return None
+        return get_rate_limiter(f"component:{self.name}", self.rate_limit)
+
+    def get_hedge_key(self, args: ComponentArgsT) -> str:
+        """Get the key of the latency histogram used by the hedge policy,
+        subclasses could split the latencies by e.g. strategy.
+
+        Args:
+            args: Input parameters adhering to the input schema.
+
+        Returns:
+            str: The latency key.
+        """
+        return self.name
+
+    def is_degraded(self, result: ComponentReturnT) -> bool:
+        """Whether a result is a degraded output, returned instead of raising
+        on an upstream error, e.g. an empty search result. Degraded results
+        lose the hedging race, their latency is not recorded, and they are
+        not cached by the result cache.
+
+        Args:
+            result: Output parameters adhering to the output schema.
+
+        Returns:
+            bool: True if the result is degraded.
+        """
+        return False
+
+    def get_adaptive_timeout(
+        self,
+        args: ComponentArgsT,
+        default: float,
+    ) -> float:
+        """Get the timeout adapted from the observed latencies of the hedge
+        policy, the default timeout is used if there is no hedge policy.
+
+        Args:
+            args: Input parameters adhering to the input schema.
+            default: The configured timeout, also the upper bound.
+
+        Returns:
+            float: Timeout in seconds.
+        """
+        if self.hedge_policy is None:
+            return default
+        return self.hedge_policy.get_timeout(self.get_hedge_key(args), default)
+
+    async def _hedged_arun(
+        self,
+        args: ComponentArgsT,
+        **kwargs: Any,
+    ) -> ComponentReturnT:
+        """Run `_arun` with the hedge policy if any, each attempt is run
+        within the concurrency and rate limits.
+
+        Args:
+            args: Input parameters adhering to the input schema.
+            **kwargs: Other arguments if needed.
+
+        Returns:
+            ComponentReturnT: Output parameters adhering to the output schema.
+        """
+        if self.hedge_policy is None:
+            return await self._limited_arun(args, **kwargs)
+        return await self.hedge_policy.run(
+            lambda: self._limited_arun(args, **kwargs),
+            key=self.get_hedge_key(args),
+            accept=lambda result: not self.is_degraded(result),
+        )
+
+    async def _limited_arun(
+        self,
+        args: ComponentArgsT,
+        **kwargs: Any,
+    ) -> ComponentReturnT:
+        """Run `_arun` within the concurrency and rate limits.
+
+        Args:
+            args: Input parameters adhering to the input schema.
+            **kwargs: Other arguments if needed.
+
+        Returns:
+            ComponentReturnT: Output parameters adhering to the output schema.
+
+        Raises:
+            RateLimitTimeoutError: If the call waited in the queue longer than
+                the configured timeout.
+        """
+        limiter = self.rate_limiter
+        if limiter is None:
+            return await self._arun(args, **kwargs)
+        async with limiter.acquire():
+            return await self._arun(args, **kwargs)
+
     def run(self, args: Any, **kwargs: Any) -> Any:
         """Run the component synchronously.
 
-        Makes sure the async method could be called from sync context with or
-        without asyncio loop running.
+        Makes sure the async method could be called from sync context. The
+        call is run on the event loop of the calling thread, so that the
+        connections pooled under that loop survive across the calls of the
+        thread, and the calls of several threads run in parallel. Await
+        `arun` instead when an event loop is running.
 
         Args:
             args: Input arguments.
@@ -138,7 +420,153 @@ class Component(BaseComponent, Generic[ComponentArgsT, ComponentReturnT]):
         Returns:
             Any: Result of the component execution.
         """
-        return async_to_sync(self.arun)(args, **kwargs)
+        return run_sync(self.arun, args, **kwargs)
+
+    async def abatch(
+        self,
+        args_list: List[Union[ComponentArgsT, str, Dict]],
+        max_concurrency: int = 8,
+        **kwargs: Any,
+    ) -> List[BatchResult]:
+        """Run the component on a list of arguments with bounded concurrency.
+
+        Args:
+            args_list: List of input arguments, each item could be the input
+                schema instance, or its dict/json string representation.
+            max_concurrency: Maximum number of in-flight executions.
+            **kwargs: Other arguments passed to every `arun` call.
+
+        Returns:
+            List[BatchResult]: Results in the same order as `args_list`, a
+                failed item carries its exception instead of cancelling the
+                others.
+        """
+        results: List[Optional[BatchResult]] = [None] * len(args_list)
+        async for item in self.astream_batch(
+            args_list,
+            max_concurrency=max_concurrency,
+            ordered=False,
+            **kwargs,
+        ):
+            results[item.index] = item
+        return cast(List[BatchResult], results)
+
+    async def astream_batch(
+        self,
+        args_list: List[Union[ComponentArgsT, str, Dict]],
+        max_concurrency: int = 8,
+        ordered: bool = False,
+        **kwargs: Any,
+    ) -> AsyncGenerator[BatchResult, None]:
+        """Run the component on a list of arguments with bounded concurrency,
+        and yield the results incrementally.
+
+        Args:
+            args_list: List of input arguments, each item could be the input
+                schema instance, or its dict/json string representation.
+            max_concurrency: Maximum number of in-flight executions.
+            ordered: Yield results in input order if True, otherwise yield
+                them as soon as they complete.
+            **kwargs: Other arguments passed to every `arun` call.
+
+        Yields:
+            BatchResult: The result of each item with its timing.
+
+        Raises:
+            ValueError: If max_concurrency is less than 1.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be a positive integer")
+        if not args_list:
+            return
+
+        pending = iter(enumerate(args_list))
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run_item(index: int, args: Any) -> BatchResult:
+            start_time = time.time()
+            start = time.perf_counter()
+            try:
+                if not isinstance(args, self.input_type):
+                    args = self.verify_args(args)
+                result = await self.arun(args, **kwargs.copy())
+                return BatchResult(
+                    index=index,
+                    result=result,
+                    start_time=start_time,
+                    elapsed=time.perf_counter() - start,
+                )
+            except Exception as e:
+                return BatchResult(
+                    index=index,
+                    error=e,
+                    start_time=start_time,
+                    elapsed=time.perf_counter() - start,
+                )
+
+        async def worker() -> None:
+            # each worker pulls the next item once the previous one is done,
+            # so that no more than max_concurrency items are in flight
+            for index, args in pending:
+                await queue.put(await run_item(index, args))
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(max_concurrency, len(args_list)))
+        ]
+        try:
+            buffered: Dict[int, BatchResult] = {}
+            next_index = 0
+            for _ in range(len(args_list)):
+                item = await queue.get()
+                if not ordered:
+                    yield item
+                    continue
+                buffered[item.index] = item
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def _get_component_schema(self) -> ComponentSchema:
+        """Get the schema of current component class from the class level
+        cache, and generate it at the first time.
+
+        Returns:
+            ComponentSchema: The input type, return type and the read-only
+                parameters schema of the component class.
+        """
+        cls = type(self)
+        schema = Component._schema_cache.get(cls)
+        if schema is not None:
+            return schema
+
+        with Component._schema_cache_lock:
+            schema = Component._schema_cache.get(cls)
+            if schema is None:
+                self.input_type = self._input_type()
+                self.return_type = self._return_type()
+                parameters = self._parameters_parser()
+                if isinstance(parameters, FunctionParameters):
+                    parameters = FrozenFunctionParameters(
+                        **parameters.model_dump(),
+                    )
+                schema = ComponentSchema(
+                    input_type=self.input_type,
+                    return_type=self.return_type,
+                    parameters=parameters,
+                )
+                Component._schema_cache[cls] = schema
+        return schema
+
+    @classmethod
+    def clear_schema_cache(cls) -> None:
+        """Clear the cached schemas of all component classes."""
+        with Component._schema_cache_lock:
+            Component._schema_cache.clear()
 
     def _input_type(self) -> Type[ComponentArgsT]:
         """Extract the generic input types.
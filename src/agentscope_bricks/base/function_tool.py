@@ -1,20 +1,26 @@
 # -*- coding: utf-8 -*-
-import json
+import asyncio
+import contextvars
+import functools
+import os
+import threading
 import types
 import inspect
+from concurrent.futures import Executor, ThreadPoolExecutor
 from inspect import Parameter, signature
 from typing import (
     Any,
     Callable,
     Dict,
     Literal,
+    Optional,
     Type,
     TypedDict,
     Union,
     get_type_hints,
 )
 
-from pydantic import BaseModel, create_model
+from pydantic import BaseModel, ValidationError, create_model
 
 from agentscope_runtime.engine.schemas.agent_schemas import (
     FunctionParameters,
@@ -22,6 +28,56 @@ from agentscope_runtime.engine.schemas.agent_schemas import (
 )
 
 
+# sync tools run on a dedicated bounded pool, so that blocking I/O in a tool
+# never blocks the agent loop nor exhausts the default executor of the loop
+FUNCTION_TOOL_MAX_WORKERS = int(os.getenv("FUNCTION_TOOL_MAX_WORKERS", "32"))
+
+_tool_executor: Optional[ThreadPoolExecutor] = None
+_tool_executor_lock = threading.Lock()
+
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Get the shared thread pool running the sync function tools.
+
+    Returns:
+        ThreadPoolExecutor: The pool with at most `FUNCTION_TOOL_MAX_WORKERS`
+            threads, created at the first call.
+    """
+    global _tool_executor
+    if _tool_executor is None:
+        with _tool_executor_lock:
+            if _tool_executor is None:
+                _tool_executor = ThreadPoolExecutor(
+                    max_workers=FUNCTION_TOOL_MAX_WORKERS,
+                    thread_name_prefix="agentscope-bricks-tool",
+                )
+    return _tool_executor
+
+
+async def run_in_tool_executor(
+    func: Callable[[], Any],
+    executor: Optional[Executor] = None,
+) -> Any:
+    """Run a sync function in the tool thread pool with the caller's
+    context, e.g. the request deadline and the tracing context.
+
+    Args:
+        func: The sync function without arguments, use `functools.partial`
+            to bind the arguments.
+        executor: Optional executor, defaults to the shared tool pool.
+
+    Returns:
+        Any: The result of the function.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        executor or get_tool_executor(),
+        context.run,
+        func,
+    )
+
+
 def schema_type_to_typing(schema_property: Dict[str, Any]) -> Any:
     """Convert a JSON schema property to a Python typing annotation.
 
@@ -123,16 +179,22 @@ def function_tool(
     name_override: str = None,
     description_override: str = None,
     schema_override: FunctionParameters = None,
+    executor: Optional[Executor] = None,
 ) -> Callable:
     """Decorator to convert any function to a Component-like functionality,
     after applying this decorator to a function, the function will act as a
     component, and could be called during function call loop
 
+    Coroutine functions are awaited directly by `arun`, sync functions are
+    run in a bounded thread pool so that they never block the event loop.
+
     Args:
         _func: The function to decorate (when used without parentheses).
         name_override: Override name for the function schema.
         description_override: Override description for the function schema.
         schema_override: Override schema for function parameters.
+        executor: Optional executor running the sync function in `arun`,
+            defaults to the shared tool thread pool.
 
     Returns:
         Callable: Decorated function with added functionality.
@@ -175,6 +237,7 @@ def function_tool(
             f"{func.__name__}Args",
             **fields,
         )
+        is_coroutine = inspect.iscoroutinefunction(func)
 
         def generate_function_schema(
             schema: Union[Dict, FunctionParameters] = None,
@@ -253,10 +316,12 @@ def function_tool(
             else:
                 validated_args = verify_args(kwargs)
             # Call the original function with validated arguments
-            if inspect.iscoroutinefunction(func):
+            if is_coroutine:
                 return await func(**validated_args)
-            else:
-                return func(**validated_args)
+            return await run_in_tool_executor(
+                functools.partial(func, **validated_args),
+                executor=executor,
+            )
 
         def verify_args(args: Dict[str, Any]) -> Dict[str, Any]:
             """Validate function arguments against the schema.
@@ -273,17 +338,21 @@ def function_tool(
                 incorrect.
             """
             try:
-                if isinstance(args, str):
-                    args_dict = json.loads(args)
+                # JSON arguments are parsed and validated in a single pass
+                if isinstance(args, (str, bytes)):
+                    validated_args = args_model.model_validate_json(args)
                 elif isinstance(args, BaseModel):
-                    args_dict = args.model_dump()
+                    validated_args = args_model.model_validate(
+                        args.model_dump(),
+                    )
                 else:
-                    args_dict = args
-
-                validated_args = args_model(**args_dict)
+                    validated_args = args_model.model_validate(args)
                 return validated_args.model_dump(exclude_none=True)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON format: {e}")
+            except ValidationError as e:
+                errors = e.errors()
+                if any(error["type"] == "json_invalid" for error in errors):
+                    raise ValueError(f"Invalid JSON format: {e}")
+                raise ValueError(f"Invalid arguments: {e}")
             except Exception as e:
                 raise ValueError(f"Invalid arguments: {e}")
 
@@ -354,10 +423,13 @@ def tool_function_factory(
                 **extra_kwargs,
             )
         else:
-            return actual_func(
-                tool_name=tool_name,
-                tool_params=kwargs,
-                **extra_kwargs,
+            return await run_in_tool_executor(
+                functools.partial(
+                    actual_func,
+                    tool_name=tool_name,
+                    tool_params=kwargs,
+                    **extra_kwargs,
+                ),
             )
 
     # Generate function docstring
@@ -78,6 +78,8 @@ class ModelstudioRag(Component[RagInput, RagOutput]):
         "或者指定库里信息的时候，请优先调用该工具在用户自己库里的查找一下是否有相关信息。"
     )
     name: str = "modelstudio_RAG"
+    # concurrent identical retrievals share one upstream call
+    single_flight = True
 
     @trace(trace_type="RAG", trace_name="modelstudio_rag")
     async def _arun(self, args: RagInput, **kwargs: Any) -> RagOutput:
@@ -173,6 +175,10 @@ class ModelstudioRag(Component[RagInput, RagOutput]):
                 messages=args.messages,
             )
 
+    def is_degraded(self, result: RagOutput) -> bool:
+        """The output returned on a failed or empty retrieval."""
+        return not result.rag_result
+
     @staticmethod
     async def generate_rag_request(
         rag_input: RagInput,
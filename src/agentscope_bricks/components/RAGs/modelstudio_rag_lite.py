@@ -32,6 +32,8 @@ class ModelstudioRagLite(Component[RagInput, RagOutput]):
         "Modelstudio Rag可召回用户在百炼上的数据库中存储的信息，用于后续大模型生成使用。"
     )
     name: str = "modelstudio_RAG_lite"
+    # concurrent identical retrievals share one upstream call
+    single_flight = True
 
     @trace(trace_type="RAG", trace_name="modelstudio_rag_lite")
     async def _arun(self, args: RagInput, **kwargs: Any) -> RagOutput:
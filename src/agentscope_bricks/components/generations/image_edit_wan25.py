@@ -14,6 +14,7 @@ from agentscope_bricks.base.component import Component
 
 from agentscope_bricks.utils.tracing_utils.wrapper import trace
 from agentscope_bricks.utils.api_key_util import ApiNames, get_api_key
+from agentscope_bricks.utils.deadline_util import bound_timeout
 from agentscope_bricks.utils.tracing_utils import TracingUtil
 
 
@@ -133,7 +134,8 @@ class ImageEditWan25(Component[ImageGenInput, ImageGenOutput]):
             raise RuntimeError(f"Failed to submit task: {task_response}")
 
         # 2. 循环异步查询任务状态
-        max_wait_time = 300  # 5分钟超时
+        # 5分钟超时
+        max_wait_time = bound_timeout(300)
         poll_interval = 2  # 2秒轮询间隔
         start_time = time.time()
 
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import os
+import time
 import uuid
 import asyncio
 from http import HTTPStatus
@@ -12,6 +13,7 @@ from pydantic import BaseModel, Field
 from agentscope_bricks.base.component import Component
 from agentscope_bricks.utils.tracing_utils.wrapper import trace
 from agentscope_bricks.utils.api_key_util import ApiNames, get_api_key
+from agentscope_bricks.utils.deadline_util import bound_timeout
 from agentscope_bricks.utils.tracing_utils import TracingUtil
 
 
@@ -203,11 +205,16 @@ class ImageOutPaintingAuto(
         # Step 2: Poll until completion
         max_retries = 60  # 最多等待 2 分钟（60 * 2s）
         retry_interval = 2  # 每 2 秒查询一次
+        max_wait_time = bound_timeout(max_retries * retry_interval)
+        start_time = time.time()
 
         fetch_headers = {"Authorization": f"Bearer {api_key}"}
 
         for attempt in range(max_retries):
-            await asyncio.sleep(retry_interval)
+            remaining = max_wait_time - (time.time() - start_time)
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(retry_interval, remaining))
 
             async with aiohttp.ClientSession() as session:
                 async with session.get(
@@ -266,6 +273,6 @@ class ImageOutPaintingAuto(
 
         # Timeout
         raise TimeoutError(
-            f"Out-painting task did not complete within {max_retries * retry_interval} seconds "  # noqa
+            f"Out-painting task did not complete within {max_wait_time} seconds "  # noqa
             f"(task_id: {task_id}). Current status may still be PENDING/RUNNING.",  # noqa
         )
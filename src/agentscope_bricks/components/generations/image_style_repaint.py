@@ -15,6 +15,7 @@ from agentscope_bricks.base.component import Component
 from agentscope_bricks.utils.tracing_utils.wrapper import trace
 
 from agentscope_bricks.utils.api_key_util import get_api_key, ApiNames
+from agentscope_bricks.utils.deadline_util import bound_timeout
 from agentscope_bricks.utils.tracing_utils import TracingUtil
 
 
@@ -156,6 +157,10 @@ class ImageStyleRepaint(
             headers = {"X-DashScope-OssResourceResolve": "enable"}
             kwargs["headers"] = headers
 
+        # the worker thread does not see the request context, bound the
+        # wait here, dashscope treats a zero wait timeout as no timeout
+        max_wait_time = max(bound_timeout(300), 1)
+
         # 🔄 将BaseAsyncApi.call放到线程池中执行，避免阻塞事件循环
         def _sync_style_repaint_call() -> Any:
             input = {
@@ -171,6 +176,7 @@ class ImageStyleRepaint(
                 task_group="aigc",
                 task="image-generation",
                 function="generation",
+                wait_timeout=max_wait_time,
                 **kwargs,
             )
 
@@ -180,6 +186,11 @@ class ImageStyleRepaint(
             _sync_style_repaint_call,
         )
 
+        if res.status_code == HTTPStatus.REQUEST_TIMEOUT:
+            raise TimeoutError(
+                f"Style repaint task did not complete within "
+                f"{max_wait_time} seconds: {res.message}",
+            )
         if res.status_code != HTTPStatus.OK or not res.output:
             raise RuntimeError(f"Failed to generate image: {res}")
 
@@ -14,6 +14,7 @@ from agentscope_bricks.base.component import Component
 from agentscope_bricks.utils.tracing_utils.wrapper import trace
 
 from agentscope_bricks.utils.api_key_util import ApiNames, get_api_key
+from agentscope_bricks.utils.deadline_util import bound_timeout
 from agentscope_bricks.utils.tracing_utils import TracingUtil
 
 
@@ -164,7 +165,8 @@ class ImageToVideo(Component[ImageToVideoInput, ImageToVideoOutput]):
             raise RuntimeError(f"Failed to submit task: {task_response}")
 
         # Poll for task completion using async methods
-        max_wait_time = 600  # 10 minutes timeout for video generation
+        # 10 minutes timeout for video generation
+        max_wait_time = bound_timeout(600)
         poll_interval = 5  # 5 seconds polling interval
         start_time = time.time()
 
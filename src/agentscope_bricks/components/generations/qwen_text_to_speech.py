@@ -100,7 +100,10 @@ class QwenTextToSpeech(
         )
 
         try:
-            response = dashscope.audio.qwen_tts.SpeechSynthesizer.call(
+            # run the blocking call in a thread so that the request
+            # deadline can still cancel the component
+            response = await asyncio.to_thread(
+                dashscope.audio.qwen_tts.SpeechSynthesizer.call,
                 api_key=api_key,
                 model=model_name,
                 text=args.text,
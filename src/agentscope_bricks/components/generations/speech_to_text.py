@@ -16,6 +16,7 @@ from pydantic import BaseModel, Field
 from agentscope_bricks.base.component import Component
 from agentscope_bricks.utils.tracing_utils.wrapper import trace
 from agentscope_bricks.utils.api_key_util import ApiNames, get_api_key
+from agentscope_bricks.utils.deadline_util import bound_timeout
 from agentscope_bricks.utils.tracing_utils import TracingUtil
 
 
@@ -138,7 +139,8 @@ class SpeechToText(Component[SpeechToTextInput, SpeechToTextOutput]):
             raise RuntimeError(f"Failed to submit task: {task}")
 
         # Poll for task completion
-        max_wait_time = 300  # 5 minutes timeout for transcription
+        # 5 minutes timeout for transcription
+        max_wait_time = bound_timeout(300)
         poll_interval = 2  # 2 seconds polling interval
         start_time = time.time()
 
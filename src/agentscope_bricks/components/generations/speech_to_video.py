@@ -13,6 +13,7 @@ from pydantic import BaseModel, Field
 from agentscope_bricks.base.component import Component
 from agentscope_bricks.utils.tracing_utils.wrapper import trace
 from agentscope_bricks.utils.api_key_util import ApiNames, get_api_key
+from agentscope_bricks.utils.deadline_util import bound_timeout
 from agentscope_bricks.utils.tracing_utils import TracingUtil
 
 
@@ -210,7 +211,8 @@ class SpeechToVideo(Component[SpeechToVideoInput, SpeechToVideoOutput]):
             raise RuntimeError(f"Failed to submit task: {task_response}")
 
         # Poll for task completion using async methods
-        max_wait_time = 15 * 60  # 10 minutes timeout for video generation
+        # 10 minutes timeout for video generation
+        max_wait_time = bound_timeout(15 * 60)
         poll_interval = 5  # 5 seconds polling interval
         start_time = time.time()
 
@@ -7,6 +7,7 @@ from pydantic import BaseModel, Field, SerializeAsAny
 
 from agentscope_bricks.base.memory import Memory, MemoryOperation
 from agentscope_bricks.utils.schemas.oai_llm import OpenAIMessage
+from agentscope_bricks.utils.token_util import get_token_counter
 
 MessageT = TypeVar("MessageT", bound=OpenAIMessage, contravariant=True)
 
@@ -191,13 +192,15 @@ class LocalMemory(Memory[MemoryInput, Any]):
     Manages the chat history by memory.
 
     Attributes:
-        max_token_limit (int): Maximum token limit for a message
+        max_token_limit (Optional[int]): Opt-in maximum number of tokens of
+        the history, the oldest turns are dropped beyond it but the latest
+        message is always kept, no limit if None (the default).
         max_messages (Optional[int]): Maximum number of messages to keep in
         history.
         chat_store (Optional[SimpleChatStore]): A store of chat history.
     """
 
-    max_token_limit: int = 2000
+    max_token_limit: Optional[int] = None
     max_messages: Optional[int] = None
     chat_store: SerializeAsAny[SimpleChatStore] = Field(
         default_factory=SimpleChatStore,
@@ -350,7 +353,8 @@ class LocalMemory(Memory[MemoryInput, Any]):
         return MemoryOutput(infos={"success": True})
 
     def _manage_overflow(self, key: str) -> None:
-        """Manage the chat history overflow based on max_messages constraint.
+        """Manage the chat history overflow based on max_messages and
+        max_token_limit constraints.
 
         Args:
             key: The key to manage overflow for.
@@ -359,5 +363,17 @@ class LocalMemory(Memory[MemoryInput, Any]):
             current_messages = self.chat_store.get_messages(key)
             while len(current_messages) > self.max_messages:
                 self.chat_store.delete_message(key, 0)
-
-    # TODO： add token and length limit
+        if self.max_token_limit is not None:
+            # message counts are cached, only new messages are tokenized
+            counter = get_token_counter()
+            current_messages = self.chat_store.get_messages(key)
+            total = counter.count_messages(current_messages)
+            while len(current_messages) > 1 and total > self.max_token_limit:
+                total -= counter.count_message(current_messages[0])
+                self.chat_store.delete_message(key, 0)
+                # drop the rest of the turn, the replies to the question
+                while len(current_messages) > 1 and current_messages[
+                    0
+                ].role in ("assistant", "tool"):
+                    total -= counter.count_message(current_messages[0])
+                    self.chat_store.delete_message(key, 0)
@@ -119,8 +119,8 @@ class AddMemory(Component[AddMemoryInput, AddMemoryOutput]):
     name = "add_memory"
     description = "Store conversation messages as memory nodes"
 
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
         self.service_id = os.getenv("MODELSTUDIO_SERVICE_ID", "memory_service")
         self.add_memory_url = ADD_MEMORY_URL
         self.api_key = os.getenv("DASHSCOPE_API_KEY")
@@ -188,8 +188,8 @@ class SearchMemory(Component[SearchMemoryInput, SearchMemoryOutput]):
     name = "search_memory"
     description = "Search for relevant memories based on conversation context"
 
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
         self.service_id = os.getenv("MODELSTUDIO_SERVICE_ID", "memory_service")
         self.search_memory_url = SEARCH_MEMORY_URL
         self.api_key = os.getenv("DASHSCOPE_API_KEY")
@@ -257,8 +257,8 @@ class ListMemory(Component[ListMemoryInput, ListMemoryOutput]):
     name = "list_memory"
     description = "List memory nodes for a user"
 
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
         self.service_id = os.getenv("MODELSTUDIO_SERVICE_ID", "memory_service")
         self.list_memory_url = LIST_MEMORY_URL
         self.api_key = os.getenv("DASHSCOPE_API_KEY")
@@ -329,8 +329,8 @@ class DeleteMemory(Component[DeleteMemoryInput, DeleteMemoryOutput]):
     name = "delete_memory"
     description = "Delete a specific memory node"
 
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
         self.service_id = os.getenv("MODELSTUDIO_SERVICE_ID", "memory_service")
         self.delete_memory_url = DELETE_MEMORY_URL
         self.api_key = os.getenv("DASHSCOPE_API_KEY")
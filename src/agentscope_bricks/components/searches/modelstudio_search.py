@@ -12,7 +12,7 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 
 import aiohttp
 import dashscope
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from agentscope_bricks.base.component import Component
 from agentscope_bricks.utils.schemas.modelstudio_llm import (
@@ -20,6 +20,7 @@ from agentscope_bricks.utils.schemas.modelstudio_llm import (
     OpenAIMessage,
     SearchOptions,
 )
+from agentscope_bricks.utils.logger_util import logger
 from agentscope_bricks.utils.tracing_utils.wrapper import trace
 
 
@@ -78,6 +79,8 @@ class SearchOutput(BaseModel):
         ...,
         description="Additional information about the search operation result",
     )
+    # set on the empty output of a failed search, kept out of the payload
+    _degraded: bool = PrivateAttr(default=False)
 
 
 # for local use only
@@ -106,6 +109,15 @@ class ModelstudioSearch(Component[SearchInput, SearchOutput]):
         "它仅收录中文信息，不收录英文资料。"
     )
     name = "modelstudio_search_pro"
+    # concurrent identical searches share one upstream call
+    single_flight = True
+
+    def get_hedge_key(self, args: SearchInput) -> str:
+        """Track the latencies per search strategy."""
+        search_options = args.search_options
+        if isinstance(search_options, dict):
+            search_options = SearchOptions(**search_options)
+        return f"{self.name}:{search_options.search_strategy}"
 
     @trace(trace_type="SEARCH", trace_name="modelstudio_search")
     async def _arun(self, args: SearchInput, **kwargs: Any) -> SearchOutput:
@@ -163,10 +175,17 @@ class ModelstudioSearch(Component[SearchInput, SearchOutput]):
             + os.getenv("DASHSCOPE_API_KEY", dashscope.api_key),
         }
         payload_string = json.dumps(payload)
+        # the timeout adapts to the observed latencies of the strategy unless
+        # it is set explicitly
+        search_timeout = (
+            args.search_timeout
+            if "search_timeout" in args.model_fields_set
+            else self.get_adaptive_timeout(args, args.search_timeout)
+        )
         kwargs["context"] = {
             "payload": payload_string,
             "search_strategy": args.search_options.search_strategy,
-            "timeout": args.search_timeout,
+            "timeout": search_timeout,
         }
         try:
             search_result, extra_tool_info = (
@@ -174,7 +193,7 @@ class ModelstudioSearch(Component[SearchInput, SearchOutput]):
                     url=SEARCH_URL,
                     payload=payload_string,
                     headers=header,
-                    timeout=args.search_timeout,
+                    timeout=search_timeout,
                 )
             )
             if trace_event:
@@ -189,8 +208,11 @@ class ModelstudioSearch(Component[SearchInput, SearchOutput]):
                     },
                 )
 
-        except Exception:
-            return SearchOutput()
+        except Exception as e:
+            logger.warning(f"Modelstudio search failed: {e}")
+            output = SearchOutput(search_result="", search_info={})
+            output._degraded = True
+            return output
 
         # post process search results
         search_items, search_info = (
@@ -214,6 +236,10 @@ class ModelstudioSearch(Component[SearchInput, SearchOutput]):
             search_info=search_info,
         )
 
+    def is_degraded(self, result: SearchOutput) -> bool:
+        """The empty output returned on a failed search is degraded."""
+        return result._degraded
+
     @staticmethod
     def generate_search_payload(
         search_input: SearchInput,
@@ -338,29 +364,27 @@ class ModelstudioSearch(Component[SearchInput, SearchOutput]):
             Tuple containing:
                 - List of search result documents
                 - List of extra tool information from the response
-        """
-        extra_tool_info = []
-        results_list = []
 
-        try:
-            timeout_config = aiohttp.ClientTimeout(total=timeout)
-            async with aiohttp.ClientSession(
-                timeout=timeout_config,
-            ) as session:
-                async with session.post(
-                    url,
-                    headers=headers,
-                    data=payload,
-                ) as response:
-                    results = await response.json()
-            if results["status"] == 0:
-                extra_tool_info = results["data"]["extras"].get(
-                    "toolResult",
-                    [],
-                )
-                results_list = results["data"]["docs"]
-        except Exception as e:
-            print(f"Error: {e}")
+        Raises:
+            RuntimeError: If the search service returns a non-zero status.
+        """
+        timeout_config = aiohttp.ClientTimeout(total=timeout)
+        async with aiohttp.ClientSession(
+            timeout=timeout_config,
+        ) as session:
+            async with session.post(
+                url,
+                headers=headers,
+                data=payload,
+            ) as response:
+                results = await response.json()
+        if results["status"] != 0:
+            raise RuntimeError(
+                f"Search failed with status {results['status']}: "
+                f"{results.get('message')}",
+            )
+        extra_tool_info = results["data"]["extras"].get("toolResult", [])
+        results_list = results["data"]["docs"]
 
         return results_list, extra_tool_info
 
@@ -80,6 +80,8 @@ class ModelstudioSearchLite(Component[SearchLiteInput, SearchLiteOutput]):
 
     description = "搜索可用于查询百科知识、时事新闻、天气等信息"
     name = "bailian_web_search"
+    # concurrent identical searches share one upstream call
+    single_flight = True
 
     @trace(trace_type="SEARCH", trace_name="modelstudio_search_lite")
     async def _arun(
@@ -120,10 +122,11 @@ class ModelstudioSearchLite(Component[SearchLiteInput, SearchLiteOutput]):
             "Authorization": "Bearer " + DASHSCOPE_API_KEY,
             "x-acs-req-uuid": request_id,
         }
+        search_timeout = self.get_adaptive_timeout(args, SEARCH_TIMEOUT)
         kwargs["context"] = {
             "payload": payload,
             "search_strategy": SEARCH_STRATEGY,
-            "timeout": SEARCH_TIMEOUT,
+            "timeout": search_timeout,
         }
 
         trace_event.on_log(
@@ -145,7 +148,7 @@ class ModelstudioSearchLite(Component[SearchLiteInput, SearchLiteOutput]):
                     url=SEARCH_URL,
                     payload=payload,
                     headers=header,
-                    timeout=SEARCH_TIMEOUT,
+                    timeout=search_timeout,
                 )
             )
             if trace_event:
@@ -187,6 +190,10 @@ class ModelstudioSearchLite(Component[SearchLiteInput, SearchLiteOutput]):
             request_id=request_id,
         )
 
+    def is_degraded(self, result: SearchLiteOutput) -> bool:
+        """The output of a failed search has a non-zero status."""
+        return result.status != 0
+
     @staticmethod
     def generate_search_payload(
         search_input: SearchLiteInput,
@@ -1,2 +1,12 @@
 # -*- coding: utf-8 -*-
 from .llm import BaseLLM
+from .router import LLMEndpoint, RouterLLM
+from .batch import BatchRequest, LLMBatchResult, LLMBatchRunner
+from .cascade import (
+    CascadeCandidate,
+    CascadeLLM,
+    CascadeTier,
+    LogprobCheck,
+    RefusalCheck,
+    SchemaCheck,
+)
@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+import openai
+from openai.types import Batch
+from openai.types.chat import ChatCompletion
+from pydantic import BaseModel, Field
+
+from agentscope_bricks.models.llm import BaseLLM
+from agentscope_bricks.utils.asyncio_util import amerge
+from agentscope_bricks.utils.deadline_util import (
+    DeadlineExceeded,
+    wait_with_deadline,
+)
+from agentscope_bricks.utils.logger_util import logger
+from agentscope_bricks.utils.schemas.oai_llm import OpenAIMessage, Parameters
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+# statuses after which a batch job makes no more progress
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+# errors of the batch API telling the service does not support batch jobs,
+# or not for this model, the validation errors of a job (400, 422) are
+# raised since the same requests would fail locally, at real-time prices
+BATCH_UNAVAILABLE_ERRORS = (
+    openai.NotFoundError,
+    openai.PermissionDeniedError,
+    openai.APIConnectionError,
+)
+
+
+class BatchRequest(BaseModel):
+    """A chat completion request of a batch."""
+
+    custom_id: str = Field(
+        ...,
+        description="Id of the request, unique in the batch, used to map "
+        "the results back to the requests",
+    )
+    messages: List[Union[OpenAIMessage, Dict[str, Any]]]
+    parameters: Optional[Union[Parameters, Dict[str, Any]]] = None
+
+
+class LLMBatchResult(BaseModel):
+    """The result of a batch request, either a response or an error."""
+
+    custom_id: str
+    response: Optional[ChatCompletion] = None
+    error: Optional[str] = None
+    source: str = Field(
+        ...,
+        description="How the request was run, 'batch' or 'local'",
+    )
+
+    @property
+    def ok(self) -> bool:
+        return self.response is not None
+
+
+class LLMBatchRunner:
+    """Run many chat completion requests offline, e.g. nightly evaluations
+    or data labeling, through the OpenAI compatible Batch API.
+
+    The requests are serialized to the Batch JSONL format, split into jobs
+    of at most `max_requests_per_job` requests, uploaded and submitted, and
+    the jobs are polled until they end, or until the deadline of the
+    current request expires, in which case they are cancelled. The results
+    are streamed back as each job completes, mapped to the `custom_id` of
+    the requests.
+
+    In the "auto" mode, the requests fall back to a local executor calling
+    `BaseLLM.arun` with bounded concurrency when the service has no batch
+    API (not found, permission denied or connection errors), and the
+    requests left without a result by a failed, expired or cancelled job
+    are run locally as well. The "batch" mode reports those as errors
+    instead, and the "local" mode never uses the Batch API. A job rejected
+    as invalid raises in all modes. Usage::
+
+        runner = LLMBatchRunner(llm, poll_interval=60)
+        async for result in runner.run("qwen-turbo", requests):
+            save(result.custom_id, result.response or result.error)
+    """
+
+    def __init__(
+        self,
+        llm: BaseLLM,
+        mode: str = "auto",
+        completion_window: str = "24h",
+        poll_interval: float = 30.0,
+        max_requests_per_job: int = 50000,
+        max_concurrency: int = 16,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the batch runner.
+
+        Args:
+            llm: The LLM, its client is used for the Batch API, and its
+                `arun` for the local executor, so its rate limits apply.
+            mode: "auto", "batch" or "local", see the class docstring.
+            completion_window: The completion window of the batch jobs.
+            poll_interval: Seconds between two polls of a batch job.
+            max_requests_per_job: Maximum number of requests of a batch job.
+            max_concurrency: Maximum number of concurrent local requests.
+            **kwargs: Additional keyword arguments passed to the calls, e.g.
+                `api_key` and `base_url`.
+        """
+        if mode not in ("auto", "batch", "local"):
+            raise ValueError(f"Unknown batch mode: {mode}")
+        self.llm = llm
+        self.mode = mode
+        self.completion_window = completion_window
+        self.poll_interval = poll_interval
+        self.max_requests_per_job = max_requests_per_job
+        self.max_concurrency = max_concurrency
+        self.kwargs = kwargs
+
+    @staticmethod
+    def _to_requests(
+        requests: Iterable[Union[BatchRequest, Dict[str, Any]]],
+    ) -> List[BatchRequest]:
+        requests = [
+            r if isinstance(r, BatchRequest) else BatchRequest(**r)
+            for r in requests
+        ]
+        custom_ids = set()
+        for request in requests:
+            if request.custom_id in custom_ids:
+                raise ValueError(
+                    f"Duplicate custom_id in the batch: {request.custom_id}",
+                )
+            custom_ids.add(request.custom_id)
+        return requests
+
+    def to_jsonl(self, model: str, requests: Sequence[BatchRequest]) -> bytes:
+        """Serialize requests to the Batch JSONL format.
+
+        Args:
+            model: The model name.
+            requests: The requests.
+
+        Returns:
+            bytes: The JSONL content, one request per line.
+        """
+        lines = []
+        for request in requests:
+            messages, parameters = self.llm._format_request(
+                request.messages,
+                request.parameters,
+            )
+            line = {
+                "custom_id": request.custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {"model": model, "messages": messages, **parameters},
+            }
+            lines.append(json.dumps(line, ensure_ascii=False))
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    async def submit(
+        self,
+        model: str,
+        requests: Sequence[BatchRequest],
+    ) -> Batch:
+        """Upload the requests and create a batch job.
+
+        Args:
+            model: The model name.
+            requests: The requests of the job.
+
+        Returns:
+            Batch: The created batch job.
+        """
+        async with self.llm.leased_client(
+            api_key=self.kwargs.get("api_key", None),
+            base_url=self.kwargs.get("base_url", None),
+        ) as client:
+            input_file = await client.files.create(
+                file=("batch.jsonl", self.to_jsonl(model, requests)),
+                purpose="batch",
+            )
+            batch = await client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=BATCH_ENDPOINT,
+                completion_window=self.completion_window,
+            )
+        logger.info(
+            f"Submitted batch job {batch.id} of {len(requests)} requests",
+        )
+        return batch
+
+    async def wait(self, batch_id: str) -> Batch:
+        """Poll a batch job until it ends, or until the deadline of the
+        current request expires. A job left behind by a cancelled or timed
+        out wait is cancelled, so that it does not keep running for the
+        whole completion window.
+
+        Args:
+            batch_id: The id of the batch job.
+
+        Returns:
+            Batch: The ended batch job.
+
+        Raises:
+            DeadlineExceeded: If the deadline expires before the job ends.
+        """
+        try:
+            return await wait_with_deadline(self._poll(batch_id))
+        except (asyncio.CancelledError, DeadlineExceeded):
+            # shielded, a second cancellation does not abort the cancel
+            await asyncio.shield(self.cancel(batch_id))
+            raise
+
+    async def _poll(self, batch_id: str) -> Batch:
+        while True:
+            async with self.llm.leased_client(
+                api_key=self.kwargs.get("api_key", None),
+                base_url=self.kwargs.get("base_url", None),
+            ) as client:
+                batch = await client.batches.retrieve(batch_id)
+            if batch.status in BATCH_FINAL_STATUSES:
+                return batch
+            if batch.request_counts is not None:
+                logger.debug(
+                    f"Batch job {batch.id} is {batch.status}, "
+                    f"{batch.request_counts.completed}/"
+                    f"{batch.request_counts.total} completed",
+                )
+            await asyncio.sleep(self.poll_interval)
+
+    async def cancel(self, batch_id: str) -> None:
+        """Cancel a batch job, the errors are logged since the job may have
+        ended meanwhile.
+
+        Args:
+            batch_id: The id of the batch job.
+        """
+        try:
+            async with self.llm.leased_client(
+                api_key=self.kwargs.get("api_key", None),
+                base_url=self.kwargs.get("base_url", None),
+            ) as client:
+                await client.batches.cancel(batch_id)
+            logger.info(f"Cancelled batch job {batch_id}")
+        except openai.APIError as e:
+            logger.warning(f"Failed to cancel batch job {batch_id}: {e}")
+
+    async def fetch_results(
+        self, batch: Batch
+    ) -> AsyncIterator[LLMBatchResult]:
+        """Stream the results of an ended batch job from its output and
+        error files.
+
+        Args:
+            batch: The ended batch job.
+
+        Yields:
+            LLMBatchResult: The results available in the files.
+        """
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            async with self.llm.leased_client(
+                api_key=self.kwargs.get("api_key", None),
+                base_url=self.kwargs.get("base_url", None),
+            ) as client:
+                async with client.files.with_streaming_response.content(
+                    file_id,
+                ) as response:
+                    async for line in response.iter_lines():
+                        if line.strip():
+                            yield self._parse_result_line(json.loads(line))
+
+    @staticmethod
+    def _parse_result_line(line: Dict[str, Any]) -> LLMBatchResult:
+        response = line.get("response") or {}
+        body = response.get("body") or {}
+        if response.get("status_code") == 200 and not line.get("error"):
+            return LLMBatchResult(
+                custom_id=line["custom_id"],
+                response=ChatCompletion.model_validate(body),
+                source="batch",
+            )
+        error = line.get("error") or body.get("error") or body
+        if isinstance(error, dict):
+            error = error.get("message") or json.dumps(error)
+        return LLMBatchResult(
+            custom_id=line["custom_id"],
+            error=str(error),
+            source="batch",
+        )
+
+    async def _run_job(
+        self,
+        model: str,
+        batch: Batch,
+        requests: Sequence[BatchRequest],
+    ) -> AsyncIterator[LLMBatchResult]:
+        """Wait for a submitted job and stream its results, the requests
+        left without a result are run locally in the "auto" mode."""
+        batch = await self.wait(batch.id)
+        remaining = {r.custom_id: r for r in requests}
+        async for result in self.fetch_results(batch):
+            if remaining.pop(result.custom_id, None) is not None:
+                yield result
+        if not remaining:
+            return
+
+        reason = f"batch job {batch.id} {batch.status}"
+        if batch.errors and batch.errors.data:
+            reason += f": {batch.errors.data[0].message}"
+        if self.mode == "auto":
+            logger.warning(
+                f"Running {len(remaining)} requests locally, {reason}",
+            )
+            async for result in self.run_local(model, remaining.values()):
+                yield result
+        else:
+            for custom_id in remaining:
+                yield LLMBatchResult(
+                    custom_id=custom_id,
+                    error=reason,
+                    source="batch",
+                )
+
+    async def run(
+        self,
+        model: str,
+        requests: Iterable[Union[BatchRequest, Dict[str, Any]]],
+    ) -> AsyncIterator[LLMBatchResult]:
+        """Run the requests, see the class docstring for the modes.
+
+        Args:
+            model: The model name.
+            requests: The requests, as BatchRequest or dict.
+
+        Yields:
+            LLMBatchResult: The result of each request, in order of completion.
+
+        Raises:
+            ValueError: If two requests have the same custom_id.
+            openai.APIError: If a job cannot be submitted in the "batch"
+                mode, or is rejected as invalid in any mode.
+        """
+        requests = self._to_requests(requests)
+        if self.mode == "local":
+            async for result in self.run_local(model, requests):
+                yield result
+            return
+
+        jobs = []
+        local: List[BatchRequest] = []
+        for start in range(0, len(requests), self.max_requests_per_job):
+            job_requests = requests[start : start + self.max_requests_per_job]
+            if local:
+                # the batch API is unavailable, do not try the next jobs
+                local.extend(job_requests)
+                continue
+            try:
+                batch = await self.submit(model, job_requests)
+            except BATCH_UNAVAILABLE_ERRORS as e:
+                if self.mode == "batch":
+                    raise
+                logger.warning(
+                    f"Batch API unavailable, running the requests "
+                    f"locally: {e}",
+                )
+                local.extend(job_requests)
+                continue
+            jobs.append(self._run_job(model, batch, job_requests))
+        if local:
+            jobs.append(self.run_local(model, local))
+
+        async for result in amerge(*jobs):
+            yield result
+
+    async def run_local(
+        self,
+        model: str,
+        requests: Iterable[BatchRequest],
+    ) -> AsyncIterator[LLMBatchResult]:
+        """Run the requests with `BaseLLM.arun`, at most `max_concurrency`
+        of them at a time.
+
+        Args:
+            model: The model name.
+            requests: The requests.
+
+        Yields:
+            LLMBatchResult: The result of each request, in order of completion.
+        """
+        pending = iter(requests)
+
+        async def worker() -> AsyncIterator[LLMBatchResult]:
+            # the workers share the iterator, so each request runs once
+            for request in pending:
+                yield await self._run_local_request(model, request)
+
+        async for result in amerge(
+            *(worker() for _ in range(self.max_concurrency)),
+        ):
+            yield result
+
+    async def _run_local_request(
+        self,
+        model: str,
+        request: BatchRequest,
+    ) -> LLMBatchResult:
+        try:
+            response = await self.llm.arun(
+                model=model,
+                messages=request.messages,
+                parameters=request.parameters,
+                **self.kwargs,
+            )
+        except Exception as e:
+            return LLMBatchResult(
+                custom_id=request.custom_id,
+                error=f"{type(e).__name__}: {e}",
+                source="local",
+            )
+        return LLMBatchResult(
+            custom_id=request.custom_id,
+            response=response,
+            source="local",
+        )
@@ -0,0 +1,541 @@
+# -*- coding: utf-8 -*-
+import inspect
+import re
+import threading
+import time
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from pydantic import BaseModel, Field, ValidationError
+
+from agentscope_bricks.models.llm import BaseLLM
+from agentscope_bricks.utils.message_util import ChunkAccumulator
+
+# refusals of the cheaper models, in English and Chinese
+REFUSAL_PATTERN = (
+    r"^\s*(i'?m sorry|sorry, i|i apologi[sz]e|i (cannot|can'?t|am unable|"
+    r"am not able)|as an ai|抱歉|对不起|很遗憾|我无法|我不能)"
+)
+
+
+class CascadeTier(BaseModel):
+    """A model of the cascade, with its price to estimate the cost saved."""
+
+    model: str
+    input_price: float = Field(
+        default=0.0,
+        description="Price per 1k prompt tokens",
+    )
+    output_price: float = Field(
+        default=0.0,
+        description="Price per 1k completion tokens",
+    )
+
+    def cost(self, usage: Any) -> float:
+        if usage is None:
+            return 0.0
+        return (
+            usage.prompt_tokens * self.input_price
+            + usage.completion_tokens * self.output_price
+        ) / 1000
+
+
+class CascadeCandidate:
+    """The response of a tier, as seen by the confidence checks."""
+
+    def __init__(
+        self,
+        model: str,
+        response: Any,
+        content: Optional[str] = None,
+        refusal: Optional[str] = None,
+        tool_calls: Optional[List[Any]] = None,
+        logprobs: Optional[List[float]] = None,
+        parsed: Optional[BaseModel] = None,
+    ) -> None:
+        self.model = model
+        self.response = response
+        self.content = content
+        self.refusal = refusal
+        self.tool_calls = tool_calls or []
+        self.logprobs = logprobs or []
+        self.parsed = parsed
+
+    @classmethod
+    def from_completion(
+        cls,
+        model: str,
+        response: Any,
+    ) -> "CascadeCandidate":
+        if not isinstance(response, ChatCompletion):
+            # a structured output validated against the response model
+            return cls(model, response, parsed=response)
+        if not response.choices:
+            return cls(model, response)
+        choice = response.choices[0]
+        logprobs = (
+            [t.logprob for t in choice.logprobs.content]
+            if choice.logprobs and choice.logprobs.content
+            else None
+        )
+        return cls(
+            model,
+            response,
+            content=choice.message.content,
+            refusal=choice.message.refusal,
+            tool_calls=choice.message.tool_calls,
+            logprobs=logprobs,
+        )
+
+    @classmethod
+    def from_chunks(
+        cls,
+        model: str,
+        chunks: List[Any],
+    ) -> "CascadeCandidate":
+        if chunks and not isinstance(chunks[-1], ChatCompletionChunk):
+            # the partial structured outputs, the last one is validated
+            return cls(model, chunks, parsed=chunks[-1])
+        accumulator = ChunkAccumulator()
+        logprobs: List[float] = []
+        for chunk in chunks:
+            accumulator.add(chunk)
+            for choice in chunk.choices:
+                if choice.logprobs and choice.logprobs.content:
+                    logprobs.extend(t.logprob for t in choice.logprobs.content)
+        merged = accumulator.merged()
+        if merged is None or not merged.choices:
+            return cls(model, chunks)
+        delta = merged.choices[0].delta
+        return cls(
+            model,
+            chunks,
+            content=delta.content,
+            refusal=delta.refusal,
+            tool_calls=delta.tool_calls,
+            logprobs=logprobs,
+        )
+
+
+class RefusalCheck:
+    """Fail the responses refusing to answer, or empty."""
+
+    def __init__(self, pattern: str = REFUSAL_PATTERN) -> None:
+        self.name = "refusal"
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+
+    def __call__(self, candidate: CascadeCandidate) -> bool:
+        if candidate.refusal:
+            return False
+        if candidate.parsed is not None or candidate.tool_calls:
+            return True
+        if not candidate.content or not candidate.content.strip():
+            return False
+        return not self.pattern.search(candidate.content)
+
+
+class LogprobCheck:
+    """Fail the responses whose mean token logprob is below a threshold,
+    the calls need the `logprobs` parameter, the responses without logprobs
+    pass."""
+
+    def __init__(self, min_mean_logprob: float = -1.0) -> None:
+        self.name = "logprob"
+        self.min_mean_logprob = min_mean_logprob
+
+    def __call__(self, candidate: CascadeCandidate) -> bool:
+        if not candidate.logprobs:
+            return True
+        mean = sum(candidate.logprobs) / len(candidate.logprobs)
+        return mean >= self.min_mean_logprob
+
+
+class SchemaCheck:
+    """Fail the text responses which are not a JSON object valid against a
+    model, e.g. with the `json_object` response format. The structured
+    outputs of a `response_model` are validated by the call itself, a
+    validation error escalates as well."""
+
+    def __init__(self, model: Type[BaseModel]) -> None:
+        self.name = "schema"
+        self.model = model
+
+    def __call__(self, candidate: CascadeCandidate) -> bool:
+        if candidate.parsed is not None:
+            return True
+        try:
+            self.model.model_validate_json(candidate.content or "")
+        except (ValidationError, ValueError):
+            return False
+        return True
+
+
+class TierStats:
+    """Counters of a cascade tier."""
+
+    def __init__(self, tier: CascadeTier) -> None:
+        self.tier = tier
+        self.calls = 0
+        self.accepted = 0
+        self.escalations: Dict[str, int] = {}
+        self.cost = 0.0
+        self.ewma_latency: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "accepted": self.accepted,
+            "hit_rate": self.accepted / self.calls if self.calls else 0.0,
+            "escalations": dict(self.escalations),
+            "cost": self.cost,
+            "ewma_latency": self.ewma_latency,
+        }
+
+
+class CascadeLLM(BaseLLM):
+    """LLM trying the cheaper models first, and escalating to the stronger
+    ones only when a confidence check of the response fails.
+
+    The calls of the strongest model of the tiers, or of another tier,
+    start at the cheapest tier, and go up the tiers until the response of a
+    tier passes all the checks, the response of the last tier is returned
+    without check. A tier failing with an error, e.g. a validation error of
+    the `response_model`, escalates as well. The calls of the models out of
+    the tiers are not cascaded.
+
+    A stream is buffered until the response of a tier passes the checks, so
+    an escalation is invisible to the caller, at the cost of the time to
+    first chunk of the cheaper tiers. The savings are estimated against
+    calling the strongest model directly, with its EWMA latency and the
+    token prices of the tiers. Usage::
+
+        llm = CascadeLLM(
+            tiers=[
+                CascadeTier(model="qwen-turbo", input_price=0.0003,
+                            output_price=0.0006),
+                CascadeTier(model="qwen-max", input_price=0.0024,
+                            output_price=0.0096),
+            ],
+            checks=[RefusalCheck()],
+        )
+        response = await llm.arun(model="qwen-max", messages=messages)
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[Union[CascadeTier, Dict[str, Any], str]],
+        checks: Optional[Sequence[Callable[[CascadeCandidate], Any]]] = None,
+        ewma_alpha: float = 0.3,
+        **kwargs: Any,
+    ):
+        """Initialize the cascade.
+
+        Args:
+            tiers: The models, from the cheapest to the strongest.
+            checks: The confidence checks of the responses, sync or async
+                callables returning whether a candidate is good enough,
+                defaults to a RefusalCheck.
+            ewma_alpha: Weight of the latest latency in the EWMA of the
+                latency of a tier.
+            **kwargs: Additional keyword arguments passed to BaseLLM.
+        """
+        if len(tiers) < 2:
+            raise ValueError("CascadeLLM requires at least two tiers")
+        super().__init__(**kwargs)
+        self.tiers: List[CascadeTier] = [
+            (
+                CascadeTier(model=t)
+                if isinstance(t, str)
+                else t if isinstance(t, CascadeTier) else CascadeTier(**t)
+            )
+            for t in tiers
+        ]
+        self.checks = list(checks) if checks is not None else [RefusalCheck()]
+        self.ewma_alpha = ewma_alpha
+        self.tier_stats = [TierStats(tier) for tier in self.tiers]
+        self.requests = 0
+        self.latency_saved = 0.0
+        self.cost_saved = 0.0
+        self._lock = threading.Lock()
+
+    def _tier_index(self, model: str) -> Optional[int]:
+        for i, tier in enumerate(self.tiers):
+            if tier.model == model:
+                return i
+        return None
+
+    async def _check(self, candidate: CascadeCandidate) -> Optional[str]:
+        """Run the checks, returns the name of the first failed check."""
+        for check in self.checks:
+            passed = check(candidate)
+            if inspect.isawaitable(passed):
+                passed = await passed
+            if not passed:
+                return getattr(check, "name", type(check).__name__)
+        return None
+
+    def _record_attempt(
+        self,
+        index: int,
+        latency: float,
+        usage: Any,
+        escalation: Optional[str],
+    ) -> None:
+        with self._lock:
+            stats = self.tier_stats[index]
+            stats.calls += 1
+            stats.cost += stats.tier.cost(usage)
+            stats.ewma_latency = (
+                latency
+                if stats.ewma_latency is None
+                else self.ewma_alpha * latency
+                + (1 - self.ewma_alpha) * stats.ewma_latency
+            )
+            if escalation is None:
+                stats.accepted += 1
+            else:
+                stats.escalations[escalation] = (
+                    stats.escalations.get(escalation, 0) + 1
+                )
+
+    def _record_request(
+        self,
+        attempts: List[Tuple[int, Any]],
+        latency: float,
+    ) -> None:
+        """Record the savings of a request against the strongest model,
+        given the tier and usage of its attempts."""
+        strongest = self.tier_stats[-1]
+        index, usage = attempts[-1]
+        with self._lock:
+            self.requests += 1
+            if index == len(self.tiers) - 1 and len(attempts) == 1:
+                return
+            if strongest.ewma_latency is not None:
+                self.latency_saved += strongest.ewma_latency - latency
+            spent = sum(self.tiers[i].cost(u) for i, u in attempts)
+            self.cost_saved += strongest.tier.cost(usage) - spent
+
+    async def arun(
+        self,
+        model: str,
+        messages: Sequence[Union[Any, Dict]],
+        parameters: Union[Any, Dict] = None,
+        response_model: Optional[Type[BaseModel]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Run the cascade from the tier of the model, see the class
+        docstring.
+
+        Args:
+            model: Model name, the strongest model of the cascade is the
+                usual choice.
+            messages: The prompt messages as sequence of MessageT or Dict.
+            parameters: The parameters for the LLM as ParamsT or Dict.
+            response_model: Optional structured output model type.
+            **kwargs: Additional keyword arguments passed to BaseLLM.arun.
+
+        Returns:
+            Any: The first response passing the checks, or the response of
+                the last tier.
+        """
+        last = self._tier_index(model)
+        if last is None:
+            return await super().arun(
+                model=model,
+                messages=messages,
+                parameters=parameters,
+                response_model=response_model,
+                **kwargs,
+            )
+
+        start = time.monotonic()
+        attempts: List[Tuple[int, Any]] = []
+        for index in range(last + 1):
+            tier_start = time.monotonic()
+            try:
+                response = await super().arun(
+                    model=self.tiers[index].model,
+                    messages=messages,
+                    parameters=parameters,
+                    response_model=response_model,
+                    **kwargs,
+                )
+            except Exception:
+                self._record_attempt(
+                    index,
+                    time.monotonic() - tier_start,
+                    None,
+                    "error",
+                )
+                if index == last:
+                    raise
+                continue
+            usage = getattr(response, "usage", None)
+            escalation = None
+            if index < last:
+                escalation = await self._check(
+                    CascadeCandidate.from_completion(
+                        self.tiers[index].model,
+                        response,
+                    ),
+                )
+            self._record_attempt(
+                index,
+                time.monotonic() - tier_start,
+                usage,
+                escalation,
+            )
+            attempts.append((index, usage))
+            if escalation is None:
+                self._record_request(attempts, time.monotonic() - start)
+                return response
+
+    async def _astream(
+        self,
+        model: str,
+        messages: Sequence[Union[Any, Dict]],
+        parameters: Any = None,
+        response_model: Optional[Type[BaseModel]] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Any, Any]:
+        """Stream the cascade from the tier of the model, the chunks of a
+        tier are released once its response passes the checks.
+
+        Args:
+            model: Model name, the strongest model of the cascade is the
+                usual choice.
+            messages: The prompt messages as sequence of MessageT or Dict.
+            parameters: The parameters for the LLM.
+            response_model: Optional structured output model type.
+            **kwargs: Additional keyword arguments passed to
+                BaseLLM._astream.
+
+        Returns:
+            AsyncGenerator[Any, Any]: The streaming completion result.
+        """
+        last = self._tier_index(model)
+        if last is None:
+            return await super()._astream(
+                model=model,
+                messages=messages,
+                parameters=parameters,
+                response_model=response_model,
+                **kwargs,
+            )
+        return self._astream_cascade(
+            last,
+            messages=messages,
+            parameters=parameters,
+            response_model=response_model,
+            **kwargs,
+        )
+
+    async def _astream_cascade(
+        self,
+        last: int,
+        messages: Sequence[Union[Any, Dict]],
+        parameters: Any = None,
+        response_model: Optional[Type[BaseModel]] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Any, Any]:
+        start = time.monotonic()
+        attempts: List[Tuple[int, Any]] = []
+        for index in range(last):
+            tier = self.tiers[index]
+            tier_start = time.monotonic()
+            chunks = []
+            try:
+                stream = await super()._astream(
+                    model=tier.model,
+                    messages=messages,
+                    parameters=parameters,
+                    response_model=response_model,
+                    **kwargs,
+                )
+                async for chunk in stream:
+                    chunks.append(chunk)
+            except Exception:
+                self._record_attempt(
+                    index,
+                    time.monotonic() - tier_start,
+                    None,
+                    "error",
+                )
+                continue
+            usage = next(
+                (
+                    c.usage
+                    for c in reversed(chunks)
+                    if getattr(c, "usage", None) is not None
+                ),
+                None,
+            )
+            escalation = await self._check(
+                CascadeCandidate.from_chunks(tier.model, chunks),
+            )
+            self._record_attempt(
+                index,
+                time.monotonic() - tier_start,
+                usage,
+                escalation,
+            )
+            attempts.append((index, usage))
+            if escalation is None:
+                self._record_request(attempts, time.monotonic() - start)
+                for chunk in chunks:
+                    yield chunk
+                return
+
+        # the last tier is streamed as it comes
+        tier_start = time.monotonic()
+        usage = None
+        try:
+            stream = await super()._astream(
+                model=self.tiers[last].model,
+                messages=messages,
+                parameters=parameters,
+                response_model=response_model,
+                **kwargs,
+            )
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                yield chunk
+        except Exception:
+            self._record_attempt(
+                last,
+                time.monotonic() - tier_start,
+                None,
+                "error",
+            )
+            raise
+        self._record_attempt(last, time.monotonic() - tier_start, usage, None)
+        attempts.append((last, usage))
+        self._record_request(attempts, time.monotonic() - start)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the hit rates of the tiers and the savings.
+
+        Returns:
+            Dict[str, Any]: The number of cascaded requests, the latency in
+                seconds and the cost saved against the strongest model, and
+                the stats of each tier keyed by its model.
+        """
+        return {
+            "requests": self.requests,
+            "latency_saved": self.latency_saved,
+            "cost_saved": self.cost_saved,
+            "tiers": {s.tier.model: s.to_dict() for s in self.tier_stats},
+        }
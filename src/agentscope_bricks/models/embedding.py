@@ -1,10 +1,15 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import json
 import os
+from http import HTTPStatus
 from typing import (
     Any,
+    AsyncContextManager,
     AsyncGenerator,
+    Dict,
     Generic,
+    Hashable,
     Optional,
     TypeVar,
     Union,
@@ -19,7 +24,17 @@ from typing_extensions import Literal, TypeAlias, Iterable
 from agentscope_bricks.base import AIModel
 from agentscope_bricks.base.model import ModelType
 from agentscope_bricks.constants import BASE_URL
-from agentscope_bricks.utils.schemas.embedding import EmbeddingResponse
+from agentscope_bricks.utils.embedding_cache_util import EmbeddingCache
+from agentscope_bricks.utils.logger_util import logger
+from agentscope_bricks.utils.rate_limit_util import (
+    RateLimitConfig,
+    rate_limited,
+)
+from agentscope_bricks.utils.schemas.embedding import (
+    EmbeddingError,
+    EmbeddingResponse,
+)
+from agentscope_bricks.utils.token_util import estimate_tokens
 
 TextEmbeddingModel: TypeAlias = Literal[
     "text-embedding-v1",
@@ -40,7 +55,17 @@ EmbeddingReturnT = TypeVar(
 
 
 class BaseEmbedding(AIModel, Generic[EmbeddingReturnT]):
+    """Base class of the embedding models.
+
+    Attributes:
+        client: Optional OpenAI or AsyncOpenAI client instance for API calls.
+        rate_limits: Concurrency and rate limits keyed by model name, shared
+            by all the embedding and LLM instances calling the same model in
+            the process.
+    """
+
     client: Optional[Union[OpenAI, AsyncOpenAI]] = None
+    rate_limits: Dict[str, RateLimitConfig] = {}
 
     def __init__(self, model_type: ModelType, **kwargs: Any):
         super().__init__(model_type=model_type, **kwargs)
@@ -49,6 +74,21 @@ class BaseEmbedding(AIModel, Generic[EmbeddingReturnT]):
             self.client = self.get_client(**kwargs)
         else:
             self.client = client
+        rate_limits = kwargs.get("rate_limits", None)
+        if rate_limits:
+            self.rate_limits = {**self.rate_limits, **rate_limits}
+
+    def rate_limited(self, model: str) -> AsyncContextManager[None]:
+        """Hold a slot of the process wide rate limiter of the model.
+
+        Args:
+            model: Model name to use for embedding.
+
+        Returns:
+            AsyncContextManager[None]: Context holding the slot, it does
+                nothing if the model has no limits.
+        """
+        return rate_limited(f"model:{model}", self.rate_limits.get(model))
 
     def model_dump_json(self) -> str:
         """Serialize the model information to JSON string.
@@ -91,8 +131,50 @@ class BaseEmbedding(AIModel, Generic[EmbeddingReturnT]):
 
 
 class TextEmbedding(BaseEmbedding):
+    """Text embedding model of an OpenAI compatible service.
+
+    A list of inputs is deduplicated, split into requests of at most
+    `batch_size` inputs and `batch_tokens` estimated tokens, and the
+    requests are sent concurrently, at most `max_concurrency` at a time on
+    top of the rate limits of the model. The embeddings are returned in the
+    order of the inputs, duplicates included, in a single response with the
+    summed usage, so the callers do not need to know the limits of the
+    provider. With an embedding cache, only the texts not cached yet are
+    sent. Usage::
+
+        embedding = TextEmbedding(
+            batch_size=10,
+            max_concurrency=8,
+            embedding_cache=EmbeddingCache(".cache/embeddings"),
+        )
+        response = await embedding.arun(documents, model="text-embedding-v4")
+        await embedding.arun(documents, model=model, use_cache=False)
+
+    Attributes:
+        batch_size: Maximum number of inputs per request, 10 for the
+            DashScope text embedding models.
+        batch_tokens: Maximum number of estimated tokens per request, an
+            input above it is sent alone.
+        max_concurrency: Maximum number of concurrent requests of a call.
+        embedding_cache: Optional persistent cache of the vectors of the
+            text inputs, it is disabled if None.
+    """
+
+    batch_size: int = 10
+    batch_tokens: int = 16384
+    max_concurrency: int = 8
+    embedding_cache: Optional[EmbeddingCache] = None
+
     def __init__(self, **kwargs: Any):
         super().__init__(model_type=ModelType.TEXT_EMBEDDING, **kwargs)
+        for name in (
+            "batch_size",
+            "batch_tokens",
+            "max_concurrency",
+            "embedding_cache",
+        ):
+            if kwargs.get(name) is not None:
+                setattr(self, name, kwargs[name])
 
     async def arun(
         self,
@@ -100,22 +182,220 @@ class TextEmbedding(BaseEmbedding):
         model: Union[str, TextEmbeddingModel],
         **kwargs: Any,
     ) -> EmbeddingReturnT:
+        use_cache = kwargs.pop("use_cache", True)
         # update the api key if passed
         api_key = kwargs.get("api_key", None)
         if api_key:
             self.client = AsyncOpenAI(api_key=api_key, base_url=BASE_URL)
 
-        response = await self.client.embeddings.create(
+        # the vectors of an explicit encoding format are returned as is
+        if (
+            self.embedding_cache is not None
+            and use_cache
+            and "encoding_format" not in kwargs
+        ):
+            texts = [input] if isinstance(input, str) else input
+            if (
+                isinstance(texts, list)
+                and texts
+                and all(isinstance(text, str) for text in texts)
+            ):
+                return await self._arun_cached(texts, model, **kwargs)
+        return await self._arun(input, model, **kwargs)
+
+    async def _arun_cached(
+        self,
+        texts: List[str],
+        model: str,
+        **kwargs: Any,
+    ) -> CreateEmbeddingResponse:
+        """Embed texts, sending only the ones not in the embedding
+        cache."""
+        dimensions = kwargs.get("dimensions")
+        # the first reads of the memory mapped vectors may fault pages in
+        cached = await asyncio.to_thread(
+            self.embedding_cache.lookup,
+            model,
+            texts,
+            dimensions,
+        )
+        missing = list(
+            dict.fromkeys(
+                text for text, vector in zip(texts, cached) if vector is None
+            ),
+        )
+        fetched: Dict[str, List[float]] = {}
+        usage = {"prompt_tokens": 0, "total_tokens": 0}
+        if missing:
+            response = await self._arun(missing, model, **kwargs)
+            vectors = [
+                item.embedding
+                for item in sorted(response.data, key=lambda d: d.index)
+            ]
+            try:
+                await asyncio.to_thread(
+                    self.embedding_cache.add,
+                    model,
+                    missing,
+                    vectors,
+                    dimensions,
+                )
+            except ValueError as e:
+                # the fetched vectors are still valid, only not cached
+                logger.error(f"Embedding cache add failed: {e}")
+            fetched = dict(zip(missing, vectors))
+            usage = {
+                "prompt_tokens": response.usage.prompt_tokens,
+                "total_tokens": response.usage.total_tokens,
+            }
+        return CreateEmbeddingResponse(
+            object="list",
             model=model,
-            input=input,
-            **kwargs,
+            data=[
+                {
+                    "object": "embedding",
+                    "index": i,
+                    "embedding": (
+                        vector.tolist()
+                        if vector is not None
+                        else fetched[text]
+                    ),
+                }
+                for i, (text, vector) in enumerate(zip(texts, cached))
+            ],
+            usage=usage,
         )
-        return response
+
+    async def _arun(
+        self,
+        input: Union[str, List[str], Iterable[int], Iterable[Iterable[int]]],
+        model: str,
+        **kwargs: Any,
+    ) -> CreateEmbeddingResponse:
+        if isinstance(input, str) or not isinstance(input, list):
+            return await self._create(input, model, **kwargs)
+        if not input or isinstance(input[0], int):
+            # a single input of token ids
+            return await self._create(input, model, **kwargs)
+
+        # the unique inputs, and the index of the unique input of each input
+        unique: Dict[Hashable, int] = {}
+        positions = [
+            unique.setdefault(
+                item if isinstance(item, str) else tuple(item),
+                len(unique),
+            )
+            for item in input
+        ]
+        items = [key if isinstance(key, str) else list(key) for key in unique]
+        batches = self._split(items)
+        if len(batches) == 1 and len(items) == len(input):
+            return await self._create(input, model, **kwargs)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def create(batch: List[Any]) -> CreateEmbeddingResponse:
+            async with semaphore:
+                return await self._create(batch, model, **kwargs)
+
+        responses = await asyncio.gather(
+            *[create(batch) for batch in batches],
+        )
+        embeddings: List[List[float]] = []
+        for response in responses:
+            data = sorted(response.data, key=lambda d: d.index)
+            embeddings.extend(item.embedding for item in data)
+        prompt_tokens = sum(r.usage.prompt_tokens for r in responses)
+        total_tokens = sum(r.usage.total_tokens for r in responses)
+        return CreateEmbeddingResponse(
+            object="list",
+            model=responses[0].model,
+            data=[
+                {
+                    "object": "embedding",
+                    "index": i,
+                    "embedding": embeddings[position],
+                }
+                for i, position in enumerate(positions)
+            ],
+            usage={
+                "prompt_tokens": prompt_tokens,
+                "total_tokens": total_tokens,
+            },
+        )
+
+    def _split(self, items: List[Any]) -> List[List[Any]]:
+        """Split the inputs into batches within the count and token limits,
+        keeping their order."""
+        batches: List[List[Any]] = []
+        batch: List[Any] = []
+        tokens = 0
+        for item in items:
+            count = (
+                estimate_tokens(item) if isinstance(item, str) else len(item)
+            )
+            if batch and (
+                len(batch) >= self.batch_size
+                or tokens + count > self.batch_tokens
+            ):
+                batches.append(batch)
+                batch, tokens = [], 0
+            batch.append(item)
+            tokens += count
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _create(
+        self,
+        input: Any,
+        model: str,
+        **kwargs: Any,
+    ) -> CreateEmbeddingResponse:
+        async with self.rate_limited(model):
+            return await self.client.embeddings.create(
+                model=model,
+                input=input,
+                **kwargs,
+            )
+
+
+class _ErrorResponse(Exception):
+    """Carry an error response of DashScope out of the rate limited call."""
+
+    def __init__(self, response: Any) -> None:
+        super().__init__(response.get("message"))
+        self.response = response
+        self.status_code = response.get("status_code")
 
 
 class MultimodalEmbedding(BaseEmbedding):
+    """Multimodal embedding model of DashScope.
+
+    The calls are made with the asyncio DashScope API, or in a worker
+    thread with the versions of the SDK without it, so they never block the
+    event loop. A list of several items is split into one request per item,
+    sent concurrently, at most `max_concurrency` at a time on top of the
+    rate limits of the model, except with `enable_fusion` which embeds all
+    the items into one vector. The items failing are reported in the
+    `errors` of the response instead of failing the whole call. Usage::
+
+        embedding = MultimodalEmbedding(max_concurrency=8)
+        response = await embedding.arun(
+            [{"text": "a cat"}, {"image": "https://example.com/cat.png"}],
+            model="multimodal-embedding-v1",
+        )
+
+    Attributes:
+        max_concurrency: Maximum number of concurrent requests of a call.
+    """
+
+    max_concurrency: int = 8
+
     def __init__(self, **kwargs: Any):
         super().__init__(model_type=ModelType.MULTIMODAL_EMBEDDING, **kwargs)
+        if kwargs.get("max_concurrency") is not None:
+            self.max_concurrency = kwargs["max_concurrency"]
 
     async def arun(
         self,
@@ -127,20 +407,105 @@ class MultimodalEmbedding(BaseEmbedding):
         api_key = kwargs.get("api_key", None)
         if api_key:
             self.client = AsyncOpenAI(api_key=api_key, base_url=BASE_URL)
-        response = dashscope.MultiModalEmbedding.call(
+
+        if kwargs.get("enable_fusion") or len(input) <= 1:
+            requests = [(list(range(len(input))), input)]
+        else:
+            requests = [([i], [item]) for i, item in enumerate(input)]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def call(indexes: List[int], items: List[dict]) -> Any:
+            async with semaphore:
+                try:
+                    return await self._call(items, model, **kwargs)
+                except Exception as e:
+                    return e
+
+        responses = await asyncio.gather(
+            *[call(indexes, items) for indexes, items in requests],
+        )
+        data: List[Dict[str, Any]] = []
+        errors: List[EmbeddingError] = []
+        usage: Dict[str, Any] = {}
+        for (indexes, _), response in zip(requests, responses):
+            if isinstance(response, Exception):
+                errors.extend(
+                    EmbeddingError(
+                        index=index,
+                        status_code=getattr(response, "status_code", None),
+                        code=type(response).__name__,
+                        message=str(response),
+                    )
+                    for index in indexes
+                )
+                continue
+            if response.get("status_code", HTTPStatus.OK) != HTTPStatus.OK:
+                errors.extend(
+                    EmbeddingError(
+                        index=index,
+                        status_code=response.get("status_code"),
+                        code=response.get("code"),
+                        message=response.get("message"),
+                    )
+                    for index in indexes
+                )
+                continue
+            converted = self._convert_response(response, model)
+            for item in converted.data:
+                item.index = (
+                    indexes[item.index] if len(indexes) > 1 else indexes[0]
+                )
+                data.append(item.model_dump())
+            for key, value in converted.usage.model_dump().items():
+                if value is not None:
+                    usage[key] = usage.get(key, 0) + value
+        return EmbeddingResponse(
+            data=sorted(data, key=lambda item: item["index"]),
             model=model,
-            input=input,
-            **kwargs,
+            object="list",
+            usage=usage,
+            errors=errors,
         )
-        return self._convert_response(response, model)
+
+    async def _call(
+        self,
+        input: List[dict],
+        model: str,
+        **kwargs: Any,
+    ) -> Any:
+        """Call the DashScope API without blocking the event loop."""
+        aio_embedding = getattr(dashscope, "AioMultiModalEmbedding", None)
+        try:
+            async with self.rate_limited(model):
+                if aio_embedding is not None:
+                    response = await aio_embedding.call(
+                        model=model,
+                        input=input,
+                        **kwargs,
+                    )
+                else:
+                    response = await asyncio.to_thread(
+                        dashscope.MultiModalEmbedding.call,
+                        model=model,
+                        input=input,
+                        **kwargs,
+                    )
+                # DashScope returns the errors instead of raising them,
+                # raise them while holding the slot so that the rate
+                # limiter reports the call as failed
+                if response.get("status_code", HTTPStatus.OK) != HTTPStatus.OK:
+                    raise _ErrorResponse(response)
+        except _ErrorResponse as e:
+            return e.response
+        return response
 
     def _convert_response(
         self,
         ds_response: dict,
         model: str,
     ) -> EmbeddingResponse:
-        embeddings = ds_response.get("output", {}).get("embeddings", [])
-        usage = ds_response.get("usage", {})
+        embeddings = (ds_response.get("output") or {}).get("embeddings", [])
+        usage = ds_response.get("usage") or {}
         data = [
             {
                 "object": item.get("object", "embedding"),
@@ -1,16 +1,20 @@
 # -*- coding: utf-8 -*-
 import json
 import os
+from contextlib import asynccontextmanager
 from typing import (
     Any,
+    AsyncContextManager,
     AsyncGenerator,
     AsyncIterable,
+    AsyncIterator,
     Dict,
     Generator,
     Generic,
     List,
     Optional,
     Sequence,
+    Tuple,
     Type,
     TypeVar,
     Union,
@@ -34,6 +38,24 @@ from agentscope_bricks.utils.schemas.oai_llm import (
     SystemMessage,
     ToolMessage,
 )
+from agentscope_bricks.utils.cache_util import LLMResponseCache
+from agentscope_bricks.utils.client_pool_util import (
+    LLMClientPool,
+    get_client_pool,
+)
+from agentscope_bricks.utils.json_stream_util import (
+    IncrementalJSONParser,
+    PartialModelBuilder,
+)
+from agentscope_bricks.utils.rate_limit_util import (
+    RateLimitConfig,
+    rate_limited,
+)
+from agentscope_bricks.utils.semantic_cache_util import (
+    SemanticCache,
+    get_query_text,
+)
+from agentscope_bricks.utils.token_util import ContextTrimmer
 from agentscope_bricks.utils.tracing_utils import TraceType
 from agentscope_bricks.utils.tracing_utils.wrapper import trace
 
@@ -63,11 +85,26 @@ class BaseLLM(AIModel, Generic[MessageT, ParamsT, StructReturnT, LlmReturnT]):
 
     Attributes:
         client: Optional OpenAI or AsyncOpenAI client instance for API calls.
+        rate_limits: Concurrency and rate limits keyed by model name, shared
+            by all the LLM instances calling the same model in the process.
+        client_pool: Pool of the clients used for the calls passing an
+            `api_key`, the process wide pool if None.
+        response_cache: Optional exact-match cache of the responses, it is
+            disabled if None.
+        semantic_cache: Optional semantic cache of the responses of `arun`,
+            looked up after the exact-match cache, it is disabled if None.
+        context_trimmer: Optional trimmer fitting the messages to the context
+            window of the model before sending, disabled if None.
     """
 
     client: Optional[
         Union[OpenAI, AsyncOpenAI, instructor.client.Instructor]
     ] = None
+    rate_limits: Dict[str, RateLimitConfig] = {}
+    client_pool: Optional[LLMClientPool] = None
+    response_cache: Optional[LLMResponseCache] = None
+    semantic_cache: Optional[SemanticCache] = None
+    context_trimmer: Optional[ContextTrimmer] = None
 
     def __init__(self, **kwargs: Any):
         """Initialize the LLM with generic prompt messages and parameters.
@@ -75,6 +112,16 @@ class BaseLLM(AIModel, Generic[MessageT, ParamsT, StructReturnT, LlmReturnT]):
         Args:
             **kwargs: Additional keyword arguments including:
                 - client: Optional pre-configured client instance
+                - rate_limits: Optional dict of model name to
+                  RateLimitConfig, overriding the class level limits
+                - client_pool: Optional LLMClientPool for the calls passing
+                  an api_key
+                - response_cache: Optional LLMResponseCache to enable
+                  response caching
+                - semantic_cache: Optional SemanticCache to enable semantic
+                  response caching
+                - context_trimmer: Optional ContextTrimmer to enable context
+                  window trimming
                 - Other initialization parameters passed to parent class
         """
         super().__init__(model_type=ModelType.LLM, **kwargs)
@@ -83,6 +130,21 @@ class BaseLLM(AIModel, Generic[MessageT, ParamsT, StructReturnT, LlmReturnT]):
             self.client = self.get_client(**kwargs)
         else:
             self.client = client
+        rate_limits = kwargs.get("rate_limits", None)
+        if rate_limits:
+            self.rate_limits = {**self.rate_limits, **rate_limits}
+        client_pool = kwargs.get("client_pool", None)
+        if client_pool is not None:
+            self.client_pool = client_pool
+        response_cache = kwargs.get("response_cache", None)
+        if response_cache is not None:
+            self.response_cache = response_cache
+        semantic_cache = kwargs.get("semantic_cache", None)
+        if semantic_cache is not None:
+            self.semantic_cache = semantic_cache
+        context_trimmer = kwargs.get("context_trimmer", None)
+        if context_trimmer is not None:
+            self.context_trimmer = context_trimmer
 
     def model_dump_json(self) -> str:
         """Serialize the model information to JSON string.
@@ -163,7 +225,11 @@ class BaseLLM(AIModel, Generic[MessageT, ParamsT, StructReturnT, LlmReturnT]):
             parameters: The parameters for the LLM as ParamsT or Dict.
             response_model: Optional structured output model type.
             **kwargs: Additional keyword arguments including:
-                - api_key: Optional API key override
+                - api_key: Optional API key override, the call then uses the
+                  pooled client of this key
+                - base_url: Optional base URL used with the api_key
+                - use_cache: Whether to use the response caches, defaults
+                  to True
                 - Other arguments passed to the completion API
 
         Returns:
@@ -173,16 +239,87 @@ class BaseLLM(AIModel, Generic[MessageT, ParamsT, StructReturnT, LlmReturnT]):
             ValueError: If JSON schema format is invalid when using json_schema
                 response format.
         """
-        # update the api key if passed
-        api_key = kwargs.get("api_key", None)
+        dict_messages, parameters = self._format_request(
+            messages,
+            parameters,
+        )
+        extra_model_kwargs = {}
 
-        if api_key:
-            # is_instructor = isinstance(self.client,
-            # instructor.client.Instructor) and response_model
-            self.client = AsyncOpenAI(api_key=api_key, base_url=BASE_URL)
-            if response_model:
-                self.client = instructor.from_openai(self.client)
+        if response_model:
+            # TODO: response model is used for structured output,
+            #  not compatible with function calling for now
+            extra_model_kwargs["response_model"] = response_model
+
+        use_cache = kwargs.get("use_cache", True)
+        cache_key = None
+        if self.response_cache is not None and use_cache:
+            cache_key = self.response_cache.make_request_key(
+                model=model,
+                messages=dict_messages,
+                parameters=parameters,
+                response_model=response_model,
+            )
+            cached = await self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        query_vector = None
+        query_text = get_query_text(dict_messages)
+        if self.semantic_cache is not None and use_cache and query_text:
+            fingerprint = self.semantic_cache.make_fingerprint(
+                model=model,
+                messages=dict_messages,
+                parameters=parameters,
+                response_model=response_model,
+            )
+            cached, query_vector = await self.semantic_cache.get(
+                query_text,
+                fingerprint,
+            )
+            if cached is not None:
+                return cached
+
+        leased_client = self.leased_client(
+            api_key=kwargs.get("api_key", None),
+            base_url=kwargs.get("base_url", None),
+            structured=response_model is not None,
+        )
+        async with self.rate_limited(model), leased_client as client:
+            # todo: change from create_partial to create, double check
+            response = await client.chat.completions.create(
+                model=model,
+                stream=False,
+                messages=dict_messages,
+                **parameters,
+                **extra_model_kwargs,
+            )
+        if cache_key is not None:
+            await self.response_cache.set(cache_key, response)
+        if query_vector is not None:
+            await self.semantic_cache.set(query_vector, fingerprint, response)
+        return response
+
+    def _format_request(
+        self,
+        messages: Sequence[Union[MessageT, Dict]],
+        parameters: Union[ParamsT, Dict] = None,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Convert the messages and parameters of a completion call to the
+        dict format of the OpenAI API, trimming the messages to the context
+        window if a context trimmer is set.
+
+        Args:
+            messages: The prompt messages as sequence of MessageT or Dict.
+            parameters: The parameters for the LLM as ParamsT or Dict.
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Dict[str, Any]]: The messages and
+                the parameters in dict format.
 
+        Raises:
+            ValueError: If JSON schema format is invalid when using json_schema
+                response format.
+        """
         # support dict message
         if isinstance(messages[0], dict):
             formatted_messages: List[OpenAIMessage] = [
@@ -195,8 +332,6 @@ class BaseLLM(AIModel, Generic[MessageT, ParamsT, StructReturnT, LlmReturnT]):
         if isinstance(parameters, dict):
             parameters: Parameters = Parameters(**parameters)
 
-        extra_model_kwargs = {}
-
         # make sure the parameters is an openai parameters
         if parameters and type(parameters) is not Parameters:
             parameters = Parameters(
@@ -237,28 +372,60 @@ class BaseLLM(AIModel, Generic[MessageT, ParamsT, StructReturnT, LlmReturnT]):
         dict_messages: List[Any] = [
             self._convert_message_to_dict(m) for m in formatted_messages
         ]
-
-        if response_model:
-            # TODO: response model is used for structured output,
-            #  not compatible with function calling for now
-            extra_model_kwargs["response_model"] = response_model
-            # todo: change from create_partial to create, double check
-            response = await self.client.chat.completions.create(
-                model=model,
-                stream=False,
-                messages=dict_messages,
-                **parameters,
-                **extra_model_kwargs,
+        if self.context_trimmer is not None:
+            dict_messages = self.context_trimmer.trim(
+                dict_messages, parameters
             )
-        else:
-            response = await self.client.chat.completions.create(
-                model=model,
-                stream=False,
-                messages=dict_messages,
-                **parameters,
-                **extra_model_kwargs,
-            )
-        return response
+        return dict_messages, parameters
+
+    @asynccontextmanager
+    async def leased_client(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        structured: bool = False,
+    ) -> AsyncIterator[Any]:
+        """Use the client of a call during the context.
+
+        The calls passing an api key use the pooled client of the key, which
+        keeps its connections alive across calls, instead of creating a new
+        client per call.
+
+        Args:
+            api_key: Optional API key override of the call.
+            base_url: Optional base URL used with the api key, defaults to
+                BASE_URL constant.
+            structured: Whether the client should be wrapped by instructor
+                for structured output.
+
+        Yields:
+            Any: The client of the call, `self.client` if no api key is
+                given.
+        """
+        if not api_key:
+            yield self.client
+            return
+        pool = self.client_pool
+        if pool is None:
+            pool = get_client_pool()
+        async with pool.lease(
+            api_key=api_key,
+            base_url=base_url or BASE_URL,
+            mode=instructor.Mode.TOOLS if structured else None,
+        ) as client:
+            yield client
+
+    def rate_limited(self, model: str) -> AsyncContextManager[None]:
+        """Hold a slot of the process wide rate limiter of the model.
+
+        Args:
+            model: Model name to use for completion.
+
+        Returns:
+            AsyncContextManager[None]: Context holding the slot, it does
+                nothing if the model has no limits.
+        """
+        return rate_limited(f"model:{model}", self.rate_limits.get(model))
 
     @trace(trace_type=TraceType.LLM, trace_name="base_llm")
     async def astream(
@@ -341,7 +508,11 @@ class BaseLLM(AIModel, Generic[MessageT, ParamsT, StructReturnT, LlmReturnT]):
             response_model: Optional structured output model type for
                     structured output.
             **kwargs: Additional keyword arguments including:
-                - api_key: Optional API key override
+                - api_key: Optional API key override, the stream then uses
+                  the pooled client of this key
+                - base_url: Optional base URL used with the api_key
+                - use_cache: Whether to use the response cache, defaults
+                  to True
                 - Other arguments passed to the completion API
 
         Returns:
@@ -351,17 +522,6 @@ class BaseLLM(AIModel, Generic[MessageT, ParamsT, StructReturnT, LlmReturnT]):
             ValueError: If JSON schema format is invalid when using json_schema
                 response format.
         """
-        # update the api key
-        api_key = kwargs.get("api_key", None)
-        if api_key:
-            is_instructor = isinstance(
-                self.client,
-                instructor.client.Instructor,
-            )
-            self.client = AsyncOpenAI(api_key=api_key, base_url=BASE_URL)
-            if is_instructor:
-                self.client = instructor.from_openai(self.client)
-
         # support dict message
         if isinstance(messages[0], dict):
             formatted_messages: List[OpenAIMessage] = [
@@ -414,27 +574,157 @@ class BaseLLM(AIModel, Generic[MessageT, ParamsT, StructReturnT, LlmReturnT]):
         dict_messages: List[Any] = [
             self._convert_message_to_dict(m) for m in formatted_messages
         ]
-
-        if response_model:
-            # TODO: response model is used for structured output,
-            #  not compatible with function calling for now
-            extra_model_kwargs["response_model"] = response_model
-            response = self.client.chat.completions.create_partial(
-                model=model,
-                stream=True,
-                messages=dict_messages,
-                **parameters,
-                **extra_model_kwargs,
+        if self.context_trimmer is not None:
+            dict_messages = self.context_trimmer.trim(
+                dict_messages, parameters
             )
-        else:
-            response = await self.client.chat.completions.create(
+
+        return self._astream_response(
+            model=model,
+            messages=dict_messages,
+            parameters={**parameters, **extra_model_kwargs},
+            response_model=response_model,
+            api_key=kwargs.get("api_key", None),
+            base_url=kwargs.get("base_url", None),
+            use_cache=kwargs.get("use_cache", True),
+        )
+
+    async def _astream_response(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        parameters: Dict[str, Any],
+        response_model: Optional[Type[StructReturnT]] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> AsyncGenerator[Union[ChatCompletionChunk, StructReturnT], Any]:
+        """Stream the response, the rate limiter slot and the client of the
+        call are held until the stream ends. A cached response is replayed
+        chunk by chunk, and a fully consumed stream is cached.
+
+        Args:
+            model: Model name to use for completion.
+            messages: The prompt messages in dict format.
+            parameters: The parameters for the LLM in dict format.
+            response_model: Optional structured output model type.
+            api_key: Optional API key override of the call.
+            base_url: Optional base URL used with the api key.
+            use_cache: Whether to use the response cache.
+
+        Yields:
+            Union[ChatCompletionChunk, StructReturnT]: The response chunks,
+                or the structured outputs if a response model is given.
+        """
+        cache_key = None
+        if self.response_cache is not None and use_cache:
+            cache_key = self.response_cache.make_request_key(
                 model=model,
+                messages=messages,
+                parameters=parameters,
+                response_model=response_model,
                 stream=True,
-                messages=dict_messages,
-                **parameters,
-                **extra_model_kwargs,
             )
-        return response
+            cached = await self.response_cache.get(cache_key)
+            if cached is not None:
+                for chunk in cached:
+                    yield chunk
+                return
+
+        chunks = []
+        leased_client = self.leased_client(api_key, base_url)
+        async with self.rate_limited(model), leased_client as client:
+            if response_model:
+                # TODO: response model is used for structured output,
+                #  not compatible with function calling for now
+                stream = self._astream_structured(
+                    client=client,
+                    model=model,
+                    messages=messages,
+                    parameters=parameters,
+                    response_model=response_model,
+                )
+            else:
+                stream = await client.chat.completions.create(
+                    model=model,
+                    stream=True,
+                    messages=messages,
+                    **parameters,
+                )
+            async for chunk in stream:
+                if cache_key is not None:
+                    chunks.append(chunk)
+                yield chunk
+        if cache_key is not None:
+            await self.response_cache.set(cache_key, chunks)
+
+    async def _astream_structured(
+        self,
+        client: Any,
+        model: str,
+        messages: List[Dict[str, Any]],
+        parameters: Dict[str, Any],
+        response_model: Type[StructReturnT],
+    ) -> AsyncGenerator[StructReturnT, Any]:
+        """Stream structured output of the response model.
+
+        The output is requested as a forced function call, whose arguments
+        are parsed incrementally as they stream, so that every chunk costs
+        only its own length instead of re-parsing the accumulated JSON. A
+        partial instance is only yielded when the parsed value changed, and
+        only the objects still open in the JSON text are built again.
+
+        Args:
+            client: The client of the call.
+            model: Model name to use for completion.
+            messages: The prompt messages in dict format.
+            parameters: The parameters for the LLM in dict format.
+            response_model: The structured output model type.
+
+        Yields:
+            StructReturnT: Partial instances built without validation, then
+                the validated instance once the JSON object closes.
+        """
+        # instructor wraps the raw openai client
+        client = getattr(client, "client", None) or client
+        name = response_model.__name__
+        tool = {
+            "type": "function",
+            "function": {
+                "name": name,
+                "description": response_model.__doc__
+                or f"Correctly extracted `{name}` with all the required "
+                f"parameters with correct types",
+                "parameters": response_model.model_json_schema(),
+            },
+        }
+        parameters = {
+            **parameters,
+            "tools": [tool],
+            "tool_choice": {"type": "function", "function": {"name": name}},
+        }
+        stream = await client.chat.completions.create(
+            model=model,
+            stream=True,
+            messages=messages,
+            **parameters,
+        )
+
+        parser = IncrementalJSONParser()
+        builder = PartialModelBuilder(response_model, parser)
+        async for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.tool_calls:
+                continue
+            for tool_call in chunk.choices[0].delta.tool_calls:
+                if not tool_call.function or not tool_call.function.arguments:
+                    continue
+                if parser.feed(tool_call.function.arguments):
+                    yield response_model.model_validate(parser.value)
+                    return
+                partial = builder.snapshot()
+                if partial is not None:
+                    yield partial
+        yield response_model.model_validate(parser.close())
 
     @staticmethod
     def transform_response(response: Any) -> str:
@@ -0,0 +1,434 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+import time
+from typing import (
+    Any,
+    AsyncGenerator,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+import openai
+from pydantic import BaseModel, Field
+
+from agentscope_bricks.constants import BASE_URL
+from agentscope_bricks.models.llm import BaseLLM
+from agentscope_bricks.utils.deadline_util import DeadlineExceeded
+from agentscope_bricks.utils.rate_limit_util import RateLimitTimeoutError
+
+# errors after which the call is retried on another endpoint, including the
+# upstream timeouts, openai.APITimeoutError being an APIConnectionError
+FAILOVER_ERRORS = (
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+# timeouts of the caller, not of the endpoint, raised without failover and
+# without counting an endpoint error
+LOCAL_TIMEOUT_ERRORS = (RateLimitTimeoutError, DeadlineExceeded)
+
+
+class LLMEndpoint(BaseModel):
+    """An OpenAI compatible endpoint of the router."""
+
+    base_url: str = Field(default=BASE_URL, description="Base URL")
+    api_key: Optional[str] = Field(
+        default=None,
+        description="API key, defaults to DASHSCOPE_API_KEY",
+    )
+    name: Optional[str] = Field(
+        default=None,
+        description="Name of the endpoint in the stats, defaults to base_url",
+    )
+    model_map: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Model names of this endpoint keyed by the requested "
+        "model names, e.g. for a self-hosted fallback",
+    )
+
+
+class EndpointState:
+    """Load and health of an endpoint."""
+
+    def __init__(self, endpoint: LLMEndpoint, llm: BaseLLM) -> None:
+        self.endpoint = endpoint
+        self.name = endpoint.name or endpoint.base_url
+        self.llm = llm
+        self.in_flight = 0
+        # latency of the completions, and time to first chunk of the streams
+        self.ewma: Dict[str, Optional[float]] = {"run": None, "stream": None}
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.ejections = 0
+        self.ejected_until: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.ejected_until is None:
+            return "healthy"
+        if time.monotonic() >= self.ejected_until:
+            return "half_open"
+        return "ejected"
+
+    def latency(self, kind: str) -> float:
+        """The latency estimate used for balancing, the other kind is used
+        if this kind has no sample yet, and 0 if none to explore first."""
+        ewma = self.ewma[kind]
+        if ewma is None:
+            ewma = self.ewma["stream" if kind == "run" else "run"]
+        return ewma or 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.endpoint.base_url,
+            "state": self.state,
+            "in_flight": self.in_flight,
+            "ewma_latency": self.ewma["run"],
+            "ewma_first_chunk_latency": self.ewma["stream"],
+            "requests": self.requests,
+            "errors": self.errors,
+            "consecutive_errors": self.consecutive_errors,
+            "ejections": self.ejections,
+        }
+
+
+class RouterLLM(BaseLLM):
+    """LLM routing the calls across several OpenAI compatible endpoints,
+    e.g. several DashScope regions plus a self-hosted fallback.
+
+    Each call goes to the endpoint with the lowest EWMA latency weighted by
+    its in-flight calls. An endpoint is ejected after consecutive errors,
+    once the ejection time is over a single probe call is let through,
+    which brings it back on success. A call failing with a connection,
+    rate limit or server error fails over to the next endpoint, a stream
+    only before its first chunk.
+
+    Examples:
+        .. code-block:: python
+
+            llm = RouterLLM(
+                endpoints=[
+                    LLMEndpoint(name="beijing"),
+                    LLMEndpoint(
+                        name="singapore",
+                        base_url="https://dashscope-intl.aliyuncs.com/"
+                        "compatible-mode/v1",
+                        api_key=os.getenv("DASHSCOPE_INTL_API_KEY"),
+                    ),
+                ],
+            )
+            response = await llm.arun(model="qwen-max", messages=messages)
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[Union[LLMEndpoint, Dict[str, Any]]],
+        ewma_alpha: float = 0.3,
+        max_consecutive_errors: int = 3,
+        ejection_time: float = 30.0,
+        **kwargs: Any,
+    ):
+        """Initialize the router.
+
+        Args:
+            endpoints: The endpoints, in order of preference when they have
+                the same load.
+            ewma_alpha: Weight of the latest latency in the EWMA.
+            max_consecutive_errors: Number of consecutive errors after which
+                an endpoint is ejected.
+            ejection_time: Seconds an endpoint is ejected before a probe.
+            **kwargs: Additional keyword arguments passed to BaseLLM, e.g.
+                `rate_limits`, shared by the endpoints.
+        """
+        if not endpoints:
+            raise ValueError("RouterLLM requires at least one endpoint")
+        endpoints = [
+            e if isinstance(e, LLMEndpoint) else LLMEndpoint(**e)
+            for e in endpoints
+        ]
+        self.endpoints: List[EndpointState] = []
+        for endpoint in endpoints:
+            client = self.get_client(
+                api_key=endpoint.api_key,
+                base_url=endpoint.base_url,
+            )
+            llm = BaseLLM(client=client, **kwargs)
+            self.endpoints.append(EndpointState(endpoint, llm))
+        super().__init__(client=self.endpoints[0].llm.client, **kwargs)
+        self.ewma_alpha = ewma_alpha
+        self.max_consecutive_errors = max_consecutive_errors
+        self.ejection_time = ejection_time
+        self.failovers = 0
+        self._lock = threading.Lock()
+
+    def _select(self, kind: str) -> List[EndpointState]:
+        """Order the endpoints to try for a call, the ejected endpoints are
+        only tried last."""
+        available, ejected = [], []
+        for state in self.endpoints:
+            if state.state == "ejected" or (
+                state.state == "half_open" and state.probing
+            ):
+                ejected.append(state)
+            else:
+                available.append(state)
+        available.sort(
+            key=lambda s: s.latency(kind) * (s.in_flight + 1),
+        )
+        ejected.sort(key=lambda s: s.ejected_until)
+        return available + ejected
+
+    def _start(self, state: EndpointState) -> float:
+        with self._lock:
+            state.in_flight += 1
+            state.requests += 1
+            if state.state == "half_open":
+                state.probing = True
+        return time.monotonic()
+
+    def _record_latency(
+        self,
+        state: EndpointState,
+        kind: str,
+        latency: float,
+    ) -> None:
+        with self._lock:
+            ewma = state.ewma[kind]
+            state.ewma[kind] = (
+                latency
+                if ewma is None
+                else self.ewma_alpha * latency + (1 - self.ewma_alpha) * ewma
+            )
+            state.consecutive_errors = 0
+            state.ejected_until = None
+            state.probing = False
+
+    def _record_error(self, state: EndpointState) -> None:
+        with self._lock:
+            state.errors += 1
+            state.consecutive_errors += 1
+            if (
+                state.probing
+                or state.consecutive_errors >= self.max_consecutive_errors
+            ):
+                state.ejected_until = time.monotonic() + self.ejection_time
+                state.ejections += 1
+                state.probing = False
+
+    def _record_abort(self, state: EndpointState) -> None:
+        """The call was aborted by the caller, which tells nothing about the
+        health of the endpoint, a probe of a half open endpoint is retried
+        by the next call."""
+        with self._lock:
+            state.probing = False
+
+    def _release_probe(
+        self,
+        state: EndpointState,
+        error: BaseException,
+    ) -> None:
+        """Release the probe of a half open endpoint after a call failed
+        with an error which is not worth a failover, a cancellation is an
+        abort, any other error fails the probe."""
+        if isinstance(error, asyncio.CancelledError):
+            self._record_abort(state)
+        elif state.probing:
+            self._record_error(state)
+
+    def _finish(self, state: EndpointState) -> None:
+        with self._lock:
+            state.in_flight -= 1
+
+    @staticmethod
+    def _endpoint_kwargs(
+        state: EndpointState,
+        model: str,
+        kwargs: Dict[str, Any],
+    ) -> Tuple[str, Dict[str, Any]]:
+        """The model name and kwargs of a call on an endpoint, the
+        credentials of the endpoint take precedence over the call ones."""
+        kwargs = {
+            k: v for k, v in kwargs.items() if k not in ("api_key", "base_url")
+        }
+        return state.endpoint.model_map.get(model, model), kwargs
+
+    async def arun(
+        self,
+        model: str,
+        messages: Sequence[Union[Any, Dict]],
+        parameters: Union[Any, Dict] = None,
+        response_model: Optional[Type[BaseModel]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Run the LLM on the best endpoint, failing over to the next ones.
+
+        Args:
+            model: Model name to use for completion.
+            messages: The prompt messages as sequence of MessageT or Dict.
+            parameters: The parameters for the LLM as ParamsT or Dict.
+            response_model: Optional structured output model type.
+            **kwargs: Additional keyword arguments passed to BaseLLM.arun.
+
+        Returns:
+            Any: The completion result.
+
+        Raises:
+            Exception: The error of the last endpoint if all of them fail,
+                or the first error which is not worth a failover, e.g. a bad
+                request.
+        """
+        error: Optional[BaseException] = None
+        for state in self._select("run"):
+            if error is not None:
+                self.failovers += 1
+            endpoint_model, endpoint_kwargs = self._endpoint_kwargs(
+                state,
+                model,
+                kwargs,
+            )
+            start = self._start(state)
+            try:
+                response = await state.llm.arun(
+                    model=endpoint_model,
+                    messages=messages,
+                    parameters=parameters,
+                    response_model=response_model,
+                    **endpoint_kwargs,
+                )
+            except LOCAL_TIMEOUT_ERRORS:
+                self._record_abort(state)
+                raise
+            except FAILOVER_ERRORS as e:
+                self._record_error(state)
+                error = e
+                continue
+            except BaseException as e:
+                self._release_probe(state, e)
+                raise
+            finally:
+                self._finish(state)
+            self._record_latency(state, "run", time.monotonic() - start)
+            return response
+        raise error
+
+    async def _astream(
+        self,
+        model: str,
+        messages: Sequence[Union[Any, Dict]],
+        parameters: Any = None,
+        response_model: Optional[Type[BaseModel]] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Any, Any]:
+        """Stream the LLM on the best endpoint, failing over to the next
+        ones until the first chunk is received.
+
+        Args:
+            model: Model name to use for completion.
+            messages: The prompt messages as sequence of MessageT or Dict.
+            parameters: The parameters for the LLM.
+            response_model: Optional structured output model type.
+            **kwargs: Additional keyword arguments passed to
+                BaseLLM._astream.
+
+        Returns:
+            AsyncGenerator[Any, Any]: The streaming completion result.
+        """
+        return self._astream_failover(
+            model=model,
+            messages=messages,
+            parameters=parameters,
+            response_model=response_model,
+            **kwargs,
+        )
+
+    async def _astream_failover(
+        self,
+        model: str,
+        messages: Sequence[Union[Any, Dict]],
+        parameters: Any = None,
+        response_model: Optional[Type[BaseModel]] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Any, Any]:
+        """Yield the chunks of the first endpoint returning a chunk, the
+        endpoint is held until the stream ends."""
+        error: Optional[BaseException] = None
+        for state in self._select("stream"):
+            if error is not None:
+                self.failovers += 1
+            endpoint_model, endpoint_kwargs = self._endpoint_kwargs(
+                state,
+                model,
+                kwargs,
+            )
+            start = self._start(state)
+            try:
+                stream = await state.llm._astream(
+                    model=endpoint_model,
+                    messages=messages,
+                    parameters=parameters,
+                    response_model=response_model,
+                    **endpoint_kwargs,
+                )
+                try:
+                    first = await stream.__anext__()
+                except StopAsyncIteration:
+                    self._finish(state)
+                    self._record_latency(
+                        state,
+                        "stream",
+                        time.monotonic() - start,
+                    )
+                    return
+            except LOCAL_TIMEOUT_ERRORS:
+                self._finish(state)
+                self._record_abort(state)
+                raise
+            except FAILOVER_ERRORS as e:
+                self._finish(state)
+                self._record_error(state)
+                error = e
+                continue
+            except BaseException as e:
+                self._finish(state)
+                self._release_probe(state, e)
+                raise
+
+            self._record_latency(state, "stream", time.monotonic() - start)
+            try:
+                yield first
+                async for chunk in stream:
+                    yield chunk
+            except LOCAL_TIMEOUT_ERRORS:
+                self._record_abort(state)
+                raise
+            except FAILOVER_ERRORS:
+                # too late to fail over once chunks have been yielded
+                self._record_error(state)
+                raise
+            finally:
+                self._finish(state)
+                await stream.aclose()
+            return
+        raise error
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the load and health of the endpoints.
+
+        Returns:
+            Dict[str, Any]: The number of failovers, and the stats of each
+                endpoint keyed by its name.
+        """
+        return {
+            "failovers": self.failovers,
+            "endpoints": {s.name: s.to_dict() for s in self.endpoints},
+        }
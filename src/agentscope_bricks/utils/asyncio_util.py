@@ -1,8 +1,23 @@
 # -*- coding: utf-8 -*-
-from typing import AsyncIterable, AsyncIterator, Tuple, TypeVar
+import asyncio
+import contextvars
+import os
+import threading
+import weakref
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Tuple,
+    TypeVar,
+)
 
 T = TypeVar("T")
 
+_MISSING = object()
+
 
 async def aenumerate(
     asequence: AsyncIterable[T],
@@ -22,3 +37,122 @@ async def aenumerate(
     async for elem in asequence:
         yield n, elem
         n += 1
+
+
+async def amerge(*iterables: AsyncIterable[T]) -> AsyncIterator[T]:
+    """Merge async iterables, yielding their items as soon as they arrive.
+
+    The iterables are consumed concurrently, each of them at most one item
+    ahead of the consumer. The first error of an iterable is raised, and
+    the other iterables are cancelled when the merge fails or is closed.
+
+    Args:
+        *iterables (AsyncIterable[T]): The async iterables to merge.
+
+    Yields:
+        T: The items of all the iterables, in order of arrival.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, len(iterables)))
+
+    async def drain(iterable: AsyncIterable[T]) -> None:
+        try:
+            async for item in iterable:
+                await queue.put((item, None))
+        except Exception as e:
+            await queue.put((_MISSING, e))
+        else:
+            await queue.put((_MISSING, None))
+
+    tasks = [asyncio.ensure_future(drain(iterable)) for iterable in iterables]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            item, error = await queue.get()
+            if error is not None:
+                raise error
+            if item is _MISSING:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+_thread_loops = threading.local()
+
+
+def get_thread_loop() -> asyncio.AbstractEventLoop:
+    """Get the event loop of the calling thread for the sync calls, the
+    loop is lazily created at the first call, recreated after fork, and
+    closed once the thread exits.
+
+    Each thread runs its own loop, so that the sync calls of several threads
+    run in parallel, and clients and sessions created under the loop could
+    be reused across the sync calls of the same thread.
+
+    Returns:
+        asyncio.AbstractEventLoop: The event loop of the calling thread.
+    """
+    holder = getattr(_thread_loops, "holder", None)
+    if holder is None or holder.pid != os.getpid():
+        holder = _LoopHolder()
+        _thread_loops.holder = holder
+    return holder.loop
+
+
+class _LoopHolder:
+    """Owner of a thread loop, closing it when the thread local is
+    dropped."""
+
+    def __init__(self) -> None:
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        weakref.finalize(self, self.loop.close)
+
+
+def run_sync(
+    func: Callable[..., Awaitable[T]],
+    *args: Any,
+    **kwargs: Any,
+) -> T:
+    """Run an async function from sync code on the event loop of the
+    calling thread, see `get_thread_loop`.
+
+    Context variables of the caller are visible to the coroutine, and the
+    changes made by the coroutine are copied back to the caller, the same
+    as `asgiref.sync.async_to_sync`.
+
+    Args:
+        func: The async function to run.
+        *args: Positional arguments for the function.
+        **kwargs: Keyword arguments for the function.
+
+    Returns:
+        T: The result of the function.
+
+    Raises:
+        RuntimeError: If called from a running event loop, which would be
+            blocked by the call, await the async function instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError(
+            f"run_sync({getattr(func, '__qualname__', func)}) cannot be "
+            f"called from a running event loop, await it instead",
+        )
+
+    async def runner() -> Tuple[T, contextvars.Context]:
+        result = await func(*args, **kwargs)
+        return result, contextvars.copy_context()
+
+    caller_context = contextvars.copy_context()
+    result, result_context = get_thread_loop().run_until_complete(runner())
+    for var, value in result_context.items():
+        if caller_context.get(var, _MISSING) is not value:
+            var.set(value)
+    return result
@@ -0,0 +1,537 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+
+def _normalize(obj: Any) -> Any:
+    """Convert an object to a json-compatible structure with stable order.
+
+    Args:
+        obj: The object to normalize.
+
+    Returns:
+        Any: The normalized object.
+    """
+    if isinstance(obj, BaseModel):
+        return _normalize(obj.model_dump(mode="json", exclude_none=True))
+    elif isinstance(obj, dict):
+        return {str(k): _normalize(v) for k, v in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return [_normalize(item) for item in obj]
+    elif isinstance(obj, (set, frozenset)):
+        return sorted(_normalize(item) for item in obj)
+    elif isinstance(obj, type):
+        return f"{obj.__module__}.{obj.__qualname__}"
+    elif obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    return str(obj)
+
+
+def canonical_hash(*parts: Any) -> str:
+    """Compute a canonical hash of the given objects, two objects with the
+    same content always have the same hash regardless of key order.
+
+    Args:
+        *parts: Objects to hash, pydantic models are dumped in json mode.
+
+    Returns:
+        str: The sha256 hex digest.
+    """
+    payload = json.dumps(
+        _normalize(list(parts)),
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheStats:
+    """Counters of a cache, all of them are monotonic."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class BaseCache(ABC):
+    """Base class of the pluggable cache backends, values are stored as
+    pickled bytes so that callers never share mutable objects with the
+    cache."""
+
+    def __init__(self) -> None:
+        self.stats = CacheStats()
+
+    @abstractmethod
+    async def get_bytes(self, key: str) -> Optional[bytes]:
+        """Get the raw value of a key, None if missing or expired."""
+
+    @abstractmethod
+    async def set_bytes(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """Set the raw value of a key with an optional ttl in seconds."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Delete a key."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Remove all the keys of this cache."""
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        """Get the value of a key.
+
+        Args:
+            key: The cache key.
+            default: The value returned on cache miss.
+
+        Returns:
+            Any: The cached value, or default if missing.
+        """
+        value = await self.get_bytes(key)
+        if value is None:
+            self.stats.misses += 1
+            return default
+        self.stats.hits += 1
+        return pickle.loads(value)
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """Set the value of a key.
+
+        Args:
+            key: The cache key.
+            value: A picklable value.
+            ttl: Time to live in seconds, never expires if None.
+        """
+        await self.set_bytes(
+            key,
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            ttl,
+        )
+        self.stats.sets += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.stats.to_dict()
+
+
+class LRUCache(BaseCache):
+    """In-process LRU cache bounded by the total size of stored values."""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entries: Optional[int] = None,
+    ) -> None:
+        """Initialize the LRU cache.
+
+        Args:
+            max_bytes: Maximum total size of the pickled values.
+            max_entries: Optional maximum number of entries.
+        """
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.current_bytes = 0
+        self._data: "OrderedDict[str, Tuple[Optional[float], bytes]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    async def get_bytes(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expire_at, value = item
+            if expire_at is not None and expire_at <= time.monotonic():
+                self._remove(key)
+                self.stats.expirations += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    async def set_bytes(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[float] = None,
+    ) -> None:
+        if len(value) > self.max_bytes:
+            return
+        expire_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (expire_at, value)
+            self.current_bytes += len(value)
+            while self.current_bytes > self.max_bytes or (
+                self.max_entries is not None
+                and len(self._data) > self.max_entries
+            ):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.stats.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: str) -> None:
+        _, value = self._data.pop(key)
+        self.current_bytes -= len(value)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats.update(entries=len(self._data), bytes=self.current_bytes)
+        return stats
+
+
+class SQLiteCache(BaseCache):
+    """On-disk cache backed by a local sqlite database file."""
+
+    def __init__(
+        self,
+        path: str = os.path.join(".cache", "agentscope_bricks.sqlite"),
+        table: str = "cache",
+        max_entries: Optional[int] = None,
+    ) -> None:
+        """Initialize the sqlite cache.
+
+        Args:
+            path: Path of the database file.
+            table: Table name, allows several caches to share one file.
+            max_entries: Optional maximum number of entries, the least
+                recently used entries are evicted first.
+        """
+        super().__init__()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.table = table
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value BLOB, "
+                "expire_at REAL, accessed_at REAL)",
+            )
+
+    def _get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT value, expire_at FROM {self.table} WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            value, expire_at = row
+            if expire_at is not None and expire_at <= now:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key = ?",
+                    (key,),
+                )
+                self.stats.expirations += 1
+                return None
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?",
+                (now, key),
+            )
+            return value
+
+    def _set(self, key: str, value: bytes, ttl: Optional[float]) -> None:
+        now = time.time()
+        expire_at = now + ttl if ttl is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} "
+                "(key, value, expire_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expire_at, now),
+            )
+            if self.max_entries is None:
+                return
+            (count,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM {self.table}",
+            ).fetchone()
+            if count > self.max_entries:
+                evicted = self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN ("
+                    f"SELECT key FROM {self.table} "
+                    "ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+                self.stats.evictions += evicted
+
+    def _delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key = ?",
+                (key,),
+            )
+
+    def _clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    async def get_bytes(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set_bytes(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[float] = None,
+    ) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._clear)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class RedisCache(BaseCache):
+    """Cache shared between processes through redis, expiration and
+    eviction are delegated to the redis server."""
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        key_prefix: str = "agentscope_bricks:cache:",
+        client: Any = None,
+    ) -> None:
+        """Initialize the redis cache.
+
+        Args:
+            url: Redis connection url, ignored if client is given.
+            key_prefix: Prefix for all the cache keys.
+            client: Optional pre-configured `redis.asyncio.Redis` client.
+        """
+        super().__init__()
+        if client is None:
+            try:
+                import redis.asyncio as aioredis
+            except ImportError:
+                raise ImportError(
+                    "Please install redis to use this feature. "
+                    "You can install it with `pip install redis`",
+                )
+            client = aioredis.Redis.from_url(url)
+        self.client = client
+        self.key_prefix = key_prefix
+
+    async def get_bytes(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.key_prefix + key)
+
+    async def set_bytes(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[float] = None,
+    ) -> None:
+        await self.client.set(
+            self.key_prefix + key,
+            value,
+            px=int(ttl * 1000) if ttl is not None else None,
+        )
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.key_prefix + key)
+
+    async def clear(self) -> None:
+        async for key in self.client.scan_iter(match=self.key_prefix + "*"):
+            await self.client.delete(key)
+
+
+class ResultCache:
+    """Opt-in result cache of a Component, the key is the canonical hash of
+    the validated input model plus the selected kwargs.
+
+    Only enable it for idempotent components, e.g. search and retrieval.
+    Usage::
+
+        search = ModelstudioSearch(result_cache=ResultCache(ttl=60))
+    """
+
+    def __init__(
+        self,
+        backend: Optional[BaseCache] = None,
+        ttl: Optional[float] = 60,
+        key_kwargs: Sequence[str] = (),
+        cache_if: Optional[Callable[[Any], bool]] = None,
+    ) -> None:
+        """Initialize the result cache.
+
+        Args:
+            backend: The cache backend, defaults to an in-process LRUCache.
+            ttl: Time to live of the cached results in seconds.
+            key_kwargs: Names of the kwargs which affect the result and
+                should be part of the cache key, e.g. `user_id`.
+            cache_if: Optional predicate on the result, results failing it
+                are not cached. The degraded outputs of a component, see
+                `Component.is_degraded`, are never cached.
+        """
+        self.backend = backend if backend is not None else LRUCache()
+        self.ttl = ttl
+        self.key_kwargs = tuple(key_kwargs)
+        self.cache_if = cache_if
+        self.stats = CacheStats()
+
+    def make_key(
+        self,
+        namespace: str,
+        args: BaseModel,
+        kwargs: Dict[str, Any],
+    ) -> str:
+        """Build the cache key of a call.
+
+        Args:
+            namespace: Namespace of the key, usually the component name.
+            args: The validated input model.
+            kwargs: The call kwargs, only `key_kwargs` are used.
+
+        Returns:
+            str: The cache key.
+        """
+        selected = {k: kwargs[k] for k in self.key_kwargs if k in kwargs}
+        return f"{namespace}:{canonical_hash(args, selected)}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self.backend.get(key)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        if self.cache_if is not None and not self.cache_if(value):
+            return
+        await self.backend.set(key, value, ttl=self.ttl)
+        self.stats.sets += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the hit/miss counters of this cache, and the eviction
+        counters of its backend.
+
+        Returns:
+            Dict[str, Any]: The cache metrics.
+        """
+        stats = self.stats.to_dict()
+        backend_stats = self.backend.get_stats()
+        stats["evictions"] = backend_stats["evictions"]
+        stats["expirations"] = backend_stats["expirations"]
+        return stats
+
+
+class LLMResponseCache(ResultCache):
+    """Opt-in exact-match response cache of BaseLLM, the key is the
+    canonical hash of the model, messages, parameters and response model
+    schema of a call.
+
+    Only enable it for deterministic calls, e.g. temperature 0 with a fixed
+    seed. The api key is not part of the key, so the cached responses are
+    shared by all the tenants of the cache. Usage::
+
+        llm = BaseLLM(response_cache=LLMResponseCache(SQLiteCache()))
+        await llm.arun(model, messages, use_cache=False)  # bypass
+    """
+
+    def __init__(
+        self,
+        backend: Optional[BaseCache] = None,
+        ttl: Optional[float] = 3600,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+    ) -> None:
+        """Initialize the response cache.
+
+        Args:
+            backend: The cache backend, defaults to an in-process LRUCache.
+            ttl: Time to live of the cached responses in seconds.
+            cache_if: Optional predicate on the response, or on the list of
+                chunks of a stream, responses failing it are not cached.
+        """
+        super().__init__(backend=backend, ttl=ttl, cache_if=cache_if)
+
+    def make_request_key(
+        self,
+        model: str,
+        messages: Sequence[Dict[str, Any]],
+        parameters: Dict[str, Any],
+        response_model: Optional[type] = None,
+        stream: bool = False,
+    ) -> str:
+        """Build the cache key of a LLM call.
+
+        Args:
+            model: The model name.
+            messages: The prompt messages in dict format.
+            parameters: The parameters of the call in dict format.
+            response_model: Optional structured output model type.
+            stream: Whether the call is streamed, streamed and non-streamed
+                responses are cached separately.
+
+        Returns:
+            str: The cache key.
+        """
+        schema = (
+            response_model.model_json_schema()
+            if response_model is not None
+            else None
+        )
+        digest = canonical_hash(messages, parameters, schema, stream)
+        return f"llm:{model}:{digest}"
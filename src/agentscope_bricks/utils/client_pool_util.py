@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+import instructor
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from pydantic import BaseModel, Field
+
+from agentscope_bricks.constants import BASE_URL
+
+
+class ClientPoolConfig(BaseModel):
+    """Settings of the pooled LLM clients."""
+
+    max_size: int = Field(
+        default=64,
+        description="Maximum number of clients kept, the least recently "
+        "used one is closed beyond it",
+    )
+    max_connections: Optional[int] = Field(
+        default=100,
+        description="Maximum number of connections per client, unlimited "
+        "if None",
+    )
+    max_keepalive_connections: Optional[int] = Field(
+        default=20,
+        description="Maximum number of idle connections kept alive per "
+        "client, unlimited if None",
+    )
+    keepalive_expiry: Optional[float] = Field(
+        default=30.0,
+        description="Seconds an idle connection is kept alive",
+    )
+    timeout: Optional[float] = Field(
+        default=None,
+        description="Request timeout in seconds, the openai default if None",
+    )
+    max_retries: Optional[int] = Field(
+        default=None,
+        description="Maximum number of retries, the openai default if None",
+    )
+
+
+class _PooledClient:
+    """A pooled client and the number of calls using it."""
+
+    __slots__ = ("loop", "raw_client", "client", "leases", "evicted")
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        raw_client: AsyncOpenAI,
+        client: Any,
+    ) -> None:
+        self.loop = loop
+        self.raw_client = raw_client
+        self.client = client
+        self.leases = 0
+        self.evicted = False
+
+
+class LLMClientPool:
+    """Bounded pool of LLM clients keyed by credentials.
+
+    Each client keeps its HTTP connection pool alive across calls, so the
+    calls with the same api key and base url reuse the open connections
+    instead of paying a new TCP and TLS handshake. The least recently used
+    client is closed when the pool is full, a client in use is closed once
+    its last call ends.
+
+    The connections of a client are bound to an event loop, so clients are
+    not shared across event loops, and pooling only helps long-lived loops,
+    e.g. of a server or the thread loops of `Component.run`. Each
+    `asyncio.run` call has a new loop, and so a new client. The clients of
+    the loops closed meanwhile are dropped from the pool at the next miss,
+    their connections cannot be closed anymore and are left to the garbage
+    collector.
+
+    Examples:
+        .. code-block:: python
+
+            pool = LLMClientPool(ClientPoolConfig(max_size=128))
+            async with pool.lease(api_key) as client:
+                await client.chat.completions.create(...)
+    """
+
+    def __init__(self, config: Optional[ClientPoolConfig] = None) -> None:
+        """Initialize the pool.
+
+        Args:
+            config: The pool settings, the defaults if None.
+        """
+        self.config = config or ClientPoolConfig()
+        self._clients: "OrderedDict[Tuple, _PooledClient]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.abandoned = 0
+
+    def _create(
+        self,
+        api_key: str,
+        base_url: str,
+        mode: Optional[instructor.Mode],
+    ) -> Tuple[AsyncOpenAI, Any]:
+        """Create a client, returns the openai client and the client to use,
+        wrapped by instructor if a mode is given."""
+        config = self.config
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+        )
+        options: Dict[str, Any] = {"http_client": http_client}
+        if config.timeout is not None:
+            options["timeout"] = config.timeout
+        if config.max_retries is not None:
+            options["max_retries"] = config.max_retries
+        raw_client = AsyncOpenAI(api_key=api_key, base_url=base_url, **options)
+        if mode is None:
+            return raw_client, raw_client
+        return raw_client, instructor.from_openai(raw_client, mode=mode)
+
+    @asynccontextmanager
+    async def lease(
+        self,
+        api_key: str,
+        base_url: str = BASE_URL,
+        mode: Optional[instructor.Mode] = None,
+    ) -> AsyncIterator[Any]:
+        """Use the pooled client of the credentials during the context, it
+        is created at the first call.
+
+        Args:
+            api_key: API key of the OpenAI compatible service.
+            base_url: Base URL of the OpenAI compatible service.
+            mode: Instructor mode to wrap the client with for structured
+                output, the plain AsyncOpenAI client if None.
+
+        Yields:
+            Any: The AsyncOpenAI client, or the instructor client if a mode
+                is given.
+        """
+        loop = asyncio.get_running_loop()
+        key = (loop, api_key, base_url, mode)
+        evicted: List[_PooledClient] = []
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._clients.move_to_end(key)
+            else:
+                self.misses += 1
+                self._drop_closed_loops()
+                entry = _PooledClient(loop, *self._create(*key[1:]))
+                self._clients[key] = entry
+                while len(self._clients) > self.config.max_size:
+                    _, old = self._clients.popitem(last=False)
+                    old.evicted = True
+                    self.evictions += 1
+                    if old.leases == 0:
+                        evicted.append(old)
+            entry.leases += 1
+        for old in evicted:
+            await self._close(old)
+
+        try:
+            yield entry.client
+        finally:
+            with self._lock:
+                entry.leases -= 1
+                close = entry.evicted and entry.leases == 0
+            if close:
+                await self._close(entry)
+
+    def _drop_closed_loops(self) -> None:
+        """Drop the clients of the closed event loops, called with the lock
+        held."""
+        for key, entry in list(self._clients.items()):
+            if entry.loop.is_closed():
+                del self._clients[key]
+                entry.evicted = True
+                self.abandoned += 1
+
+    @staticmethod
+    async def _close(entry: _PooledClient) -> None:
+        """Close a client on the event loop it is bound to."""
+        if entry.loop.is_closed():
+            return
+        if entry.loop is asyncio.get_running_loop():
+            await entry.raw_client.close()
+        else:
+            asyncio.run_coroutine_threadsafe(
+                entry.raw_client.close(),
+                entry.loop,
+            )
+
+    async def aclose(self) -> None:
+        """Close all the clients of the current event loop which are not in
+        use, and drop the clients of closed event loops."""
+        loop = asyncio.get_running_loop()
+        closing = []
+        with self._lock:
+            self._drop_closed_loops()
+            for key, entry in list(self._clients.items()):
+                if entry.loop is loop and entry.leases == 0:
+                    del self._clients[key]
+                    closing.append(entry)
+        for entry in closing:
+            await self._close(entry)
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the metrics of the pool.
+
+        Returns:
+            Dict[str, Any]: Size, hits, misses and evictions of the pool,
+                and the clients abandoned with their closed event loop.
+        """
+        return {
+            "size": len(self._clients),
+            "max_size": self.config.max_size,
+            "in_use": sum(e.leases > 0 for e in self._clients.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "abandoned": self.abandoned,
+        }
+
+
+_client_pool: Optional[LLMClientPool] = None
+_client_pool_lock = threading.Lock()
+
+
+def get_client_pool() -> LLMClientPool:
+    """Get the process wide LLM client pool, created at the first call with
+    the default settings.
+
+    Returns:
+        LLMClientPool: The shared pool.
+    """
+    global _client_pool
+    if _client_pool is None:
+        with _client_pool_lock:
+            if _client_pool is None:
+                _client_pool = LLMClientPool()
+    return _client_pool
+
+
+def set_client_pool(config: ClientPoolConfig) -> LLMClientPool:
+    """Replace the process wide LLM client pool, the clients of the former
+    pool are closed by the garbage collector.
+
+    Args:
+        config: The new pool settings.
+
+    Returns:
+        LLMClientPool: The new pool.
+    """
+    global _client_pool
+    with _client_pool_lock:
+        _client_pool = LLMClientPool(config)
+    return _client_pool
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Iterator,
+    Optional,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+# absolute deadline of the current request on the `time.monotonic()` clock
+_request_deadline: ContextVar[Optional[float]] = ContextVar(
+    "agentscope_bricks_request_deadline",
+    default=None,
+)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when the request scoped deadline expires."""
+
+
+def get_deadline() -> Optional[float]:
+    """Get the absolute deadline of the current request.
+
+    Returns:
+        Optional[float]: The deadline on the `time.monotonic()` clock, None if
+            the request has no deadline.
+    """
+    return _request_deadline.get()
+
+
+def get_remaining_time() -> Optional[float]:
+    """Get the seconds left before the deadline of the current request.
+
+    Returns:
+        Optional[float]: Remaining seconds, never negative, None if the
+            request has no deadline.
+    """
+    request_deadline = _request_deadline.get()
+    if request_deadline is None:
+        return None
+    return max(0.0, request_deadline - time.monotonic())
+
+
+def bound_timeout(timeout: Optional[float]) -> Optional[float]:
+    """Bound a local timeout by the deadline of the current request.
+
+    Args:
+        timeout: The local timeout in seconds, None for no local timeout.
+
+    Returns:
+        Optional[float]: The smaller one of the local timeout and the
+            remaining time, None if both of them are None.
+    """
+    remaining = get_remaining_time()
+    if remaining is None:
+        return timeout
+    if timeout is None:
+        return remaining
+    return min(timeout, remaining)
+
+
+def deadline_after(timeout: Optional[float]) -> Optional[float]:
+    """Compute the absolute deadline of a timeout starting now, bounded by
+    the deadline of the current request.
+
+    Args:
+        timeout: Seconds from now, None for no local timeout.
+
+    Returns:
+        Optional[float]: The absolute deadline, None if there is neither a
+            local timeout nor a request deadline.
+    """
+    timeout = bound_timeout(timeout)
+    if timeout is None:
+        return None
+    return time.monotonic() + timeout
+
+
+def check_deadline() -> None:
+    """Raise if the deadline of the current request has expired.
+
+    Raises:
+        DeadlineExceeded: If the deadline has expired.
+    """
+    if get_remaining_time() == 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+@contextmanager
+def deadline(
+    timeout: Optional[float] = None,
+    at: Optional[float] = None,
+) -> Iterator[Optional[float]]:
+    """Set the deadline of the current request within the context.
+
+    A nested deadline never extends the outer one, the earlier one wins.
+
+    Args:
+        timeout: Seconds from now before the deadline.
+        at: Absolute deadline on the `time.monotonic()` clock, used if
+            timeout is not given.
+
+    Yields:
+        Optional[float]: The effective absolute deadline.
+
+    Examples:
+        .. code-block:: python
+
+            with deadline(timeout=30):
+                result = await component.arun(args)
+    """
+    new_deadline = time.monotonic() + timeout if timeout is not None else at
+    current = _request_deadline.get()
+    if new_deadline is None or (
+        current is not None and current <= new_deadline
+    ):
+        new_deadline = current
+    token = _request_deadline.set(new_deadline)
+    try:
+        yield new_deadline
+    finally:
+        _request_deadline.reset(token)
+
+
+async def wait_with_deadline(
+    awaitable: Awaitable[T],
+    timeout: Optional[float] = None,
+) -> T:
+    """Await an awaitable, cancelling it when the deadline of the current
+    request or the local timeout expires.
+
+    Args:
+        awaitable: The awaitable to wait for.
+        timeout: Optional local timeout in seconds.
+
+    Returns:
+        T: The result of the awaitable.
+
+    Raises:
+        DeadlineExceeded: If the awaitable does not finish in time.
+    """
+    timeout = bound_timeout(timeout)
+    if timeout is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError as e:
+        if isinstance(e, DeadlineExceeded):
+            raise
+        raise DeadlineExceeded(
+            f"Request deadline exceeded after {timeout:.3f}s",
+        ) from e
+
+
+async def aiter_with_deadline(
+    iterator: AsyncIterator[T],
+    at: Optional[float],
+) -> AsyncIterator[T]:
+    """Iterate an async iterator until an absolute deadline, the iterator is
+    closed when the deadline expires.
+
+    Args:
+        iterator: The async iterator, e.g. a LLM response stream.
+        at: Absolute deadline on the `time.monotonic()` clock, None to
+            iterate without deadline.
+
+    Yields:
+        T: The items of the iterator.
+
+    Raises:
+        DeadlineExceeded: If the deadline expires before the iterator ends.
+    """
+    if at is None:
+        async for item in iterator:
+            yield item
+        return
+
+    try:
+        while True:
+            remaining = at - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded("Request deadline exceeded")
+            try:
+                item = await asyncio.wait_for(
+                    iterator.__anext__(),
+                    remaining,
+                )
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError as e:
+                raise DeadlineExceeded("Request deadline exceeded") from e
+            yield item
+    finally:
+        aclose: Any = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import fcntl
+except ImportError:  # Windows, the appends are only locked in the process
+    fcntl = None
+
+from agentscope_bricks.utils.cache_util import CacheStats
+
+# bytes of the content hash of a cached text
+DIGEST_SIZE = 16
+
+
+def content_digest(text: str) -> bytes:
+    """The content hash of a text in the embedding cache."""
+    return hashlib.blake2b(
+        text.encode("utf-8"),
+        digest_size=DIGEST_SIZE,
+    ).digest()
+
+
+class _VectorStore:
+    """The vectors of a model and dimension, in two append-only files.
+
+    `vectors.f32` holds the float32 rows and `keys.bin` the content hash of
+    each row, in the same order. A row is appended to the vectors before
+    its key, so a key always refers to a complete row, and a torn write of
+    a crash is dropped at the next append. The vectors are memory mapped,
+    and the index is a sorted array of the first 8 bytes of the hashes
+    with their rows, 16 bytes per vector in RAM, plus a dict of the rows
+    appended since the last sort.
+    """
+
+    # rows of the dict merged into the sorted arrays at once
+    MERGE_THRESHOLD = 65536
+
+    def __init__(self, path: str, np: Any, fsync: bool) -> None:
+        os.makedirs(path, exist_ok=True)
+        self.np = np
+        self.fsync = fsync
+        self.meta_path = os.path.join(path, "meta.json")
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.keys_path = os.path.join(path, "keys.bin")
+        self.lock_path = os.path.join(path, "lock")
+        self.dimension: Optional[int] = None
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, encoding="utf-8") as f:
+                self.dimension = json.load(f)["dimension"]
+        self._lock = threading.RLock()
+        self._size = 0
+        self._prefixes = np.empty(0, dtype="<u8")
+        self._rows = np.empty(0, dtype="<i8")
+        self._recent: Dict[bytes, int] = {}
+        self._keys: Any = None
+        self._vectors: Any = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _refresh(self) -> None:
+        """Index the keys appended since the last refresh, including the
+        ones of the other processes."""
+        np = self.np
+        try:
+            size = os.path.getsize(self.keys_path) // DIGEST_SIZE
+        except FileNotFoundError:
+            return
+        if size <= self._size:
+            return
+        if self.dimension is None:
+            with open(self.meta_path, encoding="utf-8") as f:
+                self.dimension = json.load(f)["dimension"]
+        self._keys = np.memmap(
+            self.keys_path,
+            dtype="u1",
+            mode="r",
+            shape=(size, DIGEST_SIZE),
+        )
+        self._vectors = np.memmap(
+            self.vectors_path,
+            dtype="<f4",
+            mode="r",
+            shape=(size, self.dimension),
+        )
+        start, self._size = self._size, size
+        if len(self._recent) + size - start < self.MERGE_THRESHOLD:
+            for row in range(start, size):
+                self._recent.setdefault(bytes(self._keys[row]), row)
+            return
+        # merge the new rows into the sorted arrays
+        rows = np.concatenate(
+            [
+                np.fromiter(
+                    self._recent.values(),
+                    dtype="<i8",
+                    count=len(self._recent),
+                ),
+                np.arange(start, size, dtype="<i8"),
+            ],
+        )
+        prefixes = self._keys[rows, :8].copy().view("<u8").ravel()
+        prefixes = np.concatenate([self._prefixes, prefixes])
+        rows = np.concatenate([self._rows, rows])
+        order = np.argsort(prefixes, kind="stable")
+        self._prefixes = prefixes[order]
+        self._rows = rows[order]
+        self._recent = {}
+
+    def find(self, digest: bytes) -> Optional[int]:
+        """Get the row of a content hash, None if not cached."""
+        row = self._recent.get(digest)
+        if row is not None:
+            return row
+        # a numpy scalar, searching a python int converts the whole array
+        prefix = self.np.frombuffer(digest, dtype="<u8", count=1)[0]
+        index = int(self.np.searchsorted(self._prefixes, prefix))
+        while index < len(self._prefixes) and self._prefixes[index] == prefix:
+            row = int(self._rows[index])
+            if bytes(self._keys[row]) == digest:
+                return row
+            index += 1
+        return None
+
+    def lookup(self, digests: Sequence[bytes]) -> List[Optional[Any]]:
+        with self._lock:
+            self._refresh()
+            rows = [self.find(digest) for digest in digests]
+            found = [row for row in rows if row is not None]
+            if not found:
+                return [None] * len(rows)
+            # copy the rows out of the mapping, only their pages are read
+            vectors = iter(self._vectors[found])
+        return [next(vectors) if row is not None else None for row in rows]
+
+    def append(self, digests: Sequence[bytes], vectors: Any) -> int:
+        """Append the vectors of content hashes not cached yet, returns the
+        number of appended vectors."""
+        np = self.np
+        vectors = np.ascontiguousarray(vectors, dtype="<f4")
+        with self._lock, open(self.lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            if self.dimension is None:
+                if os.path.exists(self.meta_path):
+                    # created by another process
+                    with open(self.meta_path, encoding="utf-8") as f:
+                        self.dimension = json.load(f)["dimension"]
+                else:
+                    self._create(vectors.shape[1])
+            if vectors.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Vectors of dimension {vectors.shape[1]} cannot be "
+                    f"cached with vectors of dimension {self.dimension}",
+                )
+            self._refresh()
+            new: Dict[bytes, int] = {}
+            for i, digest in enumerate(digests):
+                if digest not in new and self.find(digest) is None:
+                    new[digest] = i
+            if not new:
+                return 0
+            row_size = self.dimension * 4
+            with open(self.vectors_path, "r+b") as f:
+                # drop the rows of a torn write
+                f.truncate(self._size * row_size)
+                f.seek(0, os.SEEK_END)
+                f.write(vectors[list(new.values())].tobytes())
+                self._sync(f)
+            with open(self.keys_path, "r+b") as f:
+                f.truncate(self._size * DIGEST_SIZE)
+                f.seek(0, os.SEEK_END)
+                f.write(b"".join(new))
+                self._sync(f)
+            self._refresh()
+        return len(new)
+
+    def _create(self, dimension: int) -> None:
+        """Create the files of an empty store, the meta file is written
+        last and atomically."""
+        for path in (self.vectors_path, self.keys_path):
+            open(path, "ab").close()
+        tmp_path = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dimension": dimension}, f)
+            self._sync(f)
+        os.replace(tmp_path, self.meta_path)
+        self.dimension = dimension
+
+    def _sync(self, f: Any) -> None:
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+
+class EmbeddingCache:
+    """Persistent cache of the embedding vectors, keyed by the model, the
+    dimension and the content hash of the text.
+
+    The vectors of a model and dimension are stored in a directory of
+    append-only files under `path`, the vectors file is memory mapped and
+    never loaded into RAM, and the hash index takes 16 bytes per vector,
+    so a lookup among a million vectors reads a few pages. Several
+    processes can share a cache directory, the appends are serialized by a
+    file lock and survive a crash at any point, a partial write being
+    dropped. Usage::
+
+        embedding = TextEmbedding(
+            embedding_cache=EmbeddingCache(".cache/embeddings"),
+        )
+        # only the texts not cached yet are sent
+        response = await embedding.arun(documents, model="text-embedding-v4")
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join(".cache", "embeddings"),
+        fsync: bool = True,
+    ) -> None:
+        """Initialize the embedding cache.
+
+        Args:
+            path: The directory of the cache.
+            fsync: Whether to fsync the files after each append, the last
+                appends may be lost at a power failure otherwise, the cache
+                staying consistent.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError(
+                "Please install numpy to use this feature. "
+                "You can install it with `pip install numpy`",
+            )
+        self._np = np
+        self.path = path
+        self.fsync = fsync
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._stores: Dict[str, _VectorStore] = {}
+
+    def _store(self, model: str, dimensions: Optional[int]) -> _VectorStore:
+        name = re.sub(r"[^\w.-]", "_", model) + f"-{dimensions or 'default'}"
+        store = self._stores.get(name)
+        if store is None:
+            with self._lock:
+                store = self._stores.get(name)
+                if store is None:
+                    store = _VectorStore(
+                        os.path.join(self.path, name),
+                        self._np,
+                        self.fsync,
+                    )
+                    self._stores[name] = store
+        return store
+
+    def lookup(
+        self,
+        model: str,
+        texts: Sequence[str],
+        dimensions: Optional[int] = None,
+    ) -> List[Optional[Any]]:
+        """Get the cached vectors of texts.
+
+        Args:
+            model: The embedding model name.
+            texts: The embedded texts.
+            dimensions: The requested dimension, None for the default one
+                of the model.
+
+        Returns:
+            List[Optional[Any]]: The float32 numpy vector of each text, or
+                None if not cached.
+        """
+        vectors = self._store(model, dimensions).lookup(
+            [content_digest(text) for text in texts],
+        )
+        hits = sum(vector is not None for vector in vectors)
+        with self._lock:
+            self.stats.hits += hits
+            self.stats.misses += len(vectors) - hits
+        return vectors
+
+    def add(
+        self,
+        model: str,
+        texts: Sequence[str],
+        vectors: Any,
+        dimensions: Optional[int] = None,
+    ) -> None:
+        """Cache the vectors of texts, the texts cached already are skipped.
+
+        Args:
+            model: The embedding model name.
+            texts: The embedded texts.
+            vectors: Their vectors, as a sequence of float sequences or a
+                2D numpy array.
+            dimensions: The requested dimension, None for the default one
+                of the model.
+
+        Raises:
+            ValueError: If the vectors do not have the dimension of the
+                vectors cached for the model and dimension.
+        """
+        if not len(texts):
+            return
+        added = self._store(model, dimensions).append(
+            [content_digest(text) for text in texts],
+            vectors,
+        )
+        with self._lock:
+            self.stats.sets += added
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the statistics of the cache.
+
+        Returns:
+            Dict[str, Any]: The hit/miss counters, and the number of vectors
+                of each model and dimension seen by this process.
+        """
+        return {
+            **self.stats.to_dict(),
+            "vectors": {name: len(s) for name, s in self._stores.items()},
+        }
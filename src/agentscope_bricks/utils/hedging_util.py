@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+class LatencyHistogram:
+    """Rolling window of the latest observed latencies.
+
+    The latency of an attempt cancelled before completion is only known to
+    be at least its elapsed time, it is recorded as such a censored sample,
+    otherwise the slowest attempts, the ones losing the hedging race, would
+    never be observed and the quantiles would drift down.
+    """
+
+    def __init__(self, window_size: int = 512) -> None:
+        """Initialize the histogram.
+
+        Args:
+            window_size: Number of the latest latencies kept.
+        """
+        self._latencies: Deque[float] = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+        self.censored = 0
+
+    def __len__(self) -> int:
+        return len(self._latencies)
+
+    def record(self, latency: float, censored: bool = False) -> None:
+        """Record a latency in seconds.
+
+        Args:
+            latency: The latency, or the elapsed time of a cancelled
+                attempt.
+            censored: Whether the attempt was cancelled, the latency being
+                a lower bound. Censored samples are ranked at their elapsed
+                time, which keeps the quantiles conservative.
+        """
+        with self._lock:
+            self._latencies.append(latency)
+            if censored:
+                self.censored += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Get a quantile of the latencies in the window.
+
+        Args:
+            q: The quantile between 0 and 1, e.g. 0.95 for p95.
+
+        Returns:
+            Optional[float]: The latency in seconds, None if no latency has
+                been recorded yet.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        index = math.ceil(q * len(latencies)) - 1
+        index = min(len(latencies) - 1, max(0, index))
+        return latencies[index]
+
+
+class HedgePolicy:
+    """Hedged requests with adaptive delays and timeouts for read-only
+    components.
+
+    A second attempt is issued when the first one is slower than the
+    observed `hedge_quantile` latency, the first successful attempt wins
+    and the other one is cancelled. Failed attempts and degraded results
+    rejected by `accept` do not win the race and are not recorded, the
+    cancelled attempts are recorded as censored samples. Latencies are
+    tracked per key, e.g. per search strategy, in rolling histograms.
+
+    The hedges are capped by a token bucket per key, each call earning
+    `hedge_budget` tokens up to `max_hedge_tokens` and each hedge costing
+    one, so that a slow upstream does not receive up to twice the load.
+    Only use it for idempotent, read-only calls, since the upstream may
+    receive the same call twice.
+    """
+
+    def __init__(
+        self,
+        hedge_quantile: float = 0.95,
+        min_hedge_delay: float = 0.05,
+        timeout_quantile: float = 0.99,
+        timeout_multiplier: float = 3.0,
+        min_timeout: float = 1.0,
+        min_samples: int = 20,
+        window_size: int = 512,
+        hedge_budget: float = 0.1,
+        max_hedge_tokens: float = 10.0,
+    ) -> None:
+        """Initialize the hedge policy.
+
+        Args:
+            hedge_quantile: Latency quantile after which the second attempt
+                is issued, e.g. 0.9 or 0.95.
+            min_hedge_delay: Lower bound of the hedge delay in seconds.
+            timeout_quantile: Latency quantile the adaptive timeout is based
+                on.
+            timeout_multiplier: Multiplier applied to the timeout quantile.
+            min_timeout: Lower bound of the adaptive timeout in seconds.
+            min_samples: Number of samples needed before hedging and adaptive
+                timeouts are enabled for a key.
+            window_size: Number of the latest latencies kept per key.
+            hedge_budget: Hedges allowed per call in the long run, e.g. 0.05
+                to 0.1.
+            max_hedge_tokens: Capacity of the hedge token bucket, i.e. the
+                burst of hedges allowed, the bucket starts full.
+        """
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.timeout_quantile = timeout_quantile
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self.window_size = window_size
+        self.hedge_budget = hedge_budget
+        self.max_hedge_tokens = max_hedge_tokens
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._tokens: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, key: str) -> LatencyHistogram:
+        """Get the latency histogram of a key, created if absent."""
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(
+                    key,
+                    LatencyHistogram(self.window_size),
+                )
+                self._counters.setdefault(
+                    key,
+                    {
+                        "calls": 0,
+                        "hedged": 0,
+                        "hedge_wins": 0,
+                        "hedges_over_budget": 0,
+                        "degraded": 0,
+                    },
+                )
+                self._tokens.setdefault(key, self.max_hedge_tokens)
+        return histogram
+
+    def get_hedge_delay(self, key: str) -> Optional[float]:
+        """Get the delay before issuing the second attempt.
+
+        Args:
+            key: The latency key.
+
+        Returns:
+            Optional[float]: Delay in seconds, None if there are not enough
+                samples to hedge yet.
+        """
+        histogram = self.histogram(key)
+        if len(histogram) < self.min_samples:
+            return None
+        return max(
+            self.min_hedge_delay,
+            histogram.quantile(self.hedge_quantile),
+        )
+
+    def get_timeout(self, key: str, default: float) -> float:
+        """Get the adaptive timeout of a key.
+
+        Args:
+            key: The latency key.
+            default: The configured timeout, used before there are enough
+                samples and as the upper bound of the adaptive timeout.
+
+        Returns:
+            float: Timeout in seconds.
+        """
+        histogram = self.histogram(key)
+        if len(histogram) < self.min_samples:
+            return default
+        adaptive = (
+            histogram.quantile(self.timeout_quantile) * self.timeout_multiplier
+        )
+        return min(default, max(self.min_timeout, adaptive))
+
+    def _take_hedge_token(self, key: str) -> bool:
+        """Spend a token of the hedge budget of a key, False if exhausted."""
+        with self._lock:
+            if self._tokens[key] < 1:
+                return False
+            self._tokens[key] -= 1
+            return True
+
+    async def run(
+        self,
+        func: Callable[[], Awaitable[T]],
+        key: str = "default",
+        accept: Optional[Callable[[T], bool]] = None,
+    ) -> T:
+        """Run a call with hedging.
+
+        Args:
+            func: Factory of the call, invoked once per attempt.
+            key: The latency key, e.g. the component name plus the strategy.
+            accept: Optional predicate on the results, a rejected result,
+                e.g. a degraded output returned on upstream error, does not
+                win the race and its latency is not recorded.
+
+        Returns:
+            T: The result of the first accepted attempt, or the last
+                rejected result if no attempt is accepted.
+
+        Raises:
+            Exception: The error of the last failed attempt if all attempts
+                fail.
+        """
+        histogram = self.histogram(key)
+        counters = self._counters[key]
+        counters["calls"] += 1
+        with self._lock:
+            self._tokens[key] = min(
+                self.max_hedge_tokens,
+                self._tokens[key] + self.hedge_budget,
+            )
+
+        async def attempt() -> T:
+            start = time.monotonic()
+            try:
+                result = await func()
+            except asyncio.CancelledError:
+                histogram.record(time.monotonic() - start, censored=True)
+                raise
+            if accept is None or accept(result):
+                histogram.record(time.monotonic() - start)
+            return result
+
+        first = asyncio.ensure_future(attempt())
+        delay = self.get_hedge_delay(key)
+        tasks = {first}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    if self._take_hedge_token(key):
+                        counters["hedged"] += 1
+                        tasks.add(asyncio.ensure_future(attempt()))
+                    else:
+                        counters["hedges_over_budget"] += 1
+
+            error: Optional[BaseException] = None
+            rejected: List[T] = []
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif accept is not None and not accept(task.result()):
+                        rejected.append(task.result())
+                    else:
+                        if task is not first:
+                            counters["hedge_wins"] += 1
+                        return task.result()
+            if rejected:
+                counters["degraded"] += 1
+                return rejected[-1]
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get the latency quantiles and hedging counters per key.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Stats keyed by the latency key.
+        """
+        return {
+            key: {
+                **self._counters[key],
+                "samples": len(histogram),
+                "censored": histogram.censored,
+                "p50": histogram.quantile(0.5),
+                "p90": histogram.quantile(0.9),
+                "p95": histogram.quantile(0.95),
+                "p99": histogram.quantile(0.99),
+            }
+            for key, histogram in list(self._histograms.items())
+        }
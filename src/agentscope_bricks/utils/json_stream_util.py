@@ -0,0 +1,635 @@
+# -*- coding: utf-8 -*-
+import json
+import re
+from types import UnionType
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+)
+
+from openai.types.chat import ChatCompletionChunk
+from pydantic import BaseModel
+
+from agentscope_bricks.utils.schemas.oai_llm import ToolCall
+from agentscope_runtime.engine.schemas.agent_schemas import FunctionCall
+
+_WHITESPACE = frozenset(" \t\n\r")
+_SCALAR_START = frozenset("-0123456789tfn")
+_STRING_RUN = re.compile(r'[^"\\]+')
+_SCALAR_RUN = re.compile(r"[0-9a-zA-Z+\-.]+")
+_MISSING = object()
+
+# parser states of the innermost container
+_KEY_OR_END = "key_or_end"
+_KEY = "key"
+_COLON = "colon"
+_VALUE_OR_END = "value_or_end"
+_VALUE = "value"
+_COMMA = "comma"
+
+
+class JSONStreamError(ValueError):
+    """Raised when the streamed text is not valid JSON."""
+
+
+class _Frame:
+    """An open JSON object or array."""
+
+    __slots__ = ("container", "key", "expect")
+
+    def __init__(self, container: Union[Dict, List], expect: str) -> None:
+        self.container = container
+        self.key: Optional[str] = None
+        self.expect = expect
+
+
+def _decode_escape(raw: str) -> str:
+    """Decode an escape sequence of a JSON string, or a surrogate pair."""
+    try:
+        return json.loads(f'"{raw}"')
+    except json.JSONDecodeError as e:
+        raise JSONStreamError(f"Invalid JSON escape: {raw!r}") from e
+
+
+def _is_high_surrogate(raw: str) -> bool:
+    return len(raw) == 6 and raw[2:4].lower() in ("d8", "d9", "da", "db")
+
+
+class IncrementalJSONParser:
+    """Resumable JSON parser consuming text deltas as they stream.
+
+    Every character is scanned once, so the total cost is linear in the
+    length of the document, instead of re-parsing the accumulated text on
+    every delta. The partially parsed value is available at any time, the
+    containers are built in place and the strings are decoded as they
+    stream, escape sequence by escape sequence.
+
+    Examples:
+        .. code-block:: python
+
+            parser = IncrementalJSONParser()
+            parser.feed('{"city": "Hang')
+            parser.partial  # {"city": "Hang"}
+            parser.feed('zhou", "days": [1, 2]}')
+            parser.complete  # True
+    """
+
+    def __init__(self) -> None:
+        self._stack: List[_Frame] = []
+        self._root: Any = _MISSING
+        # decoded content of the string being parsed, the escape sequence
+        # being parsed, a high surrogate waiting for its low surrogate, and
+        # the slot of the string in the parent
+        self._string: Optional[List[str]] = None
+        self._escape: Optional[str] = None
+        self._surrogate: Optional[str] = None
+        self._string_is_key = False
+        self._string_slot: Optional[tuple] = None
+        self._scalar: Optional[List[str]] = None
+        self.complete = False
+        self.consumed = 0
+        # incremented whenever the partial value changes
+        self.changes = 0
+
+    def feed(self, delta: str) -> bool:
+        """Consume the next delta of the JSON text.
+
+        Args:
+            delta: The new text, continuing the previous deltas.
+
+        Returns:
+            bool: Whether the top level value is complete.
+
+        Raises:
+            JSONStreamError: If the text is not valid JSON.
+        """
+        self.consumed += len(delta)
+        i, n = 0, len(delta)
+        while i < n:
+            if self._string is not None:
+                if self._escape is not None:
+                    self._escape += delta[i]
+                    i += 1
+                    if len(self._escape) == 6 or (
+                        len(self._escape) == 2 and self._escape[1] != "u"
+                    ):
+                        self._end_escape()
+                    continue
+                char = delta[i]
+                if char == "\\":
+                    self._escape = char
+                    i += 1
+                    continue
+                if self._surrogate is not None:
+                    self._append_string(_decode_escape(self._surrogate))
+                    self._surrogate = None
+                match = _STRING_RUN.match(delta, i)
+                if match:
+                    self._append_string(match.group())
+                    i = match.end()
+                    continue
+                i += 1
+                self._end_string()
+                continue
+
+            char = delta[i]
+            if self._scalar is not None:
+                match = _SCALAR_RUN.match(delta, i)
+                if match:
+                    self._scalar.append(match.group())
+                    i = match.end()
+                    continue
+                self._end_scalar()
+
+            i += 1
+            if char in _WHITESPACE:
+                continue
+            if self.complete:
+                raise JSONStreamError(f"Extra data after JSON value: {char}")
+            if char == "{":
+                self._open({}, _KEY_OR_END)
+            elif char == "[":
+                self._open([], _VALUE_OR_END)
+            elif char == "}" or char == "]":
+                self._close(char)
+            elif char == '"':
+                self._start_string()
+            elif char == ":":
+                frame = self._top(_COLON)
+                frame.expect = _VALUE
+            elif char == ",":
+                frame = self._top(_COMMA)
+                frame.expect = (
+                    _KEY if isinstance(frame.container, dict) else _VALUE
+                )
+            elif char in _SCALAR_START:
+                self._check_value_position()
+                self._scalar = [char]
+            else:
+                raise JSONStreamError(f"Unexpected character: {char!r}")
+        return self.complete
+
+    def close(self) -> Any:
+        """Signal the end of the stream.
+
+        Returns:
+            Any: The parsed value.
+
+        Raises:
+            JSONStreamError: If the JSON text is incomplete.
+        """
+        if self._scalar is not None:
+            self._end_scalar()
+        if not self.complete:
+            raise JSONStreamError("Incomplete JSON text")
+        return self._root
+
+    @property
+    def value(self) -> Any:
+        """The parsed value, only available once complete."""
+        if not self.complete:
+            raise JSONStreamError("Incomplete JSON text")
+        return self._root
+
+    @property
+    def partial(self) -> Any:
+        """The partially parsed value, None if nothing has been parsed yet.
+
+        Open containers are returned as they are built, copy them to keep a
+        snapshot. Numbers and literals are only added once they end, and the
+        string being streamed contains its content so far, without a
+        trailing incomplete escape sequence.
+        """
+        if self._root is _MISSING:
+            return None
+        if self._string is not None and not self._string_is_key:
+            container, key = self._string_slot
+            value = self._string_value()
+            if container is None:
+                return value
+            container[key] = value
+        return self._root
+
+    def _top(self, expect: str) -> _Frame:
+        if not self._stack or self._stack[-1].expect != expect:
+            raise JSONStreamError(f"Unexpected token, expecting {expect}")
+        return self._stack[-1]
+
+    def _check_value_position(self) -> None:
+        if self._stack and self._stack[-1].expect not in (
+            _VALUE,
+            _VALUE_OR_END,
+        ):
+            raise JSONStreamError(
+                f"Unexpected value, expecting {self._stack[-1].expect}",
+            )
+
+    def _add_value(self, value: Any) -> tuple:
+        """Attach a value to the innermost container, returns its slot."""
+        self._check_value_position()
+        self.changes += 1
+        if not self._stack:
+            self._root = value
+            return None, None
+        frame = self._stack[-1]
+        frame.expect = _COMMA
+        if isinstance(frame.container, dict):
+            frame.container[frame.key] = value
+            return frame.container, frame.key
+        frame.container.append(value)
+        return frame.container, len(frame.container) - 1
+
+    def _open(self, container: Union[Dict, List], expect: str) -> None:
+        self._add_value(container)
+        self._stack.append(_Frame(container, expect))
+
+    def _close(self, char: str) -> None:
+        if not self._stack:
+            raise JSONStreamError(f"Unexpected character: {char!r}")
+        frame = self._stack[-1]
+        is_dict = isinstance(frame.container, dict)
+        if (char == "}") != is_dict or frame.expect not in (
+            (_KEY_OR_END, _COMMA) if is_dict else (_VALUE_OR_END, _COMMA)
+        ):
+            raise JSONStreamError(f"Unexpected character: {char!r}")
+        self._stack.pop()
+        if not self._stack:
+            self.complete = True
+
+    def _start_string(self) -> None:
+        self._string = []
+        if self._stack and self._stack[-1].expect in (_KEY_OR_END, _KEY):
+            self._string_is_key = True
+        else:
+            self._string_is_key = False
+            self._string_slot = self._add_value("")
+
+    def _append_string(self, piece: str) -> None:
+        self._string.append(piece)
+        if not self._string_is_key:
+            self.changes += 1
+
+    def _string_value(self) -> str:
+        """The decoded content of the string so far, the pieces are joined
+        once."""
+        if len(self._string) > 1:
+            self._string[:] = ["".join(self._string)]
+        return self._string[0] if self._string else ""
+
+    def _end_escape(self) -> None:
+        raw, self._escape = self._escape, None
+        if self._surrogate is not None:
+            if _is_high_surrogate(raw):
+                self._append_string(_decode_escape(self._surrogate))
+            else:
+                raw = self._surrogate + raw
+            self._surrogate = None
+        if _is_high_surrogate(raw):
+            # decoded with the low surrogate which should follow
+            self._surrogate = raw
+            return
+        self._append_string(_decode_escape(raw))
+
+    def _end_string(self) -> None:
+        if self._surrogate is not None:
+            self._append_string(_decode_escape(self._surrogate))
+            self._surrogate = None
+        value = self._string_value()
+        self._string = None
+        if self._string_is_key:
+            frame = self._stack[-1]
+            frame.key = value
+            frame.expect = _COLON
+            return
+        container, key = self._string_slot
+        self._string_slot = None
+        if container is None:
+            self._root = value
+            self.complete = True
+        else:
+            container[key] = value
+
+    def _end_scalar(self) -> None:
+        token = "".join(self._scalar)
+        self._scalar = None
+        try:
+            value = json.loads(token)
+        except json.JSONDecodeError as e:
+            raise JSONStreamError(f"Invalid JSON literal: {token}") from e
+        self._add_value(value)
+        if not self._stack:
+            self.complete = True
+
+
+class StreamingToolCall:
+    """A tool call whose arguments are being streamed."""
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.id = ""
+        self.type: Optional[str] = None
+        self.name = ""
+        self.parser = IncrementalJSONParser()
+        self._arguments: List[str] = []
+        self.complete = False
+
+    @property
+    def arguments(self) -> str:
+        """The raw arguments received so far."""
+        return "".join(self._arguments)
+
+    @property
+    def partial_arguments(self) -> Any:
+        """The partially parsed arguments."""
+        return self.parser.partial
+
+    def to_tool_call(self) -> ToolCall:
+        """Convert to the tool call message schema."""
+        return ToolCall(
+            index=self.index,
+            id=self.id,
+            type=self.type or "function",
+            function=FunctionCall(name=self.name, arguments=self.arguments),
+        )
+
+
+class ToolCallStreamParser:
+    """Track the tool calls of a streamed chat completion, the arguments of
+    each tool call are parsed incrementally so that the tool call is known
+    to be complete as soon as its arguments JSON closes, before the
+    `finish_reason` of the response.
+
+    Examples:
+        .. code-block:: python
+
+            parser = ToolCallStreamParser()
+            async for chunk in stream:
+                for tool_call in parser.feed_chunk(chunk):
+                    # the arguments of tool_call are complete
+                    ...
+    """
+
+    def __init__(self) -> None:
+        self._tool_calls: Dict[int, StreamingToolCall] = {}
+
+    def feed(self, deltas: Optional[Sequence[Any]]) -> List[ToolCall]:
+        """Consume the tool call deltas of a chunk.
+
+        Args:
+            deltas: The `delta.tool_calls` of a chunk choice.
+
+        Returns:
+            List[ToolCall]: The tool calls completed by these deltas.
+
+        Raises:
+            JSONStreamError: If the arguments are not valid JSON.
+        """
+        completed = []
+        for delta in deltas or []:
+            index = delta.index if delta.index is not None else 0
+            tool_call = self._tool_calls.get(index)
+            if tool_call is None:
+                tool_call = self._tool_calls[index] = StreamingToolCall(index)
+            if delta.id:
+                tool_call.id = delta.id
+            if delta.type:
+                tool_call.type = delta.type
+            function = delta.function
+            if function is None:
+                continue
+            if function.name:
+                tool_call.name += function.name
+            if function.arguments and not tool_call.complete:
+                tool_call._arguments.append(function.arguments)
+                if tool_call.parser.feed(function.arguments):
+                    tool_call.complete = True
+                    completed.append(tool_call.to_tool_call())
+        return completed
+
+    def feed_chunk(self, chunk: ChatCompletionChunk) -> List[ToolCall]:
+        """Consume a chunk of a streamed chat completion.
+
+        Args:
+            chunk: The chat completion chunk.
+
+        Returns:
+            List[ToolCall]: The tool calls completed by this chunk.
+        """
+        if not chunk.choices:
+            return []
+        return self.feed(chunk.choices[0].delta.tool_calls)
+
+    def finish(self) -> List[ToolCall]:
+        """Mark the end of the stream, tool calls without arguments are
+        completed with empty arguments.
+
+        Returns:
+            List[ToolCall]: The tool calls completed by the end of stream.
+
+        Raises:
+            JSONStreamError: If the arguments of a tool call are incomplete.
+        """
+        completed = []
+        for tool_call in self._tool_calls.values():
+            if tool_call.complete:
+                continue
+            if not tool_call.arguments.strip():
+                tool_call._arguments = ["{}"]
+            else:
+                tool_call.parser.close()
+            tool_call.complete = True
+            completed.append(tool_call.to_tool_call())
+        return completed
+
+    def get(self, index: int) -> Optional[StreamingToolCall]:
+        """Get the streaming tool call of an index."""
+        return self._tool_calls.get(index)
+
+    @property
+    def tool_calls(self) -> List[ToolCall]:
+        """All the tool calls received so far, ordered by index."""
+        return [
+            self._tool_calls[index].to_tool_call()
+            for index in sorted(self._tool_calls)
+        ]
+
+
+def _model_fields(annotation: Any) -> Optional[Tuple[type, Dict]]:
+    """The model type of an annotation, e.g. of an optional field, with the
+    annotations of its fields by name and by alias, None if the annotation
+    is not a model type."""
+    for candidate in _member_types(annotation):
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            fields = {}
+            for name, field in candidate.model_fields.items():
+                fields[name] = field.annotation
+                if field.alias:
+                    fields[field.alias] = field.annotation
+            return candidate, fields
+    return None
+
+
+def _construct_partial(annotation: Any, value: Any) -> Any:
+    """Copy a partially parsed value, the objects of a model type being
+    constructed without validation, recursively."""
+    if isinstance(value, dict):
+        model = _model_fields(annotation)
+        if model is not None:
+            model_type, fields = model
+            return model_type.model_construct(
+                **{
+                    key: _construct_partial(fields.get(key, Any), item)
+                    for key, item in value.items()
+                },
+            )
+        item_type = _item_type(annotation, dict)
+        return {
+            key: _construct_partial(item_type, item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        item_type = _item_type(annotation, list)
+        return [_construct_partial(item_type, item) for item in value]
+    return value
+
+
+def _member_types(annotation: Any) -> Tuple[Any, ...]:
+    """The types of a union, e.g. of an optional field, or the type."""
+    if get_origin(annotation) in (Union, UnionType):
+        return get_args(annotation)
+    return (annotation,)
+
+
+def _item_type(annotation: Any, container: type) -> Any:
+    """The item type of a list or the value type of a dict annotation, Any
+    if unknown."""
+    for candidate in _member_types(annotation):
+        origin = get_origin(candidate)
+        if isinstance(origin, type) and issubclass(origin, container):
+            args = get_args(candidate)
+            if args:
+                return args[-1]
+    return Any
+
+
+def parse_partial_model(
+    response_model: type,
+    partial: Optional[Dict[str, Any]],
+) -> Optional[BaseModel]:
+    """Build a partial instance of a response model without validation, the
+    missing fields are left unset.
+
+    The nested objects of model types are constructed as models too, and
+    the containers are copied, so that the instance is a snapshot not
+    changed by the parser afterwards.
+
+    Args:
+        response_model: The pydantic response model.
+        partial: The partially parsed JSON object.
+
+    Returns:
+        Optional[BaseModel]: The partial instance, None if nothing has been
+            parsed yet.
+    """
+    if not isinstance(partial, dict):
+        return None
+    return _construct_partial(response_model, partial)
+
+
+class PartialModelBuilder:
+    """Build the partial instances of a response model while its JSON
+    object streams through an IncrementalJSONParser.
+
+    A snapshot is only built when the parsed value changed since the last
+    one. All the entries of a container but the last one are complete, so
+    they are constructed once and shared by the following snapshots, only
+    the innermost open entries are constructed again, and the cost of a
+    snapshot does not grow with the complete part of the document.
+
+    Examples:
+        .. code-block:: python
+
+            parser = IncrementalJSONParser()
+            builder = PartialModelBuilder(Trip, parser)
+            for delta in deltas:
+                parser.feed(delta)
+                partial = builder.snapshot()
+                if partial is not None:
+                    show(partial)
+    """
+
+    def __init__(
+        self,
+        response_model: type,
+        parser: IncrementalJSONParser,
+    ) -> None:
+        self.response_model = response_model
+        self.parser = parser
+        self._changes = -1
+        # the constructed complete entries of the containers, by id of the
+        # container, the parser keeps the containers alive
+        self._entries: Dict[int, Union[Dict, List]] = {}
+
+    def snapshot(self) -> Optional[BaseModel]:
+        """Build a partial instance of the response model without
+        validation, the missing fields are left unset.
+
+        Returns:
+            Optional[BaseModel]: The partial instance, None if nothing has
+                been parsed yet or nothing changed since the last snapshot.
+        """
+        if self.parser.changes == self._changes:
+            return None
+        partial = self.parser.partial
+        if not isinstance(partial, dict):
+            return None
+        self._changes = self.parser.changes
+        return self._build(self.response_model, partial)
+
+    def _complete(self, annotation: Any, value: Any) -> Any:
+        """Construct an entry which is complete, reusing the entries
+        constructed while it was open."""
+        if id(value) in self._entries:
+            constructed = self._build(annotation, value)
+            del self._entries[id(value)]
+            return constructed
+        return _construct_partial(annotation, value)
+
+    def _build(self, annotation: Any, value: Any) -> Any:
+        if isinstance(value, list):
+            item_type = _item_type(annotation, list)
+            done = self._entries.setdefault(id(value), [])
+            for item in value[len(done) : -1]:
+                done.append(self._complete(item_type, item))
+            if not value:
+                return []
+            return [*done, self._build(item_type, value[-1])]
+        if not isinstance(value, dict):
+            return value
+        model = _model_fields(annotation)
+        fields = model[1] if model is not None else {}
+        item_type = _item_type(annotation, dict)
+        done = self._entries.setdefault(id(value), {})
+        keys = list(value)
+        for key in keys[len(done) : -1]:
+            done[key] = self._complete(
+                fields.get(key, Any) if model is not None else item_type,
+                value[key],
+            )
+        entries = dict(done)
+        if len(done) < len(keys):
+            last = keys[-1]
+            entries[last] = self._build(
+                fields.get(last, Any) if model is not None else item_type,
+                value[last],
+            )
+        if model is not None:
+            return model[0].model_construct(**entries)
+        return entries
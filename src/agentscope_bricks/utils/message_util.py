@@ -1,11 +1,16 @@
 # -*- coding: utf-8 -*-
+from openai.types import CompletionUsage
 from openai.types.chat import ChatCompletionChunk
-from typing import List, Optional, Union
+from openai.types.chat.chat_completion_chunk import (
+    Choice,
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction,
+)
+from typing import Any, Dict, List, Optional, Union
 
-from agentscope_bricks.utils.schemas.oai_llm import ToolCall
 from agentscope_runtime.engine.schemas.agent_schemas import (
     Role,
-    FunctionCall,
     AgentResponse,
     RunStatus,
     Message,
@@ -13,7 +18,170 @@ from agentscope_runtime.engine.schemas.agent_schemas import (
 )
 
 
-# TODO: add this for streaming structured output support later
+class _ToolCallBuffer:
+    """Pieces of a streamed tool call."""
+
+    def __init__(self) -> None:
+        self.id: Optional[str] = None
+        self.type: Optional[str] = None
+        self.name: Optional[str] = None
+        self.arguments: List[str] = []
+
+
+class _ChoiceBuffer:
+    """Pieces of a streamed choice."""
+
+    def __init__(self) -> None:
+        self.role: Optional[str] = None
+        self.content: Optional[List[str]] = None
+        self.reasoning_content: Optional[List[str]] = None
+        self.tool_calls: Dict[int, _ToolCallBuffer] = {}
+        self.finish_reason: Optional[str] = None
+
+
+def _join(buffer: List[str]) -> str:
+    """Join a string buffer, keeping the result as its single item so that
+    joining it again only costs the pieces added since."""
+    if len(buffer) > 1:
+        buffer[:] = ["".join(buffer)]
+    return buffer[0] if buffer else ""
+
+
+class ChunkAccumulator:
+    """Accumulate the chunks of a streaming chat completion into a single
+    merged chunk.
+
+    The chunks are consumed one at a time, the content, the reasoning
+    content and the arguments of each tool call are collected in list
+    buffers per choice and tool call index, and the usage is summed. The
+    merged chunk can be built at any point of the stream in O(total size),
+    and the chunks added are never mutated. Usage::
+
+        accumulator = ChunkAccumulator()
+        async for chunk in stream:
+            accumulator.add(chunk)
+        merged = accumulator.merged()
+    """
+
+    def __init__(self) -> None:
+        self._last: Optional[ChatCompletionChunk] = None
+        self._choices: Dict[int, _ChoiceBuffer] = {}
+        self._usage: Optional[List[int]] = None
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, chunk: ChatCompletionChunk) -> None:
+        """Add the next chunk of the stream.
+
+        Args:
+            chunk: The chat completion chunk.
+        """
+        self._count += 1
+        self._last = chunk
+        if chunk.usage is not None:
+            if self._usage is None:
+                self._usage = [0, 0, 0]
+            self._usage[0] += chunk.usage.prompt_tokens or 0
+            self._usage[1] += chunk.usage.completion_tokens or 0
+            self._usage[2] += chunk.usage.total_tokens or 0
+
+        for choice in chunk.choices:
+            delta = choice.delta
+            # skip the tool results yielded between the tool call rounds
+            if delta is not None and delta.role == Role.TOOL:
+                continue
+            buffer = self._choices.get(choice.index)
+            if buffer is None:
+                buffer = self._choices[choice.index] = _ChoiceBuffer()
+            if choice.finish_reason:
+                buffer.finish_reason = choice.finish_reason
+            if delta is None:
+                continue
+            if delta.role and buffer.role is None:
+                buffer.role = delta.role
+            if isinstance(delta.content, str):
+                if buffer.content is None:
+                    buffer.content = []
+                buffer.content.append(delta.content)
+            # reasoning content of e.g. qwen3, an extra field of the delta
+            reasoning_content = (
+                delta.model_extra.get("reasoning_content")
+                if delta.model_extra
+                else None
+            )
+            if isinstance(reasoning_content, str):
+                if buffer.reasoning_content is None:
+                    buffer.reasoning_content = []
+                buffer.reasoning_content.append(reasoning_content)
+            for tool_call in delta.tool_calls or []:
+                tool_buffer = buffer.tool_calls.get(tool_call.index)
+                if tool_buffer is None:
+                    tool_buffer = buffer.tool_calls[tool_call.index] = (
+                        _ToolCallBuffer()
+                    )
+                if tool_call.id and not tool_buffer.id:
+                    tool_buffer.id = tool_call.id
+                if tool_call.type and not tool_buffer.type:
+                    tool_buffer.type = tool_call.type
+                if tool_call.function is None:
+                    continue
+                if tool_call.function.name and not tool_buffer.name:
+                    tool_buffer.name = tool_call.function.name
+                if tool_call.function.arguments:
+                    tool_buffer.arguments.append(tool_call.function.arguments)
+
+    def merged(self) -> Optional[ChatCompletionChunk]:
+        """Build the chunk merging the chunks added so far.
+
+        Returns:
+            Optional[ChatCompletionChunk]: The merged chunk, with the id and
+            model of the last chunk, or None if no chunk was added.
+        """
+        if self._last is None:
+            return None
+        choices = []
+        for index, buffer in sorted(self._choices.items()):
+            delta: Dict[str, Any] = {"role": buffer.role}
+            if buffer.content is not None:
+                delta["content"] = _join(buffer.content)
+            if buffer.reasoning_content is not None:
+                delta["reasoning_content"] = _join(buffer.reasoning_content)
+            if buffer.tool_calls:
+                delta["tool_calls"] = [
+                    ChoiceDeltaToolCall(
+                        index=tool_index,
+                        id=tool_buffer.id,
+                        type=tool_buffer.type or "function",
+                        function=ChoiceDeltaToolCallFunction(
+                            name=tool_buffer.name,
+                            arguments=_join(tool_buffer.arguments),
+                        ),
+                    )
+                    for tool_index, tool_buffer in sorted(
+                        buffer.tool_calls.items(),
+                    )
+                ]
+            choices.append(
+                Choice(
+                    index=index,
+                    delta=ChoiceDelta(**delta),
+                    finish_reason=buffer.finish_reason,
+                ),
+            )
+        usage = None
+        if self._usage is not None:
+            usage = CompletionUsage(
+                prompt_tokens=self._usage[0],
+                completion_tokens=self._usage[1],
+                total_tokens=self._usage[2],
+            )
+        return self._last.model_copy(
+            update={"choices": choices, "usage": usage},
+        )
+
+
 def merge_incremental_chunk(
     responses: List[ChatCompletionChunk],
 ) -> Optional[ChatCompletionChunk]:
@@ -35,85 +203,10 @@ def merge_incremental_chunk(
     if not isinstance(responses[0], ChatCompletionChunk):
         return None
 
-    # get usage or finish reason
-    merged = ChatCompletionChunk(**responses[-1].__dict__)
-
-    # if the responses has usage info, then merge the finish reason chunk to
-    # usage chunk
-    if not merged.choices and len(responses) > 1:
-        merged.choices = responses[-2].choices
-
-    # might be multiple tool calls result
-    tool_calls_dict = {}
-
-    for resp in reversed(responses[:-1]):
-        for i, j in zip(merged.choices, resp.choices):
-            # jump the finish reason chunk
-            if (i.delta.content is None and j.delta.content is not None) and (
-                i.delta.tool_calls is None and j.delta.tool_calls is not None
-            ):
-                continue
-            elif j.delta.role == Role.TOOL:
-                continue
-            # merge content
-            elif not i.delta.content and isinstance(j.delta.content, str):
-                i.delta.content = j.delta.content
-            elif isinstance(i.delta.content, str) and isinstance(
-                j.delta.content,
-                str,
-            ):
-                i.delta.content = j.delta.content + i.delta.content
-
-            # merge tool calls
-            elif not i.delta.tool_calls and isinstance(
-                j.delta.tool_calls,
-                list,
-            ):
-                for tool_call in j.delta.tool_calls:
-                    if tool_call.index not in tool_calls_dict:
-                        tool_calls_dict[tool_call.index] = tool_call
-                        # make sure function.arguments is a string
-                        if not tool_call.function.arguments:
-                            tool_calls_dict[
-                                tool_call.index
-                            ].function.arguments = ""
-                    else:
-                        if tool_call.id != "":
-                            tool_calls_dict[tool_call.index].id = tool_call.id
-                        if tool_call.function.name:
-                            tool_calls_dict[tool_call.index].function.name = (
-                                tool_call.function.name
-                            )
-                        if (
-                            tool_call.function.arguments
-                            and not tool_calls_dict[
-                                tool_call.index
-                            ].function.arguments.startswith("{")
-                        ):
-                            tool_calls_dict[
-                                tool_call.index
-                            ].function.arguments = (
-                                tool_call.function.arguments
-                                + tool_calls_dict[
-                                    tool_call.index
-                                ].function.arguments
-                            )
-
-        if merged.usage and resp.usage:
-            merged.usage.prompt_tokens += resp.usage.prompt_tokens
-            merged.usage.completion_tokens += resp.usage.completion_tokens
-            merged.usage.total_tokens += resp.usage.total_tokens
-
-    if tool_calls_dict:
-        merged.choices[0].delta.tool_calls = [
-            ToolCall(
-                id=tool_call.id,
-                type=tool_call.type,
-                function=FunctionCall(**tool_call.function.__dict__),
-            )
-            for tool_call in tool_calls_dict.values()
-        ]
-    return merged
+    accumulator = ChunkAccumulator()
+    for response in responses:
+        accumulator.add(response)
+    return accumulator.merged()
 
 
 def get_finish_reason(response: ChatCompletionChunk) -> Optional[str]:
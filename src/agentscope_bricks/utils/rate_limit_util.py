@@ -0,0 +1,546 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+
+class RateLimitTimeoutError(asyncio.TimeoutError):
+    """Raised when a call could not get a slot before its deadline."""
+
+
+class AdaptiveConcurrencyConfig(BaseModel):
+    """AIMD adaptation of the concurrency limit to the upstream capacity.
+
+    The limit grows by `increase` slots per window of `limit` successful
+    calls while the latency is stable, and is multiplied by
+    `decrease_factor` when a call fails with an overload status, e.g. 429
+    or 503, or when the latency EWMA exceeds `latency_tolerance` times the
+    baseline latency. The limit stays between `min_concurrency` and the
+    `max_concurrency` of the rate limit config.
+    """
+
+    min_concurrency: int = Field(
+        default=1,
+        description="Lower bound of the concurrency limit",
+    )
+    initial_concurrency: Optional[int] = Field(
+        default=None,
+        description="Starting concurrency limit, defaults to "
+        "max_concurrency",
+    )
+    increase: float = Field(
+        default=1.0,
+        description="Slots added per window of successful calls",
+    )
+    decrease_factor: float = Field(
+        default=0.5,
+        description="Factor applied to the limit on overload",
+    )
+    latency_tolerance: Optional[float] = Field(
+        default=2.0,
+        description="Ratio of the latency EWMA to the baseline latency "
+        "above which the limit decreases, latency is ignored if None. "
+        "The latency of a streamed call is the duration of the stream",
+    )
+    overload_status_codes: Tuple[int, ...] = Field(
+        default=(429, 503),
+        description="Status codes of the errors telling the upstream is "
+        "overloaded",
+    )
+
+
+class RateLimitConfig(BaseModel):
+    """Declarative limits of a component or a model."""
+
+    max_concurrency: Optional[int] = Field(
+        default=None,
+        description="Maximum number of in-flight calls, unlimited if None",
+    )
+    rate: Optional[float] = Field(
+        default=None,
+        description="Token bucket refill rate in calls per second, "
+        "unlimited if None",
+    )
+    burst: Optional[int] = Field(
+        default=None,
+        description="Token bucket capacity, defaults to max(1, rate)",
+    )
+    timeout: Optional[float] = Field(
+        default=None,
+        description="Maximum seconds a call could wait in the queue, "
+        "wait forever if None",
+    )
+    adaptive: Optional[AdaptiveConcurrencyConfig] = Field(
+        default=None,
+        description="Adapt the concurrency limit up to max_concurrency by "
+        "AIMD, the limit is static if None",
+    )
+
+
+class _Semaphore:
+    """A semaphore shared by all the event loops of the process, waiters are
+    served in FIFO order."""
+
+    def __init__(self, value: int) -> None:
+        self._limit = value
+        self._value = value
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, Any]] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def set_limit(self, limit: int) -> None:
+        """Change the number of slots, the calls holding a slot beyond a
+        lowered limit keep it until they release it."""
+        granted = []
+        with self._lock:
+            self._value += limit - self._limit
+            self._limit = limit
+            while self._value > 0 and self._waiters:
+                self._value -= 1
+                granted.append(self._waiters.popleft())
+        for loop, future in granted:
+            loop.call_soon_threadsafe(self._grant, future)
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+
+        future = waiter[1]
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    granted = False
+                else:
+                    granted = future.done() and not future.cancelled()
+            if granted:
+                # the slot was handed over right before the timeout
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            self._value += 1
+            if self._value <= 0 or not self._waiters:
+                return
+            self._value -= 1
+            loop, future = self._waiters.popleft()
+        loop.call_soon_threadsafe(self._grant, future)
+
+    def _grant(self, future: Any) -> None:
+        if future.cancelled():
+            # the waiter gave up after the slot was handed over
+            self.release()
+        else:
+            future.set_result(None)
+
+
+class _TokenBucket:
+    """Token bucket allowing reservations in advance, callers wait for their
+    reserved token in FIFO order."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, timeout: Optional[float] = None) -> float:
+        """Reserve one token.
+
+        Args:
+            timeout: Maximum seconds the caller accepts to wait.
+
+        Returns:
+            float: Seconds to wait before the reserved token is available.
+
+        Raises:
+            RateLimitTimeoutError: If the token would not be available
+                within the timeout, nothing is reserved in this case.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                float(self.burst),
+                self._tokens + (now - self._updated_at) * self.rate,
+            )
+            self._updated_at = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if timeout is not None and wait > timeout:
+                raise RateLimitTimeoutError(
+                    f"rate limit token not available in {timeout}s",
+                )
+            self._tokens -= 1
+            return wait
+
+    def refund(self) -> None:
+        """Give back a reserved token which was not used."""
+        with self._lock:
+            self._tokens = min(float(self.burst), self._tokens + 1)
+
+
+class RateLimiterStats:
+    """Metrics of a rate limiter."""
+
+    def __init__(self) -> None:
+        self.acquired = 0
+        self.timeouts = 0
+        self.queued = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.overloads = 0
+        self.limit_increases = 0
+        self.limit_decreases = 0
+
+    def record_wait(self, wait: float) -> None:
+        self.acquired += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+class RateLimiter:
+    """Concurrency semaphore plus token bucket rate limiter, the concurrency
+    limit is optionally adapted to the upstream capacity by AIMD."""
+
+    # EWMA weight of the latest latency
+    LATENCY_ALPHA = 0.3
+    # speed at which the baseline latency follows a higher latency
+    BASELINE_DRIFT = 0.01
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: Optional[int] = None,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        timeout: Optional[float] = None,
+        adaptive: Optional[AdaptiveConcurrencyConfig] = None,
+    ) -> None:
+        """Initialize the rate limiter.
+
+        Args:
+            name: Name of the limiter, e.g. the component or model name.
+            max_concurrency: Maximum number of in-flight calls.
+            rate: Token bucket refill rate in calls per second.
+            burst: Token bucket capacity, defaults to max(1, rate).
+            timeout: Default maximum seconds a call could wait in queue.
+            adaptive: Optional AIMD adaptation of the concurrency limit up
+                to max_concurrency.
+
+        Raises:
+            ValueError: If adaptive is given without max_concurrency.
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.adaptive = adaptive
+        self.limit: Optional[float] = max_concurrency
+        if adaptive is not None:
+            if not max_concurrency:
+                raise ValueError(
+                    f"Adaptive rate limiter {name} requires max_concurrency",
+                )
+            self.limit = float(
+                min(
+                    max_concurrency,
+                    max(
+                        adaptive.min_concurrency,
+                        adaptive.initial_concurrency or max_concurrency,
+                    ),
+                ),
+            )
+        self._semaphore = (
+            _Semaphore(int(self.limit)) if max_concurrency else None
+        )
+        self._adaptive_lock = threading.Lock()
+        self._latency_ewma: Optional[float] = None
+        self._baseline_latency: Optional[float] = None
+        self._decreased_at = 0.0
+        self._bucket = (
+            _TokenBucket(rate, burst or max(1, int(rate))) if rate else None
+        )
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.stats = RateLimiterStats()
+
+    @asynccontextmanager
+    async def acquire(
+        self,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[None]:
+        """Wait for a slot and hold it during the context.
+
+        Args:
+            timeout: Maximum seconds to wait, defaults to the limiter timeout.
+
+        Yields:
+            None
+
+        Raises:
+            RateLimitTimeoutError: If no slot is available before timeout.
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        start = time.monotonic()
+        self.queue_depth += 1
+        self.stats.queued += 1
+        acquired = False
+        reserved = False
+        try:
+            if self._bucket is not None:
+                wait = self._bucket.reserve(timeout)
+                reserved = True
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            if self._semaphore is not None:
+                remaining = (
+                    None
+                    if timeout is None
+                    else max(0.0, timeout - (time.monotonic() - start))
+                )
+                await self._semaphore.acquire(remaining)
+            acquired = True
+        except (RateLimitTimeoutError, asyncio.TimeoutError):
+            self.stats.timeouts += 1
+            raise RateLimitTimeoutError(
+                f"Waited more than {timeout}s for rate limiter {self.name}",
+            )
+        finally:
+            self.queue_depth -= 1
+            if reserved and not acquired:
+                # no call is made with the reserved token
+                self._bucket.refund()
+
+        self.stats.record_wait(time.monotonic() - start)
+        self.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if self.adaptive is not None and self.is_overload_error(e):
+                self.record_overload()
+            raise
+        else:
+            if self.adaptive is not None:
+                self.record_latency(time.monotonic() - started)
+        finally:
+            self.in_flight -= 1
+            if acquired and self._semaphore is not None:
+                self._semaphore.release()
+
+    def is_overload_error(self, error: BaseException) -> bool:
+        """Whether an error tells the upstream is overloaded, by the status
+        code of the OpenAI, httpx, aiohttp or DashScope errors.
+
+        Args:
+            error: The error raised by the call.
+
+        Returns:
+            bool: True if the status code is an overload status code.
+        """
+        status = getattr(error, "status_code", None) or getattr(
+            error,
+            "status",
+            None,
+        )
+        if status is None:
+            status = getattr(
+                getattr(error, "response", None), "status_code", None
+            )
+        if self.adaptive is None:
+            return False
+        return status in self.adaptive.overload_status_codes
+
+    def record_latency(self, latency: float) -> None:
+        """Record the latency of a successful call, the limit increases
+        additively while the latency is stable, and decreases if it is
+        inflated.
+
+        Args:
+            latency: Seconds the call held its slot.
+        """
+        with self._adaptive_lock:
+            if self._latency_ewma is None:
+                self._latency_ewma = latency
+                self._baseline_latency = latency
+            else:
+                self._latency_ewma += self.LATENCY_ALPHA * (
+                    latency - self._latency_ewma
+                )
+                # follow a lower latency at once and a higher one slowly
+                self._baseline_latency = min(
+                    latency,
+                    self._baseline_latency
+                    + self.BASELINE_DRIFT * (latency - self._baseline_latency),
+                )
+            tolerance = self.adaptive.latency_tolerance
+            if (
+                tolerance is not None
+                and self._latency_ewma > tolerance * self._baseline_latency
+            ):
+                self._decrease()
+            elif self.limit < self.max_concurrency:
+                # one increase per window of `limit` calls
+                self.limit = min(
+                    float(self.max_concurrency),
+                    self.limit + self.adaptive.increase / self.limit,
+                )
+                if int(self.limit) > self._semaphore.limit:
+                    self.stats.limit_increases += 1
+                    self._semaphore.set_limit(int(self.limit))
+
+    def record_overload(self) -> None:
+        """Record a call rejected by the overloaded upstream, e.g. with a 429
+        status, the limit decreases multiplicatively."""
+        with self._adaptive_lock:
+            self.stats.overloads += 1
+            self._decrease()
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        # the calls started before the last decrease do not decrease again
+        if now - self._decreased_at < (self._latency_ewma or 0.0):
+            return
+        self._decreased_at = now
+        limit = max(
+            float(self.adaptive.min_concurrency),
+            self.limit * self.adaptive.decrease_factor,
+        )
+        if int(limit) < self._semaphore.limit:
+            self.stats.limit_decreases += 1
+            self._semaphore.set_limit(int(limit))
+        self.limit = limit
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the metrics of this limiter.
+
+        Returns:
+            Dict[str, Any]: Queue depth, in-flight calls, wait times and the
+                current concurrency limit, plus the AIMD metrics if the
+                limit is adaptive.
+        """
+        acquired = self.stats.acquired
+        stats = {
+            "name": self.name,
+            "limit": (
+                self._semaphore.limit if self._semaphore is not None else None
+            ),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "acquired": acquired,
+            "timeouts": self.stats.timeouts,
+            "avg_wait": self.stats.total_wait / acquired if acquired else 0.0,
+            "max_wait": self.stats.max_wait,
+        }
+        if self.adaptive is not None:
+            stats.update(
+                overloads=self.stats.overloads,
+                limit_increases=self.stats.limit_increases,
+                limit_decreases=self.stats.limit_decreases,
+                latency_ewma=self._latency_ewma,
+                baseline_latency=self._baseline_latency,
+            )
+        return stats
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    key: str,
+    config: Optional[RateLimitConfig] = None,
+) -> Optional[RateLimiter]:
+    """Get the process wide rate limiter of a key, e.g. a component name or
+    a model name, the limiter is created at the first call with a config.
+
+    Args:
+        key: The limiter key.
+        config: The limits used when the limiter does not exist yet.
+
+    Returns:
+        Optional[RateLimiter]: The shared limiter, None if the key has no
+            limiter and no config is given.
+    """
+    limiter = _rate_limiters.get(key)
+    if limiter is not None or config is None:
+        return limiter
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            _rate_limiters[key] = RateLimiter(
+                name=key,
+                max_concurrency=config.max_concurrency,
+                rate=config.rate,
+                burst=config.burst,
+                timeout=config.timeout,
+                adaptive=config.adaptive,
+            )
+        return _rate_limiters[key]
+
+
+def set_rate_limit(key: str, config: RateLimitConfig) -> RateLimiter:
+    """Create or replace the process wide rate limiter of a key.
+
+    Args:
+        key: The limiter key.
+        config: The new limits.
+
+    Returns:
+        RateLimiter: The new limiter.
+    """
+    with _rate_limiters_lock:
+        _rate_limiters.pop(key, None)
+    return get_rate_limiter(key, config)
+
+
+def get_rate_limit_stats() -> Dict[str, Dict[str, Any]]:
+    """Get the metrics of all the rate limiters in this process.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Metrics keyed by the limiter key.
+    """
+    return {
+        key: limiter.get_stats() for key, limiter in _rate_limiters.items()
+    }
+
+
+@asynccontextmanager
+async def rate_limited(
+    key: str,
+    config: Optional[RateLimitConfig] = None,
+) -> AsyncIterator[None]:
+    """Hold a slot of the rate limiter of a key during the context, do
+    nothing if the key has no limiter.
+
+    Args:
+        key: The limiter key.
+        config: The limits used when the limiter does not exist yet.
+
+    Yields:
+        None
+    """
+    limiter = get_rate_limiter(key, config)
+    if limiter is None:
+        yield
+        return
+    async with limiter.acquire():
+        yield
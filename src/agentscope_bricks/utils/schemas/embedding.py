@@ -23,6 +23,20 @@ class Usage(BaseModel):
     duration: Optional[float] = None
 
 
+class EmbeddingError(BaseModel):
+    index: int
+    """The index of the failed input."""
+
+    status_code: Optional[int] = None
+    """The HTTP status code, None if the request was not answered."""
+
+    code: Optional[str] = None
+    """The error code."""
+
+    message: Optional[str] = None
+    """The error message."""
+
+
 class EmbeddingResponse(BaseModel):
     data: List[Embedding]
     """The list of embeddings generated by the model."""
@@ -35,3 +49,6 @@ class EmbeddingResponse(BaseModel):
 
     usage: Usage
     """The usage information for the request."""
+
+    errors: List[EmbeddingError] = []
+    """The inputs which failed, they have no embedding in `data`."""
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+import pickle
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from agentscope_bricks.utils.cache_util import canonical_hash
+from agentscope_bricks.utils.logger_util import logger
+
+
+def get_query_text(messages: Sequence[Dict[str, Any]]) -> Optional[str]:
+    """Get the text of the final user message of a conversation.
+
+    Args:
+        messages: The prompt messages in dict format.
+
+    Returns:
+        Optional[str]: The text, None if the conversation does not end with
+            a user message with text content.
+    """
+    if not messages or messages[-1].get("role") != "user":
+        return None
+    content = messages[-1].get("content")
+    if isinstance(content, list):
+        content = "\n".join(
+            part.get("text") or ""
+            for part in content
+            if isinstance(part, dict) and part.get("type") == "text"
+        )
+    if not isinstance(content, str) or not content.strip():
+        return None
+    return content
+
+
+class SemanticCacheStats:
+    """Counters of a semantic cache, all of them are monotonic."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.near_misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.errors = 0
+        self.total_hit_similarity = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "near_misses": self.near_misses,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "errors": self.errors,
+            "hit_rate": self.hit_rate,
+            "avg_hit_similarity": (
+                self.total_hit_similarity / self.hits if self.hits else 0.0
+            ),
+        }
+
+
+class SemanticCache:
+    """Semantic cache of LLM responses in front of `BaseLLM.arun`.
+
+    The final user message of a call is embedded with a TextEmbedding model
+    and compared with the cached queries by cosine similarity in an
+    in-process vector index. A cached response is returned when the
+    similarity reaches `threshold` and the fingerprint of the call matches,
+    the fingerprint covers the model, the system prompt, the parameters,
+    including the tools, and the response model schema. The rest of the
+    conversation is not compared, so only enable it for single-turn
+    questions, e.g. support FAQs.
+
+    Embedding errors are logged and counted, the call then goes to the LLM.
+    Usage::
+
+        cache = SemanticCache(TextEmbedding(), threshold=0.93)
+        llm = BaseLLM(semantic_cache=cache)
+    """
+
+    def __init__(
+        self,
+        embedding: Any,
+        embedding_model: str = "text-embedding-v4",
+        threshold: float = 0.95,
+        max_entries: int = 10000,
+        ttl: Optional[float] = 3600,
+        near_miss_margin: float = 0.05,
+        **embedding_kwargs: Any,
+    ) -> None:
+        """Initialize the semantic cache.
+
+        Args:
+            embedding: The TextEmbedding model used to embed the queries.
+            embedding_model: The embedding model name.
+            threshold: Minimum cosine similarity of a hit.
+            max_entries: Maximum number of cached responses, the least
+                recently used one is evicted beyond it.
+            ttl: Time to live of the cached responses in seconds, never
+                expires if None.
+            near_miss_margin: Misses whose best similarity is within this
+                margin below the threshold are counted as near misses, to
+                help tuning the threshold.
+            **embedding_kwargs: Additional arguments of the embedding call,
+                e.g. `dimensions`.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError(
+                "Please install numpy to use this feature. "
+                "You can install it with `pip install numpy`",
+            )
+        self._np = np
+        self.embedding = embedding
+        self.embedding_model = embedding_model
+        self.embedding_kwargs = embedding_kwargs
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.near_miss_margin = near_miss_margin
+        self.stats = SemanticCacheStats()
+        self._lock = threading.Lock()
+        # the index rows are allocated once the embedding size is known
+        self._vectors: Any = None
+        # fingerprints are compared as 60-bit integers in the index
+        self._fingerprints = np.zeros(max_entries, dtype="int64")
+        self._responses: List[Optional[bytes]] = [None] * max_entries
+        self._created_at = np.zeros(max_entries)
+        self._used_at = np.zeros(max_entries)
+        self._valid = np.zeros(max_entries, dtype=bool)
+
+    @staticmethod
+    def make_fingerprint(
+        model: str,
+        messages: Sequence[Dict[str, Any]],
+        parameters: Dict[str, Any],
+        response_model: Optional[type] = None,
+    ) -> str:
+        """Build the fingerprint a hit must match.
+
+        Args:
+            model: The model name.
+            messages: The prompt messages in dict format.
+            parameters: The parameters of the call in dict format.
+            response_model: Optional structured output model type.
+
+        Returns:
+            str: The fingerprint.
+        """
+        system = [m for m in messages if m.get("role") == "system"]
+        schema = (
+            response_model.model_json_schema()
+            if response_model is not None
+            else None
+        )
+        return canonical_hash(model, system, parameters, schema)
+
+    async def embed(self, text: str) -> Any:
+        """Embed a query into a normalized vector.
+
+        Args:
+            text: The query text.
+
+        Returns:
+            Any: The normalized numpy vector.
+        """
+        response = await self.embedding.arun(
+            input=[text],
+            model=self.embedding_model,
+            **self.embedding_kwargs,
+        )
+        vector = self._np.asarray(response.data[0].embedding, dtype="float32")
+        norm = self._np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _search(self, vector: Any, fingerprint: str) -> Tuple[int, float]:
+        """Find the most similar live entry with the fingerprint, returns
+        its row and similarity, the row is -1 if none."""
+        np = self._np
+        if self._vectors is None or not self._valid.any():
+            return -1, 0.0
+        if self.ttl is not None:
+            expired = self._valid & (
+                self._created_at <= time.monotonic() - self.ttl
+            )
+            if expired.any():
+                self.stats.expirations += int(expired.sum())
+                for row in np.flatnonzero(expired):
+                    self._clear_row(row)
+        candidates = np.flatnonzero(
+            self._valid & (self._fingerprints == int(fingerprint[:15], 16)),
+        )
+        if not len(candidates):
+            return -1, 0.0
+        similarities = self._vectors[candidates] @ vector
+        best = int(np.argmax(similarities))
+        return int(candidates[best]), float(similarities[best])
+
+    def _clear_row(self, row: int) -> None:
+        self._valid[row] = False
+        self._responses[row] = None
+
+    async def get(self, text: str, fingerprint: str) -> Tuple[Any, Any]:
+        """Look up the response of the most similar cached query.
+
+        Args:
+            text: The query text.
+            fingerprint: The fingerprint of the call, see `make_fingerprint`.
+
+        Returns:
+            Tuple[Any, Any]: The cached response, None on miss, and the
+                query vector to pass to `set`, None if the embedding failed.
+        """
+        try:
+            vector = await self.embed(text)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None, None
+        with self._lock:
+            row, similarity = self._search(vector, fingerprint)
+            if row < 0 or similarity < self.threshold:
+                self.stats.misses += 1
+                if row >= 0 and similarity >= (
+                    self.threshold - self.near_miss_margin
+                ):
+                    self.stats.near_misses += 1
+                return None, vector
+            self.stats.hits += 1
+            self.stats.total_hit_similarity += similarity
+            self._used_at[row] = time.monotonic()
+            value = self._responses[row]
+        return pickle.loads(value), vector
+
+    async def set(self, vector: Any, fingerprint: str, response: Any) -> None:
+        """Cache the response of a query.
+
+        Args:
+            vector: The query vector returned by `get`.
+            fingerprint: The fingerprint of the call.
+            response: A picklable response.
+        """
+        np = self._np
+        value = pickle.dumps(response, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros(
+                    (self.max_entries, len(vector)),
+                    dtype="float32",
+                )
+            free = np.flatnonzero(~self._valid)
+            if len(free):
+                row = int(free[0])
+            else:
+                row = int(np.argmin(self._used_at))
+                self.stats.evictions += 1
+            now = time.monotonic()
+            self._vectors[row] = vector
+            self._fingerprints[row] = int(fingerprint[:15], 16)
+            self._responses[row] = value
+            self._created_at[row] = now
+            self._used_at[row] = now
+            self._valid[row] = True
+            self.stats.sets += 1
+
+    def clear(self) -> None:
+        """Remove all the cached responses."""
+        with self._lock:
+            for row in self._np.flatnonzero(self._valid):
+                self._clear_row(row)
+
+    def __len__(self) -> int:
+        return int(self._valid.sum())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the metrics of the cache, including the hit rate, the average
+        similarity of the hits and the near misses below the threshold.
+
+        Returns:
+            Dict[str, Any]: The cache metrics.
+        """
+        stats = self.stats.to_dict()
+        stats.update(entries=len(self), threshold=self.threshold)
+        return stats
@@ -0,0 +1,628 @@
+# -*- coding: utf-8 -*-
+"""Local mock of the OpenAI compatible and DashScope endpoints used by the
+library, to measure the overhead of the library itself without the latency
+and the variance of the real services.
+
+Usage::
+
+    async with MockModelServer(MockServerConfig(ttft=0.2)) as server:
+        llm = BaseLLM(
+            client=AsyncOpenAI(api_key="mock", base_url=server.base_url),
+        )
+
+or as a separate process, so that it does not share the CPU of the code
+under test::
+
+    python -m agentscope_bricks.utils.server_utils.mock_server --port 8910
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import re
+import struct
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from aiohttp import web
+from pydantic import BaseModel, Field
+
+COMPATIBLE_MODE_PREFIX = "/compatible-mode/v1"
+DASHSCOPE_PREFIX = "/api/v1"
+
+
+class MockToolCall(BaseModel):
+    """A tool call emitted by the mock chat completions."""
+
+    name: str
+    arguments: Dict[str, Any] = Field(default_factory=dict)
+
+
+class MockServerConfig(BaseModel):
+    """Behavior of the mock server, latencies are in seconds."""
+
+    ttft: float = Field(
+        default=0.0,
+        description="Time to the first token of the chat completions",
+    )
+    tokens_per_second: Optional[float] = Field(
+        default=None,
+        description="Generation speed after the first token, unlimited if "
+        "None",
+    )
+    completion_tokens: int = Field(
+        default=20,
+        description="Number of tokens of a text completion",
+    )
+    tokens_per_chunk: int = Field(
+        default=1,
+        description="Number of tokens of a streamed chunk",
+    )
+    tool_calls: List[MockToolCall] = Field(
+        default_factory=list,
+        description="Tool calls emitted in parallel when the last message "
+        "is not a tool result, a text answer is emitted otherwise",
+    )
+    answers: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Text answer by model name, one token per word, "
+        "instead of completion_tokens generated tokens",
+    )
+    logprobs: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Logprob of every token by model name, 0 by default, "
+        "returned when the request asks for logprobs",
+    )
+    embedding_dimension: int = Field(default=1024)
+    embedding_latency: float = Field(default=0.0)
+    embedding_batch_size: Optional[int] = Field(
+        default=None,
+        description="Maximum number of inputs per embedding request, the "
+        "larger requests fail with a 400 like DashScope",
+    )
+    search_latency: float = Field(default=0.0)
+    rag_latency: float = Field(default=0.0)
+    task_duration: float = Field(
+        default=0.0,
+        description="Seconds after which an async task, e.g. a video "
+        "synthesis, succeeds",
+    )
+    error_rate: float = Field(
+        default=0.0,
+        description="Fraction of the requests failing with error_status",
+    )
+    error_status: int = Field(default=429)
+
+
+class MockServerStats:
+    """Requests served by the mock server and the time spent serving them,
+    including the simulated latencies."""
+
+    def __init__(self) -> None:
+        self.requests: Dict[str, int] = {}
+        self.errors = 0
+        self.upstream_time = 0.0
+
+    def record(self, endpoint: str, elapsed: float) -> None:
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        self.upstream_time += elapsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": dict(self.requests),
+            "total_requests": sum(self.requests.values()),
+            "errors": self.errors,
+            "upstream_time": self.upstream_time,
+        }
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class MockModelServer:
+    """aiohttp server mocking the chat completions, embeddings, web search,
+    RAG retrieval and async task (e.g. video synthesis) endpoints.
+
+    The OpenAI compatible endpoints are served under `base_url`, and the
+    DashScope ones under `dashscope_base_url`, mirroring `BASE_URL` and
+    `DASHSCOPE_HTTP_BASE_URL`. The statistics of the served requests are
+    available at `stats`, and at `GET /mock/stats`.
+    """
+
+    def __init__(self, config: Optional[MockServerConfig] = None) -> None:
+        """Initialize the mock server.
+
+        Args:
+            config: Behavior of the server, the defaults answer at once.
+        """
+        self.config = config or MockServerConfig()
+        self.stats = MockServerStats()
+        self.host = "127.0.0.1"
+        self.port: Optional[int] = None
+        self._tasks: Dict[str, float] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def base_url(self) -> str:
+        return self.url + COMPATIBLE_MODE_PREFIX
+
+    @property
+    def dashscope_base_url(self) -> str:
+        return self.url + DASHSCOPE_PREFIX
+
+    @property
+    def search_url(self) -> str:
+        return self.dashscope_base_url + "/indices/plugin/web_search"
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post(
+            COMPATIBLE_MODE_PREFIX + "/chat/completions",
+            self.chat_completions,
+        )
+        app.router.add_post(
+            COMPATIBLE_MODE_PREFIX + "/embeddings",
+            self.embeddings,
+        )
+        app.router.add_post(
+            DASHSCOPE_PREFIX + "/indices/plugin/web_search",
+            self.web_search,
+        )
+        app.router.add_post(
+            DASHSCOPE_PREFIX + "/indices/pipeline/retrieve_prompt",
+            self.rag_retrieve_prompt,
+        )
+        app.router.add_post(
+            DASHSCOPE_PREFIX + "/indices/pipeline/{pipeline_id}/retrieve",
+            self.rag_retrieve,
+        )
+        app.router.add_post(
+            DASHSCOPE_PREFIX + "/services/{group}/{task}/{function}",
+            self.dashscope_service,
+        )
+        for path in ("/tasks/{task_id}", "/tasks/{task_id}/"):
+            app.router.add_get(DASHSCOPE_PREFIX + path, self.fetch_task)
+        app.router.add_get("/mock/stats", self.get_stats)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Start serving, on a free port if port is 0."""
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self.host = host
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockModelServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.stop()
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Any) -> Any:
+        start = time.monotonic()
+        try:
+            if (
+                self.config.error_rate
+                and request.path != "/mock/stats"
+                and random.random() < self.config.error_rate
+            ):
+                self.stats.errors += 1
+                return web.json_response(
+                    {
+                        "error": {
+                            "message": "mock overload",
+                            "code": str(self.config.error_status),
+                        },
+                    },
+                    status=self.config.error_status,
+                )
+            return await handler(request)
+        finally:
+            if request.path != "/mock/stats":
+                self.stats.record(request.path, time.monotonic() - start)
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats.to_dict())
+
+    # chat completions
+
+    def _pieces(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str,
+    ) -> List[Dict[str, Any]]:
+        """The deltas of a completion, each holding `tokens_per_chunk`
+        tokens."""
+        size = self.config.tokens_per_chunk
+        if self.config.tool_calls and messages[-1].get("role") != "tool":
+            deltas = []
+            for index, tool_call in enumerate(self.config.tool_calls):
+                arguments = json.dumps(tool_call.arguments)
+                step = 4 * size
+                for start in range(0, max(1, len(arguments)), step):
+                    function = {"arguments": arguments[start : start + step]}
+                    call: Dict[str, Any] = {
+                        "index": index,
+                        "function": function,
+                    }
+                    if start == 0:
+                        call.update(id=f"call_{index}", type="function")
+                        function["name"] = tool_call.name
+                    deltas.append({"tool_calls": [call]})
+            return deltas
+        if model in self.config.answers:
+            words = re.findall(r"\S+\s*", self.config.answers[model])
+            return [
+                {"content": "".join(words[start : start + size])}
+                for start in range(0, len(words), size)
+            ]
+        tokens = self.config.completion_tokens
+        return [
+            {"content": "tok " * min(size, tokens - start)}
+            for start in range(0, tokens, size)
+        ]
+
+    def _logprobs(self, model: str, content: Optional[str]) -> Dict:
+        logprob = self.config.logprobs.get(model, 0.0)
+        return {
+            "content": [
+                {
+                    "token": token,
+                    "logprob": logprob,
+                    "bytes": None,
+                    "top_logprobs": [],
+                }
+                for token in re.findall(r"\S+\s*", content or "")
+            ],
+        }
+
+    def _usage(
+        self,
+        messages: List[Dict[str, Any]],
+        deltas: List[Dict[str, Any]],
+    ) -> Dict[str, int]:
+        prompt_tokens = sum(
+            _count_tokens(json.dumps(m, ensure_ascii=False)) for m in messages
+        )
+        completion_tokens = sum(
+            _count_tokens(
+                delta.get("content") or json.dumps(delta.get("tool_calls")),
+            )
+            for delta in deltas
+        )
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    async def _paced(
+        self,
+        deltas: List[Dict[str, Any]],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        await asyncio.sleep(self.config.ttft)
+        interval = (
+            self.config.tokens_per_chunk / self.config.tokens_per_second
+            if self.config.tokens_per_second
+            else 0.0
+        )
+        started = time.monotonic()
+        for i, delta in enumerate(deltas):
+            if interval and i:
+                # pace against the start so that the sleeps do not drift
+                await asyncio.sleep(
+                    max(0.0, started + i * interval - time.monotonic()),
+                )
+            yield delta
+
+    async def chat_completions(
+        self,
+        request: web.Request,
+    ) -> web.StreamResponse:
+        body = await request.json()
+        messages = body.get("messages") or [{}]
+        model = body.get("model", "mock")
+        deltas = self._pieces(messages, model)
+        logprobs = body.get("logprobs")
+        finish_reason = "tool_calls" if "tool_calls" in deltas[0] else "stop"
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        common = {
+            "id": completion_id,
+            "created": int(time.time()),
+            "model": model,
+        }
+
+        if not body.get("stream"):
+            message: Dict[str, Any] = {"role": "assistant", "content": None}
+            async for delta in self._paced(deltas):
+                if "content" in delta:
+                    message["content"] = (message["content"] or "") + delta[
+                        "content"
+                    ]
+                for call in delta.get("tool_calls", []):
+                    calls = message.setdefault("tool_calls", [])
+                    if "id" in call:
+                        calls.append(
+                            {
+                                "id": call["id"],
+                                "type": "function",
+                                "function": dict(call["function"]),
+                            },
+                        )
+                    else:
+                        calls[call["index"]]["function"]["arguments"] += call[
+                            "function"
+                        ]["arguments"]
+            return web.json_response(
+                {
+                    **common,
+                    "object": "chat.completion",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": message,
+                            "finish_reason": finish_reason,
+                            "logprobs": (
+                                self._logprobs(model, message["content"])
+                                if logprobs
+                                else None
+                            ),
+                        },
+                    ],
+                    "usage": self._usage(messages, deltas),
+                },
+            )
+
+        response = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream"},
+        )
+        await response.prepare(request)
+
+        async def send(choices: List[Dict], **extra: Any) -> None:
+            chunk = {
+                **common,
+                "object": "chat.completion.chunk",
+                "choices": choices,
+                **extra,
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        first = True
+        async for delta in self._paced(deltas):
+            if first:
+                delta = {"role": "assistant", **delta}
+                first = False
+            choice = {"index": 0, "delta": delta, "finish_reason": None}
+            if logprobs:
+                choice["logprobs"] = self._logprobs(
+                    model,
+                    delta.get("content"),
+                )
+            await send([choice])
+        await send([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await send([], usage=self._usage(messages, deltas))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    # embeddings
+
+    def _embedding(self, text: str) -> List[float]:
+        """A deterministic unit vector of the text."""
+        seed = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+        rng = random.Random(struct.unpack("<Q", seed)[0])
+        vector = [
+            rng.gauss(0.0, 1.0) for _ in range(self.config.embedding_dimension)
+        ]
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    async def embeddings(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        inputs = body.get("input")
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        limit = self.config.embedding_batch_size
+        if limit is not None and len(inputs) > limit:
+            return web.json_response(
+                {
+                    "error": {
+                        "message": f"batch size is invalid, it should not "
+                        f"be larger than {limit}",
+                        "code": "InvalidParameter",
+                    },
+                },
+                status=400,
+            )
+        await asyncio.sleep(self.config.embedding_latency)
+        tokens = sum(_count_tokens(str(text)) for text in inputs)
+        vectors: List[Any] = [self._embedding(str(text)) for text in inputs]
+        if body.get("encoding_format") == "base64":
+            # little endian float32, as requested by the OpenAI SDK
+            vectors = [
+                base64.b64encode(
+                    struct.pack(f"<{len(vector)}f", *vector),
+                ).decode()
+                for vector in vectors
+            ]
+        return web.json_response(
+            {
+                "object": "list",
+                "model": body.get("model", "mock"),
+                "data": [
+                    {
+                        "object": "embedding",
+                        "index": i,
+                        "embedding": vector,
+                    }
+                    for i, vector in enumerate(vectors)
+                ],
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            },
+        )
+
+    # search and RAG
+
+    async def web_search(self, request: web.Request) -> web.Response:
+        body = json.loads(await request.text())
+        query = body.get("uq") or "query"
+        await asyncio.sleep(self.config.search_latency)
+        docs = [
+            {
+                "title": f"Result {i} of {query}",
+                "snippet": f"Snippet {i} of {query}",
+                "url": f"https://example.com/{i}",
+                "hostname": "example.com",
+                "hostlogo": "",
+                "timestamp_format": "2024-01-01 00:00:00",
+                "_score": 1.0 - i / 10,
+                "web_main_body": "",
+            }
+            for i in range(5)
+        ]
+        return web.json_response(
+            {
+                "status": 0,
+                "data": {"docs": docs, "extras": {"toolResult": []}},
+            },
+        )
+
+    async def rag_retrieve_prompt(self, request: web.Request) -> web.Response:
+        await request.read()
+        await asyncio.sleep(self.config.rag_latency)
+        return web.json_response(
+            {"data": [{"text": "Retrieved knowledge.", "nodes": []}]},
+        )
+
+    async def rag_retrieve(self, request: web.Request) -> web.Response:
+        await request.read()
+        await asyncio.sleep(self.config.rag_latency)
+        return web.json_response(
+            {
+                "nodes": [
+                    {"text": f"Chunk {i}", "score": 1.0 - i / 10}
+                    for i in range(3)
+                ],
+            },
+        )
+
+    # DashScope services and async tasks
+
+    async def dashscope_service(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        request_id = uuid.uuid4().hex
+        if request.headers.get("X-DashScope-Async") == "enable":
+            task_id = uuid.uuid4().hex
+            self._tasks[task_id] = time.monotonic()
+            return web.json_response(
+                {
+                    "request_id": request_id,
+                    "output": {"task_id": task_id, "task_status": "PENDING"},
+                },
+            )
+        if request.match_info["task"] == "multimodal-embedding":
+            contents = (body.get("input") or {}).get("contents") or []
+            await asyncio.sleep(self.config.embedding_latency)
+            if not contents or not all(
+                all(content.values()) for content in contents
+            ):
+                return web.json_response(
+                    {
+                        "request_id": request_id,
+                        "code": "InvalidParameter",
+                        "message": "Empty content in the input contents",
+                    },
+                    status=400,
+                )
+            return web.json_response(
+                {
+                    "request_id": request_id,
+                    "output": {
+                        "embeddings": [
+                            {
+                                "index": i,
+                                "type": next(iter(content), "text"),
+                                "embedding": self._embedding(
+                                    json.dumps(content, sort_keys=True),
+                                ),
+                            }
+                            for i, content in enumerate(contents)
+                        ],
+                    },
+                    "usage": {"input_tokens": len(contents)},
+                },
+            )
+        return web.json_response(
+            {
+                "request_id": request_id,
+                "code": "NotFound",
+                "message": "Unsupported mock service",
+            },
+            status=404,
+        )
+
+    async def fetch_task(self, request: web.Request) -> web.Response:
+        task_id = request.match_info["task_id"]
+        submitted = self._tasks.get(task_id)
+        output: Dict[str, Any] = {"task_id": task_id}
+        if submitted is None:
+            output["task_status"] = "UNKNOWN"
+        elif time.monotonic() - submitted < self.config.task_duration:
+            output["task_status"] = "RUNNING"
+        else:
+            output.update(
+                task_status="SUCCEEDED",
+                video_url=f"https://example.com/{task_id}.mp4",
+            )
+        return web.json_response(
+            {"request_id": uuid.uuid4().hex, "output": output},
+        )
+
+
+async def _serve(config: MockServerConfig, host: str, port: int) -> None:
+    server = MockModelServer(config)
+    await server.start(host, port)
+    print(f"Mock server listening on {server.url}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8910)
+    parser.add_argument(
+        "--config",
+        default="{}",
+        help="MockServerConfig as JSON",
+    )
+    args = parser.parse_args()
+    config = MockServerConfig.model_validate_json(args.config)
+    try:
+        asyncio.run(_serve(config, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+import copy
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from pydantic import BaseModel
+
+from agentscope_bricks.utils.logger_util import logger
+
+# Chinese, Japanese and Korean characters, roughly one token each
+_CJK = re.compile(
+    "[\u1100-\u11ff\u2e80-\u9fff\ua960-\ua97f\uac00-\ud7ff"
+    "\uf900-\ufaff\uff00-\uffef]",
+)
+# average number of characters per token for the other scripts
+CHARS_PER_TOKEN = 4
+# chat template tokens around every message, and priming the reply
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_OVERHEAD_TOKENS = 3
+# flat cost of a non-text content part, e.g. an image
+MEDIA_TOKENS = 1024
+TRUNCATED_MARKER = " ...[truncated]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text without a tokenizer.
+
+    CJK characters count as one token each, the other characters as one
+    token per `CHARS_PER_TOKEN`, which slightly overestimates the count of
+    the Qwen tokenizer on both Chinese and English texts.
+
+    Args:
+        text: The text.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    other = len(text) - cjk
+    return cjk + (other + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class TokenCounter:
+    """Count the tokens of texts and chat messages.
+
+    The count is exact when a tokenizer is given, either a name of the
+    tokenizers shipped with dashscope, e.g. "qwen-turbo", which needs
+    `tiktoken`, or any object with an `encode` method. Otherwise it is
+    estimated by `estimate_tokens`. The counts of the messages are cached,
+    so counting a growing conversation only tokenizes the new messages.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Optional[Union[str, Any]] = None,
+        max_cache_entries: int = 4096,
+    ) -> None:
+        """Initialize the token counter.
+
+        Args:
+            tokenizer: Optional tokenizer name or object for exact counts,
+                the heuristic is used if None.
+            max_cache_entries: Maximum number of cached message counts.
+        """
+        if isinstance(tokenizer, str):
+            try:
+                import tiktoken  # noqa: F401
+            except ImportError:
+                raise ImportError(
+                    "Please install tiktoken to use this feature. "
+                    "You can install it with `pip install tiktoken`",
+                )
+            from dashscope.tokenizers import get_tokenizer
+
+            tokenizer = get_tokenizer(tokenizer)
+        self.tokenizer = tokenizer
+        self.max_cache_entries = max_cache_entries
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def exact(self) -> bool:
+        return self.tokenizer is not None
+
+    def count_text(self, text: str) -> int:
+        """Count the tokens of a text.
+
+        Args:
+            text: The text.
+
+        Returns:
+            int: The number of tokens.
+        """
+        if not text:
+            return 0
+        if self.tokenizer is None:
+            return estimate_tokens(text)
+        return len(self.tokenizer.encode(text))
+
+    def count_message(self, message: Union[Dict[str, Any], BaseModel]) -> int:
+        """Count the tokens of a chat message, including the template
+        overhead, the tool calls and the media parts.
+
+        Args:
+            message: The message in dict format or as a pydantic model.
+
+        Returns:
+            int: The number of tokens.
+        """
+        if isinstance(message, BaseModel):
+            message = message.model_dump(exclude_none=True)
+        key = hashlib.blake2b(
+            json.dumps(
+                message,
+                sort_keys=True,
+                ensure_ascii=False,
+                default=str,
+            ).encode("utf-8"),
+            digest_size=16,
+        ).digest()
+        with self._lock:
+            count = self._cache.get(key)
+            if count is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return count
+        count = self._count_message(message)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = count
+            if len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+        return count
+
+    def _count_message(self, message: Dict[str, Any]) -> int:
+        count = MESSAGE_OVERHEAD_TOKENS
+        content = message.get("content")
+        if isinstance(content, str):
+            count += self.count_text(content)
+        elif isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "text":
+                    count += self.count_text(part.get("text") or "")
+                else:
+                    count += MEDIA_TOKENS
+        if message.get("name"):
+            count += self.count_text(message["name"])
+        for tool_call in message.get("tool_calls") or []:
+            function = tool_call.get("function") or {}
+            count += self.count_text(function.get("name") or "")
+            count += self.count_text(function.get("arguments") or "")
+        return count
+
+    def count_messages(
+        self,
+        messages: Sequence[Union[Dict[str, Any], BaseModel]],
+    ) -> int:
+        """Count the tokens of a conversation sent to a chat model.
+
+        Args:
+            messages: The messages in dict format or as pydantic models.
+
+        Returns:
+            int: The number of tokens.
+        """
+        return REPLY_OVERHEAD_TOKENS + sum(
+            self.count_message(m) for m in messages
+        )
+
+    def truncate_text(self, text: str, max_tokens: int) -> str:
+        """Truncate a text to about `max_tokens` tokens, keeping its head.
+
+        Args:
+            text: The text.
+            max_tokens: The maximum number of tokens kept.
+
+        Returns:
+            str: The text itself if short enough, or its head followed by a
+                truncation marker.
+        """
+        tokens = self.count_text(text)
+        if tokens <= max_tokens:
+            return text
+        keep = len(text) * max_tokens // tokens
+        return text[:keep] + TRUNCATED_MARKER
+
+
+_default_counter: Optional[TokenCounter] = None
+
+
+def get_token_counter() -> TokenCounter:
+    """Get the process wide heuristic token counter.
+
+    Returns:
+        TokenCounter: The shared counter.
+    """
+    global _default_counter
+    if _default_counter is None:
+        _default_counter = TokenCounter()
+    return _default_counter
+
+
+class ContextTrimmer:
+    """Trim a conversation to fit the context window of a model.
+
+    The oldest non-system messages are dropped, or first condensed with the
+    "condense" strategy, until the prompt fits the budget, which is the
+    context window minus the tokens reserved for the completion and the
+    tokens of the tools. A turn is a user message with the assistant and
+    tool messages answering it, it is dropped as a whole. The system
+    messages and the latest turns are always kept. Usage::
+
+        llm = BaseLLM(context_trimmer=ContextTrimmer(max_context_tokens=32000))
+    """
+
+    def __init__(
+        self,
+        max_context_tokens: int,
+        reserve_tokens: int = 1024,
+        strategy: str = "drop",
+        keep_last: int = 1,
+        condensed_tokens: int = 128,
+        counter: Optional[TokenCounter] = None,
+    ) -> None:
+        """Initialize the trimmer.
+
+        Args:
+            max_context_tokens: The context window of the model.
+            reserve_tokens: Tokens reserved for the completion when the call
+                does not set `max_tokens`.
+            strategy: "drop" to drop the oldest turns, or "condense" to
+                first truncate the content of the oldest turns to
+                `condensed_tokens`, then drop them if still needed.
+            keep_last: Number of latest turns never trimmed.
+            condensed_tokens: Tokens kept per condensed message.
+            counter: The token counter, the process wide heuristic counter
+                if None.
+        """
+        if strategy not in ("drop", "condense"):
+            raise ValueError(f"Unknown trimming strategy: {strategy}")
+        self.max_context_tokens = max_context_tokens
+        self.reserve_tokens = reserve_tokens
+        self.strategy = strategy
+        self.keep_last = keep_last
+        self.condensed_tokens = condensed_tokens
+        self.counter = counter or get_token_counter()
+
+    def get_budget(self, parameters: Optional[Dict[str, Any]] = None) -> int:
+        """Get the number of tokens available for the messages.
+
+        Args:
+            parameters: The parameters of the call in dict format.
+
+        Returns:
+            int: The token budget of the messages.
+        """
+        parameters = parameters or {}
+        budget = self.max_context_tokens - (
+            parameters.get("max_tokens") or self.reserve_tokens
+        )
+        if parameters.get("tools"):
+            budget -= self.counter.count_message(
+                {"content": json.dumps(parameters["tools"], default=str)},
+            )
+        return budget
+
+    def trim(
+        self,
+        messages: List[Dict[str, Any]],
+        parameters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Trim the messages to the budget.
+
+        Args:
+            messages: The messages in dict format, left untouched.
+            parameters: The parameters of the call in dict format.
+
+        Returns:
+            List[Dict[str, Any]]: The messages itself if they fit, otherwise
+                a trimmed copy.
+        """
+        budget = self.get_budget(parameters)
+        counts = [self.counter.count_message(m) for m in messages]
+        total = REPLY_OVERHEAD_TOKENS + sum(counts)
+        if total <= budget:
+            return messages
+
+        # group the non-system messages into turns, a user message with the
+        # assistant and tool messages answering it, so that a reply is never
+        # kept without its question, nor a tool call without its results
+        turns: List[List[int]] = []
+        for i, message in enumerate(messages):
+            role = message.get("role")
+            if role == "system":
+                continue
+            if role == "user" or not turns:
+                turns.append([i])
+            else:
+                turns[-1].append(i)
+        trimmable = turns[: max(0, len(turns) - self.keep_last)]
+
+        messages = list(messages)
+        if self.strategy == "condense":
+            # the messages of the oldest turns first, one by one
+            for i in (i for turn in trimmable for i in turn):
+                if total <= budget:
+                    break
+                content = messages[i].get("content")
+                if not isinstance(content, str):
+                    continue
+                condensed = self.counter.truncate_text(
+                    content,
+                    self.condensed_tokens,
+                )
+                if condensed is content:
+                    continue
+                messages[i] = copy.copy(messages[i])
+                messages[i]["content"] = condensed
+                count = self.counter.count_message(messages[i])
+                total -= counts[i] - count
+                counts[i] = count
+
+        dropped = set()
+        for turn in trimmable:
+            if total <= budget:
+                break
+            dropped.update(turn)
+            total -= sum(counts[i] for i in turn)
+        if total > budget:
+            logger.warning(
+                f"The prompt of {total} tokens still exceeds the budget of "
+                f"{budget} tokens after trimming",
+            )
+        return [m for i, m in enumerate(messages) if i not in dropped]
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import asyncio
 import json
+import time
 from typing import (
     Any,
     AsyncGenerator,
@@ -38,9 +39,48 @@ from agentscope_bricks.utils.schemas.oai_llm import (
     ToolMessage,
     create_chat_completion_chunk,
 )
+from agentscope_bricks.utils.deadline_util import (
+    aiter_with_deadline,
+    check_deadline,
+    deadline,
+    deadline_after,
+)
+from agentscope_bricks.utils.json_stream_util import (
+    JSONStreamError,
+    ToolCallStreamParser,
+)
 from agentscope_bricks.utils.tracing_utils import TraceType
 from agentscope_bricks.utils.tracing_utils.wrapper import trace
-from agentscope_bricks.utils.message_util import merge_incremental_chunk
+from agentscope_bricks.utils.message_util import (
+    ChunkAccumulator,
+    merge_incremental_chunk,
+)
+
+
+async def _run_tool_call(
+    tool_call: ToolCall,
+    tools: Mapping[str, Union[Component, SandboxTool, Callable]],
+    **kwargs: Any,
+) -> str:
+    """Run a single tool call and transform its response to a string."""
+    tool_name = tool_call.function.name
+    tool = tools.get(tool_name)
+    kwargs["tool_name"] = tool_name
+    if tool:
+        if isinstance(tool, SandboxTool):
+            # sandbox tools are sync and could not be interrupted
+            check_deadline()
+            tool_response = tool(
+                **json.loads(
+                    tool_call.function.arguments,
+                ),
+            )
+        else:
+            parameters = tool.verify_args(tool_call.function.arguments)
+            tool_response = await tool.arun(parameters, **kwargs)
+    else:
+        tool_response = None
+    return BaseLLM.transform_response(tool_response)
 
 
 async def execute_tool_call(
@@ -63,6 +103,10 @@ async def execute_tool_call(
     Returns:
         Dict[str, Any]: Dictionary mapping tool names to their execution
             results as transformed response strings.
+
+    Raises:
+        DeadlineExceeded: If the deadline of the current request expires
+            before the tools finish.
     """
     result = {}
 
@@ -81,22 +125,11 @@ async def execute_tool_call(
         Args:
             tool_call: The ToolCall object to process.
         """
-        tool_name = tool_call.function.name
-        tool = tools.get(tool_name)
-        kwargs["tool_name"] = tool_name
-        if tool:
-            if isinstance(tool, SandboxTool):
-                tool_response = tool(
-                    **json.loads(
-                        tool_call.function.arguments,
-                    ),
-                )
-            else:
-                parameters = tool.verify_args(tool_call.function.arguments)
-                tool_response = await tool.arun(parameters, **kwargs)
-        else:
-            tool_response = None
-        result[tool_name] = BaseLLM.transform_response(tool_response)
+        result[tool_call.function.name] = await _run_tool_call(
+            tool_call,
+            tools,
+            **kwargs,
+        )
 
     await asyncio.gather(
         *[process_tool_call(tool_call) for tool_call in formatted_tool_calls],
@@ -173,6 +206,180 @@ async def execute_tool_call_from_message(
     return request_messages
 
 
+class EagerToolExecutor:
+    """Execute the tool calls of a streamed assistant turn eagerly.
+
+    Each tool call is started as soon as its arguments JSON is complete in
+    the stream, instead of once the turn ends with `finish_reason ==
+    "tool_calls"`, so the first tools of a multi-tool turn run while the
+    model is still streaming the arguments of the next ones. The tool
+    messages are gathered in call order at the end of the turn. Tool calls
+    whose arguments could not be parsed while streaming are started at the
+    end of the turn.
+
+    Examples:
+        .. code-block:: python
+
+            executor = EagerToolExecutor(tools)
+            async for chunk in stream:
+                executor.feed_chunk(chunk)
+                accumulator.add(chunk)
+            messages = await executor.finish(accumulator.merged())
+    """
+
+    def __init__(
+        self,
+        tools: Optional[
+            Mapping[str, Union[Component, SandboxTool, Callable]]
+        ] = None,
+        deadline_at: Optional[float] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the executor of a turn.
+
+        Args:
+            tools: Optional mapping of tool names to callable components or
+                functions that can be executed.
+            deadline_at: Optional absolute deadline of the tools on the
+                `time.monotonic()` clock.
+            **kwargs: Additional keyword arguments passed to tool execution.
+        """
+        self.tools = tools or {}
+        self.deadline_at = deadline_at
+        self.kwargs = kwargs
+        self._parser = ToolCallStreamParser()
+        self._eager = True
+        self._tasks: Dict[int, asyncio.Future] = {}
+        self._ended_at: Dict[int, float] = {}
+        self._durations: Dict[int, float] = {}
+        self.started_early = 0
+        self.latency_saved = 0.0
+
+    def feed_chunk(self, chunk: ChatCompletionChunk) -> None:
+        """Consume a chunk of the turn, starting the tool calls completed
+        by it.
+
+        Args:
+            chunk: The chat completion chunk.
+        """
+        if not self._eager or not self.tools:
+            return
+        try:
+            completed = self._parser.feed_chunk(chunk)
+        except JSONStreamError:
+            # left to the end of the turn, as without eager execution
+            self._eager = False
+            return
+        for tool_call in completed:
+            self._start(tool_call)
+            self.started_early += 1
+
+    def _start(self, tool_call: ToolCall) -> None:
+        index = tool_call.index
+
+        async def run() -> str:
+            start = time.monotonic()
+            try:
+                return await _run_tool_call(
+                    tool_call,
+                    self.tools,
+                    **self.kwargs,
+                )
+            finally:
+                self._ended_at[index] = time.monotonic()
+                self._durations[index] = self._ended_at[index] - start
+
+        # the task copies the deadline of the context it is created in
+        with deadline(at=self.deadline_at):
+            self._tasks[index] = asyncio.ensure_future(run())
+
+    async def finish(
+        self,
+        response: ChatCompletionChunk,
+    ) -> List[OpenAIMessage]:
+        """End the turn, start the remaining tool calls and gather the
+        results of all of them.
+
+        Args:
+            response: The merged chunk of the turn.
+
+        Returns:
+            List[OpenAIMessage]: The assistant message with the tool calls
+                followed by a tool message per tool call in call order, the
+                same as `execute_tool_call_from_message`, or an empty list
+                if the turn has no tool call to execute.
+        """
+        turn_ended_at = time.monotonic()
+        if (
+            not response.choices
+            or response.choices[0].finish_reason != "tool_calls"
+            or not response.choices[0].delta.tool_calls
+            or not self.tools
+        ):
+            self.cancel()
+            return []
+        response_message = response.choices[0].delta
+        tool_calls = [
+            ToolCall(
+                index=tool_call.index,
+                id=tool_call.id,
+                type=tool_call.type,
+                function=FunctionCall(**tool_call.function.__dict__),
+            )
+            for tool_call in response_message.tool_calls
+        ]
+        for tool_call in tool_calls:
+            if tool_call.index not in self._tasks:
+                self._start(tool_call)
+        try:
+            results = await asyncio.gather(
+                *[self._tasks[tool_call.index] for tool_call in tool_calls],
+            )
+        finally:
+            self.cancel()
+
+        # without eager execution all the tools would have started at the
+        # end of the turn
+        lazy_end = turn_ended_at + max(self._durations.values(), default=0)
+        eager_end = max(self._ended_at.values(), default=turn_ended_at)
+        self.latency_saved = max(0.0, lazy_end - eager_end)
+
+        assistant_response = AssistantMessage(tool_calls=tool_calls)
+        if response_message.content:
+            assistant_response.content = response_message.content
+        request_messages: List[OpenAIMessage] = [assistant_response]
+        for tool_call, result in zip(tool_calls, results):
+            request_messages.append(
+                ToolMessage(
+                    content=result,
+                    tool_call_id=tool_call.id,
+                    name=tool_call.function.name,
+                ),
+            )
+        return request_messages
+
+    def cancel(self) -> None:
+        """Cancel the tool calls still running, e.g. when the stream
+        fails."""
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the metrics of the turn.
+
+        Returns:
+            Dict[str, Any]: The number of tool calls, the number of them
+                started before the end of the turn, and the latency saved
+                in milliseconds.
+        """
+        return {
+            "tool_calls": len(self._tasks),
+            "started_early": self.started_early,
+            "latency_saved_ms": round(self.latency_saved * 1000, 3),
+        }
+
+
 def check_and_update_available_tools(
     tools: Optional[List[Union[Tool, Dict]]] = None,
     available_components: Optional[
@@ -244,13 +451,50 @@ async def function_call_with_openai(
         **kwargs: Additional keyword arguments including:
             - allow_incremental_tools_message: Whether to yield incremental
               tool messages (defaults to True)
+            - eager_tool_execution: Whether to start each tool call as soon
+              as its arguments are streamed, see EagerToolExecutor
+              (defaults to False); the latency saved per turn is logged to
+              the trace event
+            - timeout: Optional seconds for the whole loop, bounded by the
+              deadline of the current request; the LLM stream and the
+              running tools are cancelled once it expires
+            - tool_registry: Optional ToolRegistry caching the tool schemas
+              and the MCP tools across calls, e.g. `get_tool_registry()`
+            - tool_top_k: Offer only the top-k tools most relevant to the
+              user query, selected by the tool_registry, which needs an
+              embedding model
             - Other arguments passed to LLM and tool execution
 
     Yields:
         ChatCompletionChunk | None: Streaming response chunks from the LLM
             and tool execution results. May yield None in some cases.
+
+    Raises:
+        ValueError: If tool_top_k is given without a tool_registry with an
+            embedding model.
     """
-    if mcp_servers:
+    tool_registry = kwargs.pop("tool_registry", None)
+    tool_top_k = kwargs.pop("tool_top_k", None)
+    if tool_top_k is not None and (
+        tool_registry is None or tool_registry.embedding is None
+    ):
+        raise ValueError(
+            "tool_top_k requires a tool_registry with an embedding model",
+        )
+    if tool_registry is not None:
+        valid_components, tools = await tool_registry.prepare_tools(
+            messages,
+            tools=parameters.tools if parameters is not None else None,
+            available_components=available_components,
+            mcp_servers=mcp_servers,
+            top_k=tool_top_k,
+        )
+        if parameters is None:
+            parameters = Parameters()
+        parameters.tools = tools
+        if parameters.stream_options is None:
+            parameters.stream_options = {"include_usage": True}
+    elif mcp_servers:
         from agentscope_bricks.utils.mcp_util import MCPUtil
 
         components = await MCPUtil.get_all_tools(mcp_servers)
@@ -278,69 +522,106 @@ async def function_call_with_openai(
         "allow_incremental_tools_message",
         True,
     )
-    # no need to valid tools before calling llm
-    valid_components, tools = check_and_update_available_tools(
-        parameters.tools,
-        available_components,
-    )
-    parameters.tools = tools
+    eager_tool_execution = kwargs.pop("eager_tool_execution", False)
+    trace_event = kwargs.get("trace_event", None)
+    if tool_registry is None:
+        # no need to valid tools before calling llm
+        valid_components, tools = check_and_update_available_tools(
+            parameters.tools,
+            available_components,
+        )
+        parameters.tools = tools
     usage_chunks = []
+    loop_deadline = deadline_after(kwargs.pop("timeout", None))
 
     while True:
-        response = model_cls.astream_unwrapped(
-            model=model,
-            stream=True,
-            messages=messages,
-            parameters=parameters,
-            **kwargs,
+        response = aiter_with_deadline(
+            model_cls.astream_unwrapped(
+                model=model,
+                stream=True,
+                messages=messages,
+                parameters=parameters,
+                **kwargs,
+            ),
+            loop_deadline,
         )
         is_more_request = False
-        cumulated = []
-        async for resp in response:
-            if resp.usage:
-                usage_chunks.append(resp)
-                continue
-            if not resp.choices:
-                continue
-            # if not allow_incremental_tools_message is True, we should not to
-            # yield the response
-            if not allow_incremental_tools_message and (
-                resp.choices[0].delta.tool_calls
-                or resp.choices[0].finish_reason == "tool_calls"
-            ):
-                pass
-            else:
-                yield resp
+        cumulated = ChunkAccumulator()
+        executor = (
+            EagerToolExecutor(
+                valid_components,
+                deadline_at=loop_deadline,
+                **kwargs,
+            )
+            if eager_tool_execution
+            else None
+        )
+        try:
+            async for resp in response:
+                if resp.usage:
+                    usage_chunks.append(resp)
+                    continue
+                if not resp.choices:
+                    continue
+                # if not allow_incremental_tools_message is True, we should
+                # not to yield the response
+                if not allow_incremental_tools_message and (
+                    resp.choices[0].delta.tool_calls
+                    or resp.choices[0].finish_reason == "tool_calls"
+                ):
+                    pass
+                else:
+                    yield resp
 
-            cumulated.append(resp)
+                cumulated.add(resp)
+                if executor is not None:
+                    executor.feed_chunk(resp)
 
-            if (
-                len(resp.choices) > 0
-                and resp.choices[0].finish_reason == "tool_calls"
-            ):
-                cumulated_resp = merge_incremental_chunk(cumulated)
-                if not allow_incremental_tools_message:
-                    cumulated_resp.choices[0].delta.role = Role.ASSISTANT
-                    yield cumulated_resp
-
-                tool_response: List[OpenAIMessage] = (
-                    await execute_tool_call_from_message(
-                        cumulated_resp,
-                        valid_components,
-                        **kwargs,
-                    )
-                )
-                # the first response is from the assistant, the others are from
-                # the tool calls
-                if len(tool_response) > 1:
-                    is_more_request = True
-                    # TODO: only support one tool response
-                    yield create_chat_completion_chunk(
-                        message=tool_response[1],
-                        model_name=model,
-                        finish_reason=None,
-                    )
-                messages.extend(tool_response)
+                if (
+                    len(resp.choices) > 0
+                    and resp.choices[0].finish_reason == "tool_calls"
+                ):
+                    cumulated_resp = cumulated.merged()
+                    if not allow_incremental_tools_message:
+                        cumulated_resp.choices[0].delta.role = Role.ASSISTANT
+                        yield cumulated_resp
+
+                    with deadline(at=loop_deadline):
+                        if executor is not None:
+                            tool_response: List[OpenAIMessage] = (
+                                await executor.finish(cumulated_resp)
+                            )
+                            if trace_event:
+                                trace_event.on_log(
+                                    "",
+                                    **{
+                                        "step_suffix": "eager_tool_calls",
+                                        "payload": executor.get_stats(),
+                                    },
+                                )
+                        else:
+                            tool_response = (
+                                await execute_tool_call_from_message(
+                                    cumulated_resp,
+                                    valid_components,
+                                    **kwargs,
+                                )
+                            )
+                    # the first response is from the assistant, the others
+                    # are from the tool calls
+                    if len(tool_response) > 1:
+                        is_more_request = True
+                        # TODO: only support one tool response
+                        yield create_chat_completion_chunk(
+                            message=tool_response[1],
+                            model_name=model,
+                            finish_reason=None,
+                        )
+                    messages.extend(tool_response)
+        finally:
+            if executor is not None:
+                # the eager tool calls of a failed or closed stream
+                executor.cancel()
 
         if not is_more_request:
             break
@@ -380,6 +661,9 @@ async def function_call_with_agent_api(
         **kwargs: Additional keyword arguments including:
             - allow_incremental_tools_message: Whether to yield incremental
               tool messages (defaults to True)
+            - timeout: Optional seconds for the whole loop, bounded by the
+              deadline of the current request; the LLM stream and the
+              running tools are cancelled once it expires
             - Other arguments passed to LLM and tool execution
 
     Yields:
@@ -430,18 +714,23 @@ async def function_call_with_agent_api(
         ),
     )
 
+    loop_deadline = deadline_after(kwargs.pop("timeout", None))
+
     while True:
-        response = model_cls.astream_unwrapped(
-            model=model,
-            stream=True,
-            messages=oai_messages,
-            parameters=parameters,
-            **kwargs,
+        response = aiter_with_deadline(
+            model_cls.astream_unwrapped(
+                model=model,
+                stream=True,
+                messages=oai_messages,
+                parameters=parameters,
+                **kwargs,
+            ),
+            loop_deadline,
         )
         is_more_request = False
         init_event = True
         output_message = Message()
-        cumulated = []
+        cumulated = ChunkAccumulator()
         tool_calls_result = False
         content_index = None
 
@@ -462,7 +751,7 @@ async def function_call_with_agent_api(
                 init_event = False
 
             # cumulate resp
-            cumulated.append(resp)
+            cumulated.add(resp)
 
             # record usage for text message
             if resp.usage and output_message.type == MessageType.MESSAGE:
@@ -477,7 +766,7 @@ async def function_call_with_agent_api(
                 and output_message.type == MessageType.FUNCTION_CALL
                 and tool_calls_result
             ):
-                cumulated_resp = merge_incremental_chunk(cumulated)
+                cumulated_resp = cumulated.merged()
                 delta_content = output_message.content_completed(
                     content_index,
                 )
@@ -486,13 +775,14 @@ async def function_call_with_agent_api(
                 yield output_message.completed()
 
                 # tool execution
-                tool_responses: List[OpenAIMessage] = (
-                    await execute_tool_call_from_message(
-                        cumulated_resp,
-                        valid_components,
-                        **kwargs,
+                with deadline(at=loop_deadline):
+                    tool_responses: List[OpenAIMessage] = (
+                        await execute_tool_call_from_message(
+                            cumulated_resp,
+                            valid_components,
+                            **kwargs,
+                        )
                     )
-                )
                 if len(tool_responses) > 1:
                     is_more_request = True
 
@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+import time
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from agentscope_bricks.base.component import Component
+from agentscope_bricks.utils.cache_util import canonical_hash
+from agentscope_bricks.utils.semantic_cache_util import get_query_text
+
+
+class _ToolEntry:
+    """A registered tool with its pre-serialized OpenAI schema."""
+
+    __slots__ = ("component", "schema", "text", "text_hash")
+
+    def __init__(self, component: Component, name: str) -> None:
+        self.component = component
+        function = component.function_schema.model_dump(exclude_none=True)
+        function["name"] = name
+        self.schema = {"type": "function", "function": function}
+        self.text = f"{name}: {component.description}"
+        self.text_hash = canonical_hash(self.text)
+
+
+class ToolRegistryStats:
+    """Counters of a tool registry, all of them are monotonic."""
+
+    def __init__(self) -> None:
+        self.registrations = 0
+        self.mcp_fetches = 0
+        self.embedded_tools = 0
+        self.selections = 0
+        self.total_selection_time = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "registrations": self.registrations,
+            "mcp_fetches": self.mcp_fetches,
+            "embedded_tools": self.embedded_tools,
+            "selections": self.selections,
+            "avg_selection_time": (
+                self.total_selection_time / self.selections
+                if self.selections
+                else 0.0
+            ),
+        }
+
+
+class ToolRegistry:
+    """Registry of the tools offered to the LLM by the function call loops.
+
+    The OpenAI schema of a tool is serialized once at registration, and the
+    tools of an MCP server are listed and wrapped into components once,
+    instead of at every call. With an embedding model, the registry can also
+    offer only the `top_k` tools most relevant to the user query, by cosine
+    similarity between the query and the tool names and descriptions. The
+    tool vectors are embedded once and cached by the text of the tool, so
+    re-registering an unchanged tool does not embed it again. Usage::
+
+        registry = ToolRegistry(TextEmbedding())
+        async for chunk in function_call_with_openai(
+            ...,
+            available_components=components,
+            tool_registry=registry,
+            tool_top_k=8,
+        ):
+            ...
+    """
+
+    def __init__(
+        self,
+        embedding: Any = None,
+        embedding_model: str = "text-embedding-v4",
+        embedding_batch_size: int = 10,
+        **embedding_kwargs: Any,
+    ) -> None:
+        """Initialize the tool registry.
+
+        Args:
+            embedding: Optional TextEmbedding model used for the top-k
+                selection, the selection is disabled if None.
+            embedding_model: The embedding model name.
+            embedding_batch_size: Maximum number of tool descriptions per
+                embedding call.
+            **embedding_kwargs: Additional arguments of the embedding calls,
+                e.g. `dimensions`.
+        """
+        if embedding is not None:
+            try:
+                import numpy as np
+            except ImportError:
+                raise ImportError(
+                    "Please install numpy to use this feature. "
+                    "You can install it with `pip install numpy`",
+                )
+            self._np = np
+        self.embedding = embedding
+        self.embedding_model = embedding_model
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_kwargs = embedding_kwargs
+        self.stats = ToolRegistryStats()
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _ToolEntry] = {}
+        self._mcp_components: Dict[Any, Dict[str, Component]] = {}
+        # normalized vectors keyed by the hash of the tool text
+        self._vectors: Dict[str, Any] = {}
+        # the matrix of the vectors of the last selected candidates
+        self._matrix: Optional[Tuple[Tuple[str, ...], Any]] = None
+
+    def register(
+        self,
+        component: Component,
+        name: Optional[str] = None,
+    ) -> None:
+        """Register a tool, a no-op if the same component is registered
+        under the name already.
+
+        Args:
+            component: The component called for the tool.
+            name: The tool name, defaults to the component name.
+        """
+        name = name or component.name
+        entry = self._entries.get(name)
+        if entry is not None and entry.component is component:
+            return
+        entry = _ToolEntry(component, name)
+        with self._lock:
+            self._entries[name] = entry
+            self.stats.registrations += 1
+
+    def register_many(
+        self,
+        components: Union[Dict[str, Component], Iterable[Component]],
+    ) -> None:
+        """Register tools, by name if a dict is given."""
+        if isinstance(components, dict):
+            for name, component in components.items():
+                self.register(component, name)
+        else:
+            for component in components:
+                self.register(component)
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def get(self, name: str) -> Optional[Component]:
+        entry = self._entries.get(name)
+        return entry.component if entry is not None else None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def names(self) -> List[str]:
+        return list(self._entries)
+
+    def schemas(self, names: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Get the pre-serialized OpenAI schemas of tools.
+
+        Args:
+            names: The tool names, all the tools if None.
+
+        Returns:
+            List[Dict]: The schemas, shared with the registry, do not modify
+                them.
+        """
+        if names is None:
+            return [entry.schema for entry in self._entries.values()]
+        return [self._entries[name].schema for name in names]
+
+    async def register_mcp_servers(
+        self,
+        servers: Sequence[Any],
+        refresh: bool = False,
+    ) -> Dict[str, Component]:
+        """Register the tools of MCP servers, each server is listed once
+        unless `refresh` is set.
+
+        Args:
+            servers: The connected MCP servers.
+            refresh: Whether to list the tools of the servers again, e.g.
+                after a tool list changed notification.
+
+        Returns:
+            Dict[str, Component]: The components of the tools of the
+                servers, by name.
+
+        Raises:
+            RuntimeError: If two servers have a tool of the same name.
+        """
+        from agentscope_bricks.utils.mcp_util import MCPUtil
+
+        components: Dict[str, Component] = {}
+        for server in servers:
+            server_components = self._mcp_components.get(server)
+            if server_components is None or refresh:
+                tools = await MCPUtil.get_tools(server)
+                server_components = {tool.name: tool for tool in tools}
+                self._mcp_components[server] = server_components
+                self.stats.mcp_fetches += 1
+            duplicates = components.keys() & server_components.keys()
+            if duplicates:
+                raise RuntimeError(
+                    f"Duplicate tool names found across MCP servers: "
+                    f"{duplicates}",
+                )
+            components.update(server_components)
+        self.register_many(components)
+        return components
+
+    async def _embed(self, texts: List[str]) -> Any:
+        """Embed texts in batches, returns their normalized vectors."""
+        np = self._np
+        batches = [
+            texts[start : start + self.embedding_batch_size]
+            for start in range(0, len(texts), self.embedding_batch_size)
+        ]
+        responses = await asyncio.gather(
+            *[
+                self.embedding.arun(
+                    batch,
+                    model=self.embedding_model,
+                    **self.embedding_kwargs,
+                )
+                for batch in batches
+            ],
+        )
+        vectors = np.asarray(
+            [
+                item.embedding
+                for response in responses
+                for item in sorted(response.data, key=lambda d: d.index)
+            ],
+            dtype="float32",
+        )
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    async def embed_tools(
+        self,
+        names: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Embed the tools without a cached vector, e.g. at startup to keep
+        it out of the first selection.
+
+        Args:
+            names: The tool names, all the tools if None.
+
+        Raises:
+            ValueError: If the registry has no embedding model.
+        """
+        if self.embedding is None:
+            raise ValueError("The tool registry has no embedding model")
+        entries = [
+            self._entries[name] for name in (names or list(self._entries))
+        ]
+        missing = {
+            entry.text_hash: entry.text
+            for entry in entries
+            if entry.text_hash not in self._vectors
+        }
+        if not missing:
+            return
+        vectors = await self._embed(list(missing.values()))
+        with self._lock:
+            self._vectors.update(zip(missing, vectors))
+            self.stats.embedded_tools += len(missing)
+
+    def _candidate_matrix(self, names: Sequence[str]) -> Any:
+        key = tuple(self._entries[name].text_hash for name in names)
+        matrix = self._matrix
+        if matrix is None or matrix[0] != key:
+            matrix = (key, self._np.stack([self._vectors[h] for h in key]))
+            self._matrix = matrix
+        return matrix[1]
+
+    async def select(
+        self,
+        query: str,
+        top_k: int,
+        names: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        """Select the tools most relevant to a query.
+
+        Args:
+            query: The user query.
+            top_k: Maximum number of selected tools.
+            names: The candidate tool names, all the tools if None.
+
+        Returns:
+            List[str]: The names of the selected tools, the most similar
+                first.
+
+        Raises:
+            ValueError: If the registry has no embedding model.
+        """
+        start = time.monotonic()
+        names = list(names) if names is not None else list(self._entries)
+        if len(names) <= top_k:
+            return names
+        await self.embed_tools(names)
+        query_vector = (await self._embed([query]))[0]
+        similarities = self._candidate_matrix(names) @ query_vector
+        top = self._np.argpartition(-similarities, top_k)[:top_k]
+        top = top[self._np.argsort(-similarities[top])]
+        with self._lock:
+            self.stats.selections += 1
+            self.stats.total_selection_time += time.monotonic() - start
+        return [names[i] for i in top]
+
+    async def prepare_tools(
+        self,
+        messages: Sequence[Any],
+        tools: Optional[List[Any]] = None,
+        available_components: Optional[Dict[str, Component]] = None,
+        mcp_servers: Optional[Sequence[Any]] = None,
+        top_k: Optional[int] = None,
+    ) -> Tuple[Dict[str, Component], List[Any]]:
+        """Register the tools of a function call loop and get the tools to
+        offer to the LLM.
+
+        Args:
+            messages: The conversation, the final user message is the query
+                of the selection.
+            tools: The tools of the call parameters, always offered.
+            available_components: The components of the call.
+            mcp_servers: The MCP servers of the call.
+            top_k: Offer only the `top_k` most relevant tools of the
+                components and the MCP servers, all of them if None, or if
+                the conversation does not end with a user text message.
+
+        Returns:
+            Tuple[Dict[str, Component], List[Any]]: The components callable
+                in the loop by name, and the tools of the call parameters.
+
+        Raises:
+            ValueError: If top_k is given and the registry has no embedding
+                model.
+        """
+        if top_k is not None and self.embedding is None:
+            raise ValueError("The tool registry has no embedding model")
+        components = dict(available_components or {})
+        self.register_many(components)
+        if mcp_servers:
+            components.update(await self.register_mcp_servers(mcp_servers))
+
+        names = list(components)
+        if top_k is not None and len(names) > top_k and messages:
+            last = messages[-1]
+            query = get_query_text(
+                [last if isinstance(last, dict) else last.model_dump()],
+            )
+            if query is not None:
+                names = await self.select(query, top_k, names)
+        return components, list(tools or []) + self.schemas(names)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the statistics of the registry.
+
+        Returns:
+            Dict[str, Any]: The number of tools and cached vectors, plus the
+                counters.
+        """
+        return {
+            "tools": len(self._entries),
+            "cached_vectors": len(self._vectors),
+            **self.stats.to_dict(),
+        }
+
+
+_tool_registry: Optional[ToolRegistry] = None
+_tool_registry_lock = threading.Lock()
+
+
+def get_tool_registry() -> ToolRegistry:
+    """Get the process wide tool registry, created at the first call without
+    an embedding model, so without top-k selection.
+
+    Returns:
+        ToolRegistry: The shared registry.
+    """
+    global _tool_registry
+    if _tool_registry is None:
+        with _tool_registry_lock:
+            if _tool_registry is None:
+                _tool_registry = ToolRegistry()
+    return _tool_registry
+
+
+def set_tool_registry(registry: ToolRegistry) -> ToolRegistry:
+    """Replace the process wide tool registry, e.g. by one with an embedding
+    model for the top-k selection.
+
+    Args:
+        registry: The new registry.
+
+    Returns:
+        ToolRegistry: The new registry.
+    """
+    global _tool_registry
+    with _tool_registry_lock:
+        _tool_registry = registry
+    return _tool_registry
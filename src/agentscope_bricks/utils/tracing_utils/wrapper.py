@@ -737,9 +737,12 @@ def _trace_merged_resp(
     event: EventContext,
     span: Any,
 ) -> None:
-    cumulated_copy = deepcopy(cumulated)
+    # merge_incremental_chunk leaves the chunks untouched, the other merge
+    # functions may mutate them while they are still referenced by the caller
+    if func is not merge_incremental_chunk:
+        cumulated = deepcopy(cumulated)
 
-    merged_output = func(cumulated_copy)
+    merged_output = func(cumulated)
     end_payload = _obj_to_dict(merged_output)
     output_mine_type, output_value = _get_ot_type_and_value(end_payload)
     span.set_attribute(
@@ -98,6 +98,38 @@ async def test_component_tool_adapter_run_method():
     assert result == '{"result": "Processed: test_value"}'
 
 
+@pytest.mark.asyncio
+async def test_component_tool_adapter_cancellation():
+    """Test that cancelling the token cancels the running component."""
+    import asyncio
+
+    from autogen_core import CancellationToken
+
+    class SlowComponent(MockComponent):
+        name = "slow_component"
+        single_flight = False
+        cancelled = False
+
+        async def _arun(self, args: MockInput, **kwargs):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                SlowComponent.cancelled = True
+                raise
+
+    adapter = AutogenToolAdapter(SlowComponent())
+    token = CancellationToken()
+    run = asyncio.create_task(
+        adapter.run(MockInput(value="slow"), cancellation_token=token),
+    )
+    await asyncio.sleep(0.01)
+    token.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await run
+    assert SlowComponent.cancelled
+
+
 def test_component_tool_adapter_input_model_creation():
     """Test that ComponentToolAdapter creates input models correctly."""
     component = MockComponent()
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from agentscope_bricks.base.component import Component
+
+
+class MockInput(BaseModel):
+    value: str
+
+
+class MockOutput(BaseModel):
+    result: str
+
+
+class MockComponent(Component[MockInput, MockOutput]):
+    """Mock component for testing."""
+
+    name = "mock_component"
+    description = "A mock component for testing"
+
+    async def _arun(self, args: MockInput, **kwargs):
+        return MockOutput(result=f"Processed: {args.value}")
+
+
+def test_schema_is_shared_between_instances():
+    Component.clear_schema_cache()
+    first = MockComponent()
+    second = MockComponent(name="renamed", description="renamed component")
+
+    assert first.parameters is second.parameters
+    assert first.input_type is MockInput
+    assert second.return_type is MockOutput
+    assert second.function_schema.name == "renamed"
+    assert first.function_schema.parameters.required == ["value"]
+
+
+def test_shared_schema_is_read_only():
+    component = MockComponent()
+
+    with pytest.raises(ValidationError):
+        component.parameters.required = []
+
+
+class SlowInput(BaseModel):
+    delay: float
+    fail: bool = False
+
+
+class SlowComponent(Component[SlowInput, MockOutput]):
+    """Component sleeping for the given delay."""
+
+    name = "slow_component"
+    description = "A component sleeping for a while"
+
+    def __init__(self):
+        super().__init__()
+        self.running = 0
+        self.max_running = 0
+
+    async def _arun(self, args: SlowInput, **kwargs):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(args.delay)
+        finally:
+            self.running -= 1
+        if args.fail:
+            raise RuntimeError("failed on purpose")
+        return MockOutput(result=str(args.delay))
+
+
+@pytest.mark.asyncio
+async def test_abatch_keeps_order_and_isolates_errors():
+    component = SlowComponent()
+    args_list = [
+        SlowInput(delay=0.03),
+        {"delay": 0.01, "fail": True},
+        '{"delay": 0.02}',
+        {"delay": "not a number"},
+    ]
+
+    results = await component.abatch(args_list, max_concurrency=2)
+
+    assert [item.index for item in results] == [0, 1, 2, 3]
+    assert results[0].result.result == "0.03"
+    assert isinstance(results[1].error, RuntimeError)
+    assert results[2].success
+    assert isinstance(results[3].error, ValueError)
+    assert all(item.elapsed >= 0 for item in results)
+    assert component.max_running <= 2
+
+
+@pytest.mark.asyncio
+async def test_astream_batch_yield_order():
+    component = SlowComponent()
+    args_list = [SlowInput(delay=0.05), SlowInput(delay=0.01)]
+
+    completed = [
+        item.index
+        async for item in component.astream_batch(args_list, max_concurrency=2)
+    ]
+    ordered = [
+        item.index
+        async for item in component.astream_batch(
+            args_list,
+            max_concurrency=2,
+            ordered=True,
+        )
+    ]
+
+    assert completed == [1, 0]
+    assert ordered == [0, 1]
+
+
+class CountingInput(BaseModel):
+    query: str
+
+
+class CountingComponent(Component[CountingInput, MockOutput]):
+    """Component counting the upstream calls."""
+
+    name = "counting_component"
+    description = "A component counting the upstream calls"
+    single_flight = True
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def _arun(self, args: CountingInput, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        if args.query == "error":
+            raise RuntimeError("upstream error")
+        return MockOutput(result=args.query)
+
+
+class NonIdempotentComponent(CountingComponent):
+    name = "non_idempotent_component"
+    single_flight = False
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_identical_calls():
+    component = CountingComponent()
+
+    # the per-request kwargs, e.g. the trace event, are ignored, the other
+    # kwargs are part of the key
+    results = await asyncio.gather(
+        *[
+            component.arun(CountingInput(query="q"), trace_event=object())
+            for _ in range(5)
+        ],
+        component.arun(CountingInput(query="other")),
+        component.arun(CountingInput(query="q"), user_id="another"),
+        component.arun(CountingInput(query="q"), workspace_id="another"),
+    )
+    errors = await asyncio.gather(
+        *[component.arun(CountingInput(query="error")) for _ in range(3)],
+        return_exceptions=True,
+    )
+
+    assert [item.result for item in results] == ["q"] * 5 + [
+        "other",
+        "q",
+        "q",
+    ]
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert component.calls == 5
+
+
+@pytest.mark.asyncio
+async def test_single_flight_opt_out():
+    component = NonIdempotentComponent()
+
+    await asyncio.gather(
+        *[component.arun(CountingInput(query="q")) for _ in range(3)],
+    )
+
+    assert component.calls == 3
+
+
+def test_run_reuses_thread_loop():
+    component = MockComponent()
+
+    loops = set()
+
+    class LoopRecorder(MockComponent):
+        async def _arun(self, args: MockInput, **kwargs):
+            loops.add(asyncio.get_running_loop())
+            return await super()._arun(args, **kwargs)
+
+    recorder = LoopRecorder()
+    first = recorder.run(MockInput(value="a"))
+    recorder.run(MockInput(value="b"))
+
+    assert first.result == "Processed: a"
+    assert component.run(MockInput(value="c")).result == "Processed: c"
+    assert len(loops) == 1
+
+
+def test_run_from_threads_in_parallel():
+    class BlockingComponent(MockComponent):
+        async def _arun(self, args: MockInput, **kwargs):
+            # a sync SDK call blocking the loop
+            time.sleep(0.2)
+            return await super()._arun(args, **kwargs)
+
+    component = BlockingComponent()
+    start = time.monotonic()
+    with ThreadPoolExecutor(4) as executor:
+        results = list(
+            executor.map(
+                lambda value: component.run(MockInput(value=value)),
+                "abcd",
+            ),
+        )
+    assert time.monotonic() - start < 0.6
+    assert [r.result for r in results] == [f"Processed: {v}" for v in "abcd"]
+
+
+@pytest.mark.asyncio
+async def test_run_from_running_loop_raises():
+    with pytest.raises(RuntimeError, match="running event loop"):
+        MockComponent().run(MockInput(value="a"))
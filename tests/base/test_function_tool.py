@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agentscope_bricks.base.function_tool import function_tool
+from agentscope_bricks.utils.deadline_util import deadline, get_deadline
+
+
+@function_tool
+def blocking_add(a: int, b: int = 1) -> dict:
+    """Add two numbers after a blocking sleep."""
+    time.sleep(0.1)
+    return {
+        "sum": a + b,
+        "thread": threading.current_thread().name,
+        "deadline": get_deadline(),
+    }
+
+
+@function_tool
+async def async_add(a: int, b: int = 1) -> dict:
+    """Add two numbers."""
+    return {"sum": a + b, "thread": threading.current_thread().name}
+
+
+@pytest.mark.asyncio
+async def test_async_tool_is_awaited_on_the_loop():
+    result = await async_add.arun('{"a": 1, "b": 2}')
+    assert result == {"sum": 3, "thread": threading.current_thread().name}
+
+
+@pytest.mark.asyncio
+async def test_sync_tool_does_not_block_the_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    with deadline(timeout=10) as request_deadline:
+        results = await asyncio.gather(
+            *[blocking_add.arun({"a": i}) for i in range(4)],
+        )
+    task.cancel()
+
+    assert [r["sum"] for r in results] == [1, 2, 3, 4]
+    assert all(
+        r["thread"].startswith("agentscope-bricks-tool") for r in results
+    )
+    # the caller's context reaches the thread pool
+    assert all(r["deadline"] == request_deadline for r in results)
+    # the four tools run concurrently while the loop keeps ticking
+    assert ticks >= 5
+
+
+def test_verify_args_single_pass_json():
+    assert blocking_add.verify_args('{"a": "3"}') == {"a": 3, "b": 1}
+    assert blocking_add.verify_args({"a": 3, "b": 4}) == {"a": 3, "b": 4}
+    with pytest.raises(ValueError, match="Invalid JSON format"):
+        blocking_add.verify_args('{"a": ')
+    with pytest.raises(ValueError, match="Invalid arguments"):
+        blocking_add.verify_args('{"b": 2}')
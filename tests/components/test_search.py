@@ -34,3 +34,28 @@ def test_arun_success(search_component):
     assert isinstance(result, SearchOutput)
     assert isinstance(result.search_result, str)
     assert isinstance(result.search_info, dict)
+
+
+def test_failed_search_is_degraded_without_error_text(
+    search_component,
+    monkeypatch,
+):
+    async def failing_kernel(**kwargs):
+        raise RuntimeError("upstream error of https://internal.example.com")
+
+    monkeypatch.setenv("DASHSCOPE_API_KEY", "sk-mock")
+    monkeypatch.setattr(
+        ModelstudioSearch,
+        "dashscope_search_kernel",
+        staticmethod(failing_kernel),
+    )
+    input_data = SearchInput(
+        messages=[{"role": "user", "content": "南京的天气如何？"}],
+        search_options=SearchOptions(search_strategy="standard"),
+    )
+
+    result = search_component.run(input_data, user_id="1202053544550233")
+
+    assert result.search_result == "" and result.search_info == {}
+    assert "internal.example.com" not in result.model_dump_json()
+    assert search_component.is_degraded(result)
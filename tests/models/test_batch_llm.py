@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+
+import openai
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from openai import AsyncOpenAI
+
+from agentscope_bricks.models import BaseLLM, LLMBatchRunner
+from agentscope_bricks.utils.deadline_util import DeadlineExceeded, deadline
+
+
+def completion(model, content):
+    return {
+        "id": f"chatcmpl-{content}",
+        "object": "chat.completion",
+        "created": 0,
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content.upper()},
+            },
+        ],
+    }
+
+
+class MockServer:
+    """OpenAI compatible chat completions, files and batches API."""
+
+    def __init__(self):
+        self.batch_available = True
+        self.reject_batch = False
+        # number of the requests of a job with a result before it expires
+        self.expire_after = None
+        # jobs stay in progress until they are cancelled
+        self.hang = False
+        self.cancelled = []
+        self.files = {}
+        self.batches = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completions = 0
+
+    async def chat_completion(self, request):
+        body = await request.json()
+        self.completions += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+        content = body["messages"][-1]["content"]
+        if content == "bad":
+            return web.json_response(
+                {"error": {"message": "invalid input"}},
+                status=400,
+            )
+        return web.json_response(completion(body["model"], content))
+
+    async def create_file(self, request):
+        if not self.batch_available:
+            return web.json_response(
+                {"error": {"message": "not found"}},
+                status=404,
+            )
+        data = await request.post()
+        file_id = f"file-{len(self.files)}"
+        self.files[file_id] = data["file"].file.read()
+        return web.json_response(self._file(file_id))
+
+    def _file(self, file_id):
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(self.files[file_id]),
+            "created_at": 0,
+            "filename": "batch.jsonl",
+            "purpose": "batch",
+            "status": "processed",
+        }
+
+    async def create_batch(self, request):
+        body = await request.json()
+        if self.reject_batch:
+            return web.json_response(
+                {"error": {"message": "invalid completion window"}},
+                status=400,
+            )
+        batch_id = f"batch-{len(self.batches)}"
+        lines = self.files[body["input_file_id"]].decode().splitlines()
+        outputs, errors = [], []
+        for line in lines[: self.expire_after]:
+            line = json.loads(line)
+            content = line["body"]["messages"][-1]["content"]
+            result = {"id": "r", "custom_id": line["custom_id"]}
+            if content == "bad":
+                result["response"] = {
+                    "status_code": 400,
+                    "body": {"error": {"message": "invalid input"}},
+                }
+                errors.append(result)
+            else:
+                result["response"] = {
+                    "status_code": 200,
+                    "body": completion(line["body"]["model"], content),
+                }
+                outputs.append(result)
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"],
+            "completion_window": body["completion_window"],
+            "created_at": 0,
+            "status": "in_progress",
+            "request_counts": {
+                "total": len(lines),
+                "completed": len(outputs),
+                "failed": len(errors),
+            },
+        }
+        for key, results in (
+            ("output_file_id", outputs),
+            ("error_file_id", errors),
+        ):
+            if results:
+                file_id = f"file-{len(self.files)}"
+                self.files[file_id] = "\n".join(
+                    json.dumps(r) for r in results
+                ).encode()
+                batch[key] = file_id
+        self.batches[batch_id] = batch
+        return web.json_response(batch)
+
+    async def retrieve_batch(self, request):
+        batch = self.batches[request.match_info["batch_id"]]
+        response = dict(batch)
+        # the first poll sees the job in progress
+        if batch["status"] == "in_progress" and not self.hang:
+            batch["status"] = (
+                "expired" if self.expire_after is not None else "completed"
+            )
+            response.pop("output_file_id", None)
+            response.pop("error_file_id", None)
+        return web.json_response(response)
+
+    async def cancel_batch(self, request):
+        batch = self.batches[request.match_info["batch_id"]]
+        batch["status"] = "cancelled"
+        self.cancelled.append(batch["id"])
+        return web.json_response(batch)
+
+    async def file_content(self, request):
+        return web.Response(body=self.files[request.match_info["file_id"]])
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat_completion)
+        app.router.add_post("/v1/files", self.create_file)
+        app.router.add_get("/v1/files/{file_id}/content", self.file_content)
+        app.router.add_post("/v1/batches", self.create_batch)
+        app.router.add_get("/v1/batches/{batch_id}", self.retrieve_batch)
+        app.router.add_post(
+            "/v1/batches/{batch_id}/cancel",
+            self.cancel_batch,
+        )
+        return app
+
+
+@pytest_asyncio.fixture
+async def server():
+    server = MockServer()
+    runner = web.AppRunner(server.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    port = runner.addresses[0][1]
+    server.llm = BaseLLM(
+        client=AsyncOpenAI(
+            api_key="test",
+            base_url=f"http://127.0.0.1:{port}/v1",
+            max_retries=0,
+        ),
+    )
+    yield server
+    await runner.cleanup()
+
+
+def make_requests(*contents):
+    return [
+        {
+            "custom_id": f"req-{i}",
+            "messages": [{"role": "user", "content": content}],
+            "parameters": {"temperature": 0},
+        }
+        for i, content in enumerate(contents)
+    ]
+
+
+async def collect(runner, requests):
+    return {r.custom_id: r async for r in runner.run("qwen-turbo", requests)}
+
+
+@pytest.mark.asyncio
+async def test_batch_jobs_map_results_to_request_ids(server):
+    runner = LLMBatchRunner(
+        server.llm,
+        poll_interval=0.01,
+        max_requests_per_job=2,
+    )
+    jsonl = runner.to_jsonl(
+        "qwen-turbo",
+        runner._to_requests(make_requests("a")),
+    )
+    assert json.loads(jsonl) == {
+        "custom_id": "req-0",
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": "qwen-turbo",
+            "messages": [{"role": "user", "content": "a"}],
+            "temperature": 0.0,
+        },
+    }
+
+    results = await collect(runner, make_requests("a", "b", "bad"))
+    assert len(server.batches) == 2
+    assert server.completions == 0
+    assert results["req-0"].response.choices[0].message.content == "A"
+    assert results["req-1"].response.choices[0].message.content == "B"
+    assert results["req-2"].error == "invalid input"
+    assert {r.source for r in results.values()} == {"batch"}
+
+
+@pytest.mark.asyncio
+async def test_local_fallback_with_bounded_concurrency(server):
+    server.batch_available = False
+    runner = LLMBatchRunner(server.llm, max_concurrency=4)
+    contents = [f"q{i}" for i in range(20)] + ["bad"]
+
+    results = await collect(runner, make_requests(*contents))
+    assert len(results) == 21
+    assert results["req-5"].response.choices[0].message.content == "Q5"
+    assert "invalid input" in results["req-20"].error
+    assert {r.source for r in results.values()} == {"local"}
+    assert server.max_in_flight == 4
+
+    with pytest.raises(ValueError):
+        await collect(runner, make_requests("a") * 2)
+
+
+@pytest.mark.asyncio
+async def test_invalid_job_is_not_rerun_locally(server):
+    server.reject_batch = True
+    runner = LLMBatchRunner(server.llm)
+    with pytest.raises(openai.BadRequestError):
+        await collect(runner, make_requests("a", "b"))
+    assert server.completions == 0
+
+
+@pytest.mark.asyncio
+async def test_expired_job_remainder(server):
+    server.expire_after = 1
+    runner = LLMBatchRunner(server.llm, poll_interval=0.01)
+    results = await collect(runner, make_requests("a", "b"))
+    assert results["req-0"].source == "batch"
+    assert results["req-1"].source == "local"
+    assert results["req-1"].ok
+
+    runner = LLMBatchRunner(server.llm, mode="batch", poll_interval=0.01)
+    results = await collect(runner, make_requests("a", "b"))
+    assert results["req-1"].error.endswith("expired")
+
+
+@pytest.mark.asyncio
+async def test_job_is_cancelled_when_the_wait_is_aborted(server):
+    server.hang = True
+    runner = LLMBatchRunner(server.llm, mode="batch", poll_interval=0.01)
+
+    with deadline(timeout=0.2):
+        with pytest.raises(DeadlineExceeded):
+            await collect(runner, make_requests("a"))
+    assert server.cancelled == ["batch-0"]
+
+    task = asyncio.create_task(collect(runner, make_requests("b")))
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert server.cancelled == ["batch-0", "batch-1"]
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import pytest
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+
+from agentscope_bricks.models.cascade import (
+    CascadeLLM,
+    CascadeTier,
+    LogprobCheck,
+    RefusalCheck,
+    SchemaCheck,
+)
+from agentscope_bricks.utils.message_util import merge_incremental_chunk
+from agentscope_bricks.utils.schemas.oai_llm import Parameters
+from agentscope_bricks.utils.server_utils.mock_server import (
+    MockModelServer,
+    MockServerConfig,
+)
+
+MESSAGES = [{"role": "user", "content": "What is the capital of France?"}]
+
+
+class Answer(BaseModel):
+    city: str
+
+
+def mock_cascade(server, checks=None):
+    return CascadeLLM(
+        tiers=[
+            CascadeTier(model="turbo", input_price=1.0, output_price=1.0),
+            CascadeTier(model="plus", input_price=4.0, output_price=4.0),
+            CascadeTier(model="max", input_price=20.0, output_price=20.0),
+        ],
+        checks=checks,
+        client=AsyncOpenAI(
+            api_key="sk-mock",
+            base_url=server.base_url,
+            max_retries=0,
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_refusal_escalates_and_stream_releases_one_tier():
+    config = MockServerConfig(
+        answers={
+            "turbo": "I'm sorry, I can't help with that.",
+            "plus": "Paris.",
+            "max": "Paris is the capital of France.",
+        },
+    )
+    async with MockModelServer(config) as server:
+        llm = mock_cascade(server)
+        response = await llm.arun(model="max", messages=MESSAGES)
+        assert response.choices[0].message.content == "Paris."
+
+        chunks = [
+            chunk
+            async for chunk in llm.astream(model="max", messages=MESSAGES)
+        ]
+        merged = merge_incremental_chunk(chunks)
+        # the refusal of the cheapest tier is never released
+        assert merged.choices[0].delta.content == "Paris."
+        assert {chunk.model for chunk in chunks} == {"plus"}
+
+        # a model out of the tiers is not cascaded
+        await llm.arun(model="other", messages=MESSAGES)
+
+    stats = llm.get_stats()
+    assert stats["requests"] == 2
+    assert stats["tiers"]["turbo"]["calls"] == 2
+    assert stats["tiers"]["turbo"]["hit_rate"] == 0.0
+    assert stats["tiers"]["turbo"]["escalations"] == {"refusal": 2}
+    assert stats["tiers"]["plus"]["hit_rate"] == 1.0
+    assert stats["tiers"]["max"]["calls"] == 0
+    # cheaper than the strongest tier even with the wasted first attempt
+    assert stats["cost_saved"] > 0
+
+
+@pytest.mark.asyncio
+async def test_logprob_and_schema_checks():
+    config = MockServerConfig(
+        answers={
+            "turbo": '{"city": "Paris"}',
+            "plus": "The city is Paris",
+            "max": '{"city": "Paris"}',
+        },
+        logprobs={"turbo": -3.0},
+    )
+    async with MockModelServer(config) as server:
+        llm = mock_cascade(
+            server,
+            checks=[RefusalCheck(), LogprobCheck(-1.0), SchemaCheck(Answer)],
+        )
+        response = await llm.arun(
+            model="max",
+            messages=MESSAGES,
+            parameters=Parameters(logprobs=True),
+        )
+        assert response.model == "max"
+
+        # the cheapest tier is the last one of its own calls, never checked
+        response = await llm.arun(model="turbo", messages=MESSAGES)
+        assert response.model == "turbo"
+
+    tiers = llm.get_stats()["tiers"]
+    assert tiers["turbo"]["escalations"] == {"logprob": 1}
+    assert tiers["plus"]["escalations"] == {"schema": 1}
+    assert tiers["max"]["accepted"] == 1
+    assert tiers["turbo"]["accepted"] == 1
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+
+import dashscope
+import pytest
+
+from agentscope_bricks.models.embedding import MultimodalEmbedding
+from agentscope_bricks.utils.rate_limit_util import (
+    AdaptiveConcurrencyConfig,
+    RateLimitConfig,
+    set_rate_limit,
+)
+from agentscope_bricks.utils.server_utils.mock_server import (
+    MockModelServer,
+    MockServerConfig,
+)
+
+ENDPOINT = (
+    "/api/v1/services/embeddings/multimodal-embedding/multimodal-embedding"
+)
+
+
+@pytest.fixture
+def dashscope_mock(monkeypatch):
+    async def start(config):
+        server = MockModelServer(config)
+        await server.start()
+        monkeypatch.setattr(
+            dashscope,
+            "base_http_api_url",
+            server.dashscope_base_url,
+        )
+        return server
+
+    return start
+
+
+@pytest.mark.asyncio
+async def test_items_are_embedded_concurrently_without_blocking(
+    dashscope_mock,
+):
+    server = await dashscope_mock(
+        MockServerConfig(embedding_dimension=8, embedding_latency=0.2),
+    )
+    lags = []
+
+    async def ticker():
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(0.01)
+            lags.append(time.monotonic() - start - 0.01)
+
+    try:
+        embedding = MultimodalEmbedding(api_key="sk-mock")
+        task = asyncio.create_task(ticker())
+        start = time.monotonic()
+        response = await embedding.arun(
+            [
+                {"text": "a cat"},
+                {"text": ""},
+                {"image": "https://example.com/cat.png"},
+                {"text": "a dog"},
+            ],
+            model="multimodal-embedding-v1",
+            api_key="sk-mock",
+        )
+        elapsed = time.monotonic() - start
+        task.cancel()
+    finally:
+        await server.stop()
+
+    # the 4 requests of 200 ms are sent concurrently
+    assert server.stats.requests[ENDPOINT] == 4
+    assert elapsed < 0.6
+    # the event loop keeps running the other coroutines meanwhile
+    assert len(lags) > 10
+    assert max(lags) < 0.1
+
+    assert [item.index for item in response.data] == [0, 2, 3]
+    assert all(len(item.embedding) == 8 for item in response.data)
+    assert response.data[0].embedding != response.data[2].embedding
+    assert len(response.errors) == 1
+    error = response.errors[0]
+    assert error.index == 1
+    assert error.status_code == 400
+    assert error.code == "InvalidParameter"
+    assert response.usage.input_tokens == 3
+
+
+@pytest.mark.asyncio
+async def test_error_responses_are_reported_as_failed_calls(monkeypatch):
+    class OverloadedEmbedding:
+        @staticmethod
+        async def call(**kwargs):
+            return {
+                "status_code": 429,
+                "code": "Throttling",
+                "message": "Requests throttling triggered.",
+            }
+
+    monkeypatch.setattr(
+        dashscope, "AioMultiModalEmbedding", OverloadedEmbedding
+    )
+    limiter = set_rate_limit(
+        "model:multimodal-embedding-v1",
+        RateLimitConfig(
+            max_concurrency=8,
+            adaptive=AdaptiveConcurrencyConfig(latency_tolerance=None),
+        ),
+    )
+    embedding = MultimodalEmbedding(api_key="sk-mock")
+    response = await embedding.arun(
+        [{"text": "a cat"}],
+        model="multimodal-embedding-v1",
+        api_key="sk-mock",
+    )
+
+    assert response.errors[0].status_code == 429
+    stats = limiter.get_stats()
+    # the throttled call decreases the limit and is not a latency sample
+    assert (stats["limit"], stats["overloads"]) == (4, 1)
+    assert stats["latency_ewma"] is None
+    assert stats["in_flight"] == 0
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from agentscope_bricks.constants import BASE_URL
+from agentscope_bricks.models.router import LLMEndpoint, RouterLLM
+from agentscope_bricks.utils.deadline_util import DeadlineExceeded
+from agentscope_bricks.utils.rate_limit_util import RateLimitTimeoutError
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def connection_error() -> openai.APIConnectionError:
+    return openai.APIConnectionError(
+        request=httpx.Request("POST", "http://mock"),
+    )
+
+
+class FakeEndpointLLM:
+    """Endpoint answering after a delay, or failing while `failures` > 0."""
+
+    def __init__(
+        self,
+        name,
+        delay=0.0,
+        failures=0,
+        fail_after_chunk=False,
+        error=None,
+    ):
+        self.name = name
+        self.error = error
+        self.delay = delay
+        self.failures = failures
+        self.fail_after_chunk = fail_after_chunk
+        self.models = []
+
+    async def arun(self, model, messages, **kwargs):
+        self.models.append(model)
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        if self.failures:
+            self.failures -= 1
+            raise connection_error()
+        return self.name
+
+    async def _astream(self, model, messages, **kwargs):
+        if self.error is not None:
+            raise self.error
+        if self.failures and not self.fail_after_chunk:
+            self.failures -= 1
+            raise connection_error()
+
+        async def stream():
+            for i in range(3):
+                await asyncio.sleep(self.delay)
+                if i == 1 and self.fail_after_chunk:
+                    raise connection_error()
+                yield f"{self.name}-{i}"
+
+        return stream()
+
+
+def make_router(*fakes, **kwargs) -> RouterLLM:
+    router = RouterLLM(
+        endpoints=[
+            {"name": fake.name, "api_key": "sk-mock", "model_map": {}}
+            for fake in fakes
+        ],
+        **kwargs,
+    )
+    for state, fake in zip(router.endpoints, fakes):
+        state.llm = fake
+    return router
+
+
+@pytest.mark.asyncio
+async def test_router_prefers_lower_latency_and_load():
+    fast = FakeEndpointLLM("fast", delay=0.01)
+    slow = FakeEndpointLLM("slow", delay=0.05)
+    router = make_router(slow, fast)
+
+    # both endpoints are explored first, then the fast one is preferred
+    await router.arun("qwen-max", MESSAGES)
+    await router.arun("qwen-max", MESSAGES)
+    assert [await router.arun("qwen-max", MESSAGES) for _ in range(3)] == [
+        "fast",
+    ] * 3
+
+    # concurrent calls spill over to the slow endpoint
+    results = await asyncio.gather(
+        *[router.arun("qwen-max", MESSAGES) for _ in range(10)],
+    )
+    assert set(results) == {"fast", "slow"}
+    stats = router.get_stats()["endpoints"]
+    assert stats["fast"]["ewma_latency"] < stats["slow"]["ewma_latency"]
+    assert stats["fast"]["in_flight"] == stats["slow"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_router_fails_over_ejects_and_probes():
+    broken = FakeEndpointLLM("broken", failures=3)
+    backup = FakeEndpointLLM("backup", delay=0.01)
+    router = make_router(
+        broken,
+        backup,
+        max_consecutive_errors=2,
+        ejection_time=0.05,
+    )
+    router.endpoints[1].endpoint.model_map["qwen-max"] = "qwen2.5-72b"
+
+    assert await router.arun("qwen-max", MESSAGES) == "backup"
+    assert backup.models == ["qwen2.5-72b"]
+    # the backup is slower than the unmeasured endpoint, which is retried
+    assert await router.arun("qwen-max", MESSAGES) == "backup"
+    stats = router.get_stats()
+    assert stats["failovers"] == 2
+    assert stats["endpoints"]["broken"]["state"] == "ejected"
+
+    await router.arun("qwen-max", MESSAGES)
+    assert broken.failures == 1  # the ejected endpoint is skipped
+
+    await asyncio.sleep(0.06)
+    assert router.get_stats()["endpoints"]["broken"]["state"] == "half_open"
+    # the failed probe ejects it again
+    assert await router.arun("qwen-max", MESSAGES) == "backup"
+    assert router.get_stats()["endpoints"]["broken"]["ejections"] == 2
+
+    await asyncio.sleep(0.06)
+    assert await router.arun("qwen-max", MESSAGES) == "broken"
+    assert router.get_stats()["endpoints"]["broken"]["state"] == "healthy"
+
+
+@pytest.mark.asyncio
+async def test_router_stream_fails_over_before_first_chunk():
+    broken = FakeEndpointLLM("broken", failures=1)
+    backup = FakeEndpointLLM("backup")
+    router = make_router(broken, backup)
+
+    chunks = [c async for c in router.astream_unwrapped("qwen-max", MESSAGES)]
+    assert chunks == ["backup-0", "backup-1", "backup-2"]
+    assert router.get_stats()["failovers"] == 1
+
+    # no failover once a chunk has been yielded
+    flaky = FakeEndpointLLM("flaky", fail_after_chunk=True)
+    router = make_router(flaky, FakeEndpointLLM("backup"))
+    chunks = []
+    with pytest.raises(openai.APIConnectionError):
+        async for chunk in router.astream_unwrapped("qwen-max", MESSAGES):
+            chunks.append(chunk)
+    assert chunks == ["flaky-0"]
+    stats = router.get_stats()["endpoints"]["flaky"]
+    assert stats["errors"] == 1 and stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_router_local_timeouts_do_not_eject_endpoints():
+    local = FakeEndpointLLM("local")
+    backup = FakeEndpointLLM("backup")
+    router = make_router(local, backup, max_consecutive_errors=1)
+
+    # the local rate limiter or the deadline of the caller timed out, the
+    # endpoint is not to blame and the call is not retried elsewhere
+    for error in (RateLimitTimeoutError("no slot"), DeadlineExceeded()):
+        local.error = error
+        with pytest.raises(type(error)):
+            await router.arun("qwen-max", MESSAGES)
+        with pytest.raises(type(error)):
+            async for _ in router.astream_unwrapped("qwen-max", MESSAGES):
+                pass
+    stats = router.get_stats()["endpoints"]["local"]
+    assert stats["errors"] == 0 and stats["state"] == "healthy"
+    assert backup.models == []
+
+    # an upstream timeout fails over
+    local.error = asyncio.TimeoutError()
+    assert await router.arun("qwen-max", MESSAGES) == "backup"
+    assert router.get_stats()["endpoints"]["local"]["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_router_releases_cancelled_and_rejected_probes():
+    broken = FakeEndpointLLM("broken", failures=2)
+    backup = FakeEndpointLLM("backup", delay=0.01)
+    router = make_router(
+        broken,
+        backup,
+        max_consecutive_errors=2,
+        ejection_time=0.05,
+    )
+    await router.arun("qwen-max", MESSAGES)
+    await router.arun("qwen-max", MESSAGES)
+    assert router.get_stats()["endpoints"]["broken"]["state"] == "ejected"
+
+    # the probe is cancelled by the caller, the next call probes again
+    await asyncio.sleep(0.06)
+    broken.delay = 1.0
+    probe = asyncio.create_task(router.arun("qwen-max", MESSAGES))
+    await asyncio.sleep(0.01)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    stats = router.get_stats()["endpoints"]["broken"]
+    assert stats["state"] == "half_open" and stats["in_flight"] == 0
+    assert [s.name for s in router._select("run")][0] == "broken"
+
+    # the probe is rejected without a failover, it fails the probe
+    broken.delay = 0.0
+    broken.error = ValueError("bad request")
+    with pytest.raises(ValueError):
+        async for _ in router.astream_unwrapped("qwen-max", MESSAGES):
+            pass
+    assert router.get_stats()["endpoints"]["broken"]["state"] == "ejected"
+
+    await asyncio.sleep(0.06)
+    broken.error = None
+    assert await router.arun("qwen-max", MESSAGES) == "broken"
+    assert router.get_stats()["endpoints"]["broken"]["state"] == "healthy"
+
+
+def test_router_requires_endpoints():
+    with pytest.raises(ValueError):
+        RouterLLM(endpoints=[])
+    router = RouterLLM(endpoints=[LLMEndpoint(api_key="sk-mock")])
+    assert router.get_stats()["endpoints"][BASE_URL]["state"] == "healthy"
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import pytest
+from openai import AsyncOpenAI
+
+from agentscope_bricks.models.embedding import TextEmbedding
+from agentscope_bricks.utils.server_utils.mock_server import (
+    MockModelServer,
+    MockServerConfig,
+)
+
+ENDPOINT = "/compatible-mode/v1/embeddings"
+
+
+@pytest.mark.asyncio
+async def test_inputs_are_deduplicated_chunked_and_reassembled():
+    config = MockServerConfig(embedding_dimension=4, embedding_batch_size=3)
+    async with MockModelServer(config) as server:
+        client = AsyncOpenAI(api_key="sk-mock", base_url=server.base_url)
+        embedding = TextEmbedding(client=client, batch_size=3)
+        texts = [f"doc {i % 7}" for i in range(20)]
+        response = await embedding.arun(texts, model="mock")
+        # 7 unique inputs in batches of 3
+        assert server.stats.requests[ENDPOINT] == 3
+
+        expected = await embedding.arun([f"doc {i}" for i in range(3)], "mock")
+        assert server.stats.requests[ENDPOINT] == 4
+        assert [item.index for item in response.data] == list(range(20))
+        assert response.data[7].embedding == response.data[0].embedding
+        assert response.data[2].embedding == expected.data[2].embedding
+        assert response.data[2].embedding != response.data[1].embedding
+
+        # the token budget splits the long inputs as well
+        embedding = TextEmbedding(client=client, batch_tokens=21)
+        long_texts = ["word " * 15, "short", "word " * 16]
+        response = await embedding.arun(long_texts, model="mock")
+        assert server.stats.requests[ENDPOINT] == 6
+        assert len(response.data) == 3
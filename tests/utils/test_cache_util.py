@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from pydantic import BaseModel
+
+from agentscope_bricks.base.component import Component
+from agentscope_bricks.components.memory.modelstudio_memory import (
+    SearchMemory,
+)
+from agentscope_bricks.models.llm import BaseLLM
+from agentscope_bricks.utils.cache_util import (
+    LLMResponseCache,
+    LRUCache,
+    ResultCache,
+    SQLiteCache,
+    canonical_hash,
+)
+from agentscope_bricks.utils.schemas.oai_llm import Parameters
+
+
+class QueryInput(BaseModel):
+    query: str
+
+
+class QueryOutput(BaseModel):
+    answer: str
+
+
+class CountingSearch(Component[QueryInput, QueryOutput]):
+    name = "counting_search"
+    description = "Search component counting the upstream calls"
+
+    calls = 0
+
+    async def _arun(self, args: QueryInput, **kwargs):
+        CountingSearch.calls += 1
+        if args.query == "down":
+            # upstream error
+            return QueryOutput(answer="")
+        return QueryOutput(answer=f"{args.query}:{kwargs.get('user_id')}")
+
+    def is_degraded(self, result: QueryOutput) -> bool:
+        return not result.answer
+
+
+def test_canonical_hash_ignores_key_order():
+    assert canonical_hash({"a": 1, "b": [1, 2]}) == canonical_hash(
+        {"b": [1, 2], "a": 1},
+    )
+    assert canonical_hash(QueryInput(query="x")) == canonical_hash(
+        {"query": "x"},
+    )
+
+
+@pytest.mark.asyncio
+async def test_lru_cache_evicts_by_size_and_ttl():
+    cache = LRUCache(max_bytes=200)
+    await cache.set("a", "x" * 80)
+    await cache.set("b", "y" * 80)
+    await cache.set("c", "z" * 80)
+
+    assert await cache.get("a") is None
+    assert await cache.get("c") == "z" * 80
+    assert cache.get_stats()["evictions"] == 1
+
+    await cache.set("short", 1, ttl=0.01)
+    await asyncio.sleep(0.02)
+    assert await cache.get("short") is None
+    assert cache.get_stats()["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_round_trip(tmp_path):
+    cache = SQLiteCache(path=str(tmp_path / "cache.sqlite"), max_entries=2)
+    await cache.set("a", QueryOutput(answer="a"))
+    await cache.set("b", {"answer": "b"})
+    await cache.get("a")
+    await cache.set("c", [1, 2, 3])
+
+    assert await cache.get("a") == QueryOutput(answer="a")
+    assert await cache.get("b") is None
+    assert await cache.get("c") == [1, 2, 3]
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_component_result_cache():
+    CountingSearch.calls = 0
+    result_cache = ResultCache(ttl=60, key_kwargs=["user_id"])
+    component = CountingSearch(result_cache=result_cache)
+
+    first = await component.arun(QueryInput(query="q"), user_id="u1")
+    second = await component.arun(QueryInput(query="q"), user_id="u1")
+    other_user = await component.arun(QueryInput(query="q"), user_id="u2")
+
+    assert first == second
+    assert other_user.answer == "q:u2"
+    assert CountingSearch.calls == 2
+    stats = result_cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+    # the degraded outputs are not cached
+    await component.arun(QueryInput(query="down"))
+    await component.arun(QueryInput(query="down"))
+    assert CountingSearch.calls == 4
+    assert result_cache.get_stats()["sets"] == 2
+
+
+def test_memory_components_accept_component_kwargs(monkeypatch):
+    monkeypatch.setenv("DASHSCOPE_API_KEY", "sk-mock")
+    result_cache = ResultCache(ttl=60, key_kwargs=["user_id"])
+    search = SearchMemory(result_cache=result_cache)
+    assert search.result_cache is result_cache
+
+
+class CountingCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, model, messages, stream=False, **kwargs):
+        self.calls += 1
+        if not stream:
+            return ChatCompletion(
+                id=f"chat-{self.calls}",
+                created=0,
+                model=model,
+                object="chat.completion",
+                choices=[
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": "hi"},
+                    },
+                ],
+            )
+
+        async def chunks():
+            for content in ["h", "i"]:
+                yield ChatCompletionChunk(
+                    id=f"chunk-{self.calls}",
+                    created=0,
+                    model=model,
+                    object="chat.completion.chunk",
+                    choices=[{"index": 0, "delta": {"content": content}}],
+                )
+
+        return chunks()
+
+
+@pytest.mark.asyncio
+async def test_llm_response_cache():
+    completions = CountingCompletions()
+    response_cache = LLMResponseCache(ttl=60)
+    llm = BaseLLM(
+        client=SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+        response_cache=response_cache,
+    )
+    messages = [{"role": "user", "content": "hi"}]
+    parameters = {"temperature": 0, "seed": 42}
+
+    first = await llm.arun("mock", messages, parameters)
+    second = await llm.arun("mock", messages, {"seed": 42, "temperature": 0})
+    await llm.arun("mock", messages, {"temperature": 0.5})
+    bypassed = await llm.arun("mock", messages, parameters, use_cache=False)
+    assert first == second
+    assert bypassed.id != first.id
+    assert completions.calls == 3
+
+    parameters = Parameters(temperature=0, seed=42)
+    streamed = [c async for c in llm.astream("mock", messages, parameters)]
+    replayed = [c async for c in llm.astream("mock", messages, parameters)]
+    assert completions.calls == 4
+    assert all(isinstance(c, ChatCompletionChunk) for c in replayed)
+    assert replayed == streamed
+    assert response_cache.get_stats()["hits"] == 2
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from types import SimpleNamespace
+
+import instructor
+import pytest
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
+
+from agentscope_bricks.models.llm import BaseLLM
+from agentscope_bricks.utils.client_pool_util import (
+    ClientPoolConfig,
+    LLMClientPool,
+)
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_clients_per_key():
+    pool = LLMClientPool(
+        ClientPoolConfig(max_connections=8, keepalive_expiry=5.0),
+    )
+    async with pool.lease("key-a") as first:
+        pass
+    async with pool.lease("key-a") as second:
+        pass
+    async with pool.lease("key-b") as other:
+        pass
+    async with pool.lease("key-a", mode=instructor.Mode.TOOLS) as wrapped:
+        pass
+
+    assert first is second
+    assert isinstance(first, AsyncOpenAI)
+    assert other is not first
+    assert isinstance(wrapped, instructor.AsyncInstructor)
+    assert wrapped.client is not first
+    pool_limits = first._client._transport._pool
+    assert pool_limits._max_connections == 8
+    assert pool_limits._keepalive_expiry == 5.0
+    assert pool.get_stats()["hits"] == 1
+    assert pool.get_stats()["misses"] == 3
+    await pool.aclose()
+    assert first.is_closed() and len(pool) == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_evicts_least_recently_used():
+    pool = LLMClientPool(ClientPoolConfig(max_size=2))
+    async with pool.lease("key-a") as a:
+        pass
+    async with pool.lease("key-b") as b:
+        # key-a is closed right away, key-b only once its call ends
+        async with pool.lease("key-c"):
+            async with pool.lease("key-d"):
+                pass
+        assert a.is_closed()
+        assert not b.is_closed()
+    assert b.is_closed()
+    assert pool.get_stats()["evictions"] == 2
+    assert len(pool) == 2
+
+
+def test_pool_drops_clients_of_closed_loops():
+    pool = LLMClientPool()
+
+    async def call():
+        async with pool.lease("key-a") as client:
+            return client
+
+    # each asyncio.run has its own loop, and so its own client
+    first = asyncio.run(call())
+    second = asyncio.run(call())
+    assert first is not second
+    stats = pool.get_stats()
+    assert stats["misses"] == 2 and stats["abandoned"] == 1
+    assert len(pool) == 1
+
+    asyncio.run(pool.aclose())
+    assert len(pool) == 0 and pool.get_stats()["abandoned"] == 2
+
+
+class FakePool(LLMClientPool):
+    def __init__(self) -> None:
+        super().__init__()
+        self.keys = []
+
+    def _create(self, api_key, base_url, mode):
+        self.keys.append((api_key, base_url, mode))
+
+        async def create(**kwargs):
+            await asyncio.sleep(0)
+            return ChatCompletion(
+                id="chat",
+                created=0,
+                model=kwargs["model"],
+                object="chat.completion",
+                choices=[
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": api_key},
+                    },
+                ],
+            )
+
+        client = SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create)),
+        )
+        return client, client
+
+
+@pytest.mark.asyncio
+async def test_base_llm_uses_pooled_client_per_api_key():
+    pool = FakePool()
+    default_client = SimpleNamespace()
+    llm = BaseLLM(client=default_client, client_pool=pool)
+    messages = [{"role": "user", "content": "hi"}]
+
+    responses = await asyncio.gather(
+        *[
+            llm.arun(model="mock", messages=messages, api_key=f"key-{i % 2}")
+            for i in range(10)
+        ],
+    )
+
+    assert [r.choices[0].message.content for r in responses] == [
+        f"key-{i % 2}" for i in range(10)
+    ]
+    # one client per tenant, the default client is left untouched
+    assert sorted(k[0] for k in pool.keys) == ["key-0", "key-1"]
+    assert llm.client is default_client
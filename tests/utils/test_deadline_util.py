@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from agentscope_bricks.base.component import Component
+from agentscope_bricks.utils.deadline_util import (
+    DeadlineExceeded,
+    aiter_with_deadline,
+    bound_timeout,
+    deadline,
+    get_remaining_time,
+)
+from agentscope_bricks.utils.tool_call_utils import execute_tool_call
+
+
+class SleepInput(BaseModel):
+    seconds: float
+
+
+class SleepOutput(BaseModel):
+    slept: float
+
+
+class SleepComponent(Component[SleepInput, SleepOutput]):
+    name = "sleep_component"
+    description = "Sleep for the given seconds"
+
+    cancelled = 0
+
+    async def _arun(self, args: SleepInput, **kwargs):
+        try:
+            await asyncio.sleep(args.seconds)
+        except asyncio.CancelledError:
+            SleepComponent.cancelled += 1
+            raise
+        return SleepOutput(slept=args.seconds)
+
+
+def test_nested_deadline_never_extends():
+    assert get_remaining_time() is None
+    assert bound_timeout(600) == 600
+    with deadline(timeout=1):
+        with deadline(timeout=100):
+            assert get_remaining_time() <= 1
+        with deadline(timeout=0.5):
+            assert bound_timeout(600) <= 0.5
+        assert 0.5 < get_remaining_time() <= 1
+    assert get_remaining_time() is None
+
+
+@pytest.mark.asyncio
+async def test_component_cancelled_on_deadline():
+    SleepComponent.cancelled = 0
+    component = SleepComponent()
+
+    start = time.monotonic()
+    with deadline(timeout=0.05):
+        with pytest.raises(DeadlineExceeded):
+            await component.arun(SleepInput(seconds=5))
+    assert time.monotonic() - start < 1
+    assert SleepComponent.cancelled == 1
+
+    # no deadline, no overhead on the result
+    result = await component.arun(SleepInput(seconds=0))
+    assert result.slept == 0
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_cancelled_on_deadline():
+    SleepComponent.cancelled = 0
+    tool_call = {
+        "index": 0,
+        "id": "call_0",
+        "type": "function",
+        "function": {
+            "name": "sleep_component",
+            "arguments": '{"seconds": 5}',
+        },
+    }
+    with deadline(timeout=0.05):
+        with pytest.raises(DeadlineExceeded):
+            await execute_tool_call(
+                [tool_call],
+                {"sleep_component": SleepComponent()},
+            )
+    assert SleepComponent.cancelled == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_closed_on_deadline():
+    closed = False
+
+    async def stream():
+        nonlocal closed
+        try:
+            for i in range(100):
+                await asyncio.sleep(0.02)
+                yield i
+        finally:
+            closed = True
+
+    items = []
+    with pytest.raises(DeadlineExceeded):
+        async for item in aiter_with_deadline(
+            stream(),
+            time.monotonic() + 0.1,
+        ):
+            items.append(item)
+
+    assert 0 < len(items) < 100
+    assert closed
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+import pytest
+from openai import AsyncOpenAI
+
+from agentscope_bricks.models.embedding import TextEmbedding
+from agentscope_bricks.utils.embedding_cache_util import EmbeddingCache
+from agentscope_bricks.utils.server_utils.mock_server import (
+    MockModelServer,
+    MockServerConfig,
+)
+
+ENDPOINT = "/compatible-mode/v1/embeddings"
+
+
+def test_vectors_persist_and_torn_writes_are_dropped(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), fsync=False)
+    vectors = np.arange(12, dtype="float32").reshape(3, 4)
+    cache.add("model", ["a", "b", "a"], vectors)
+    cache.add("model", ["c"], [[9.0, 9.0, 9.0, 9.0]], dimensions=4)
+
+    # a crash in the middle of an append leaves a partial row and key
+    store = os.path.join(str(tmp_path), "model-default")
+    with open(os.path.join(store, "vectors.f32"), "ab") as f:
+        f.write(b"\0" * 10)
+    with open(os.path.join(store, "keys.bin"), "ab") as f:
+        f.write(b"\1" * 5)
+
+    reopened = EmbeddingCache(str(tmp_path), fsync=False)
+    a, b, c = reopened.lookup("model", ["a", "b", "c"])
+    assert a.tolist() == [0, 1, 2, 3]
+    assert b.tolist() == [4, 5, 6, 7]
+    # the key includes the model and the dimension
+    assert c is None
+    assert reopened.lookup("model", ["c"], dimensions=4)[0] is not None
+    assert reopened.lookup("other", ["a"]) == [None]
+
+    reopened.add("model", ["d"], [[1.0, 1.0, 1.0, 1.0]])
+    assert os.path.getsize(os.path.join(store, "keys.bin")) == 3 * 16
+    assert os.path.getsize(os.path.join(store, "vectors.f32")) == 3 * 16
+    assert cache.lookup("model", ["d"])[0].tolist() == [1, 1, 1, 1]
+    with pytest.raises(ValueError):
+        reopened.add("model", ["e"], [[1.0, 2.0]])
+
+
+def test_sorted_index_and_recent_appends(tmp_path, monkeypatch):
+    from agentscope_bricks.utils import embedding_cache_util
+
+    monkeypatch.setattr(
+        embedding_cache_util._VectorStore,
+        "MERGE_THRESHOLD",
+        8,
+    )
+    cache = EmbeddingCache(str(tmp_path), fsync=False)
+    texts = [f"text {i}" for i in range(20)]
+    cache.add("model", texts, np.eye(20, dtype="float32"))
+    cache.add("model", ["late"], np.ones((1, 20), dtype="float32"))
+    found = cache.lookup("model", texts + ["late", "missing"])
+    assert [int(v.argmax()) for v in found[:20]] == list(range(20))
+    assert found[20].sum() == 20 and found[21] is None
+    assert cache.get_stats()["vectors"] == {"model-default": 21}
+
+
+@pytest.mark.asyncio
+async def test_text_embedding_sends_only_cache_misses(tmp_path):
+    config = MockServerConfig(embedding_dimension=8)
+    async with MockModelServer(config) as server:
+        embedding = TextEmbedding(
+            client=AsyncOpenAI(api_key="sk-mock", base_url=server.base_url),
+            embedding_cache=EmbeddingCache(str(tmp_path), fsync=False),
+        )
+        first = await embedding.arun(["a", "b", "a"], model="mock")
+        second = await embedding.arun(["b", "c", "a"], model="mock")
+        assert server.stats.requests[ENDPOINT] == 2
+
+        vectors = {"a": first.data[0].embedding, "b": first.data[1].embedding}
+        assert first.data[2].embedding == vectors["a"]
+        assert np.allclose(second.data[0].embedding, vectors["b"])
+        assert np.allclose(second.data[2].embedding, vectors["a"])
+        assert second.usage.prompt_tokens < first.usage.prompt_tokens
+
+        await embedding.arun("c", model="mock")
+        assert server.stats.requests[ENDPOINT] == 2
+        await embedding.arun("c", model="mock", use_cache=False)
+        assert server.stats.requests[ENDPOINT] == 3
+        stats = embedding.embedding_cache.get_stats()
+        assert stats["hits"] == 3 and stats["sets"] == 3
+
+
+@pytest.mark.asyncio
+async def test_cache_dimension_mismatch_returns_fetched_vectors(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), fsync=False)
+    cache.add("mock", ["seed"], np.ones((1, 4), dtype="float32"))
+    config = MockServerConfig(embedding_dimension=8)
+    async with MockModelServer(config) as server:
+        embedding = TextEmbedding(
+            client=AsyncOpenAI(api_key="sk-mock", base_url=server.base_url),
+            embedding_cache=cache,
+        )
+        response = await embedding.arun(["a", "b"], model="mock")
+
+    assert [len(item.embedding) for item in response.data] == [8, 8]
+    assert cache.get_stats()["sets"] == 1
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from agentscope_bricks.base.component import Component
+from agentscope_bricks.utils.hedging_util import HedgePolicy, LatencyHistogram
+
+
+class LookupInput(BaseModel):
+    key: str
+
+
+class LookupOutput(BaseModel):
+    value: str
+    attempt: int
+
+
+class FlakyLookup(Component[LookupInput, LookupOutput]):
+    name = "flaky_lookup"
+    description = "Lookup whose every `slow_every` call is slow"
+
+    attempts = 0
+    cancelled = 0
+    slow_every = 0
+
+    async def _arun(self, args: LookupInput, **kwargs):
+        FlakyLookup.attempts += 1
+        attempt = FlakyLookup.attempts
+        delay = 0.001
+        if self.slow_every and attempt % self.slow_every == 0:
+            delay = 2
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            FlakyLookup.cancelled += 1
+            raise
+        return LookupOutput(value=args.key, attempt=attempt)
+
+
+def test_latency_histogram_quantiles():
+    histogram = LatencyHistogram(window_size=100)
+    assert histogram.quantile(0.5) is None
+    for i in range(1, 201):
+        histogram.record(i / 1000)
+
+    # only the latest 100 samples are kept
+    assert len(histogram) == 100
+    assert histogram.quantile(0.5) == pytest.approx(0.150)
+    assert histogram.quantile(0.95) == pytest.approx(0.195)
+
+
+def test_adaptive_timeout():
+    policy = HedgePolicy(min_samples=10, min_timeout=0.5)
+    assert policy.get_timeout("search:pro", 5) == 5
+    for _ in range(10):
+        policy.histogram("search:pro").record(0.4)
+    assert policy.get_timeout("search:pro", 5) == pytest.approx(1.2)
+    # the configured timeout stays the upper bound
+    assert policy.get_timeout("search:pro", 1) == 1
+    # other strategies keep their own latencies
+    assert policy.get_timeout("search:max", 5) == 5
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_and_cancels_slow_attempt():
+    policy = HedgePolicy(min_samples=5, min_hedge_delay=0.01)
+    component = FlakyLookup(hedge_policy=policy)
+    FlakyLookup.attempts = 0
+    FlakyLookup.cancelled = 0
+
+    for i in range(5):
+        await component.arun(LookupInput(key=str(i)))
+
+    # the next first attempt is slow, the hedged one wins
+    FlakyLookup.slow_every = 6
+    start = time.monotonic()
+    result = await component.arun(LookupInput(key="slow"))
+    assert time.monotonic() - start < 1
+    assert result.attempt == 7
+
+    await asyncio.sleep(0)
+    assert FlakyLookup.cancelled == 1
+    stats = policy.get_stats()["flaky_lookup"]
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+    FlakyLookup.slow_every = 0
+
+
+@pytest.mark.asyncio
+async def test_degraded_results_lose_and_cancelled_attempts_are_censored():
+    policy = HedgePolicy(min_samples=5, min_hedge_delay=0.01)
+    for _ in range(5):
+        policy.histogram("search").record(0.01)
+    attempts = []
+
+    async def search():
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            # the first attempt fails fast with a degraded output
+            await asyncio.sleep(0.02)
+            return ""
+        await asyncio.sleep(0.05)
+        return "result"
+
+    result = await policy.run(search, key="search", accept=bool)
+    assert result == "result"
+    # the degraded output is neither returned nor recorded
+    assert len(policy.histogram("search")) == 6
+
+    async def slow():
+        attempts.append(None)
+        await asyncio.sleep(5 if len(attempts) == 1 else 0.01)
+        return "result"
+
+    attempts.clear()
+    assert await policy.run(slow, key="search") == "result"
+    await asyncio.sleep(0)
+    # the cancelled slow attempt is recorded as a lower bound
+    stats = policy.get_stats()["search"]
+    assert stats["samples"] == 8 and stats["censored"] == 1
+
+    async def failing():
+        return ""
+
+    assert await policy.run(failing, key="search", accept=bool) == ""
+    assert policy.get_stats()["search"]["degraded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hedges_are_capped_by_the_budget():
+    policy = HedgePolicy(
+        min_samples=1,
+        min_hedge_delay=0.001,
+        hedge_budget=0.1,
+        max_hedge_tokens=2,
+        window_size=1000,
+    )
+    for _ in range(1000):
+        policy.histogram("slow").record(0.001)
+
+    async def call():
+        await asyncio.sleep(0.01)
+        return "result"
+
+    for _ in range(10):
+        await policy.run(call, key="slow")
+    stats = policy.get_stats()["slow"]
+    # the bucket starts with 2 tokens, refilled by 0.1 per call
+    assert stats["hedged"] == 2
+    assert stats["hedges_over_budget"] == 8
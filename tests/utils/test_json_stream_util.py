@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+import json
+import random
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytest
+from openai.types.chat import ChatCompletionChunk
+from pydantic import BaseModel
+
+from agentscope_bricks.models.llm import BaseLLM
+from agentscope_bricks.utils.json_stream_util import (
+    IncrementalJSONParser,
+    JSONStreamError,
+    ToolCallStreamParser,
+    PartialModelBuilder,
+    parse_partial_model,
+)
+
+DOCUMENT = {
+    "city": 'Hang"zhou\\ 杭州 é\n',
+    "days": [1, -2.5, 3e2, True, False, None],
+    "nested": {"empty": {}, "list": [], "deep": [[{"a": "b"}]]},
+    "unicode": "😀",
+}
+
+
+def make_chunk(
+    content: Optional[str] = None,
+    tool_calls: Optional[List[dict]] = None,
+    finish_reason: Optional[str] = None,
+) -> ChatCompletionChunk:
+    delta = {"role": "assistant"}
+    if content is not None:
+        delta["content"] = content
+    if tool_calls is not None:
+        delta["tool_calls"] = tool_calls
+    return ChatCompletionChunk(
+        id="chunk",
+        created=0,
+        model="mock",
+        object="chat.completion.chunk",
+        choices=[
+            {"index": 0, "delta": delta, "finish_reason": finish_reason},
+        ],
+    )
+
+
+def split_randomly(text: str, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    pieces, start = [], 0
+    while start < len(text):
+        end = start + rng.randint(1, 7)
+        pieces.append(text[start:end])
+        start = end
+    return pieces
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_parser_matches_json_loads(seed):
+    text = json.dumps(DOCUMENT, indent=seed % 3 or None)
+    parser = IncrementalJSONParser()
+    for piece in split_randomly(text, seed):
+        assert not parser.complete
+        parser.feed(piece)
+        assert isinstance(parser.partial, dict)
+    assert parser.complete
+    assert parser.value == DOCUMENT
+
+
+def test_parser_partial_values():
+    parser = IncrementalJSONParser()
+    parser.feed('{"name": "Hang')
+    assert parser.partial == {"name": "Hang"}
+    parser.feed("zhou\\u00")
+    assert parser.partial == {"name": "Hangzhou"}
+    parser.feed('e9", "days": [1, 2')
+    # the number being streamed is not added before it ends
+    assert parser.partial == {"name": "Hangzhoué", "days": [1]}
+    assert not parser.feed("]")
+    assert parser.feed("}")
+
+    scalar = IncrementalJSONParser()
+    assert not scalar.feed("12")
+    assert scalar.close() == 12
+
+
+class Stop(BaseModel):
+    city: str
+    nights: int
+
+
+class Trip(BaseModel):
+    title: str
+    stops: List[Stop]
+    home: Optional[Stop] = None
+
+
+def test_partial_models_are_snapshots_with_nested_models():
+    parser = IncrementalJSONParser()
+    parser.feed('{"title": "East", "stops": [{"city": "Hang')
+    first = parse_partial_model(Trip, parser.partial)
+    parser.feed('zhou", "nights": 2}, {"city": "Su')
+    second = parse_partial_model(Trip, parser.partial)
+    parser.feed('zhou"}], "home": {"city": "Beijing"}}')
+    third = parse_partial_model(Trip, parser.partial)
+
+    # the earlier partials are not changed by the parser
+    assert len(first.stops) == 1 and first.stops[0].city == "Hang"
+    assert [stop.city for stop in second.stops] == ["Hangzhou", "Su"]
+    assert isinstance(second.stops[0], Stop)
+    assert second.stops[0].nights == 2
+    assert second.stops[1].model_fields_set == {"city"}
+    assert isinstance(third.home, Stop) and third.home.city == "Beijing"
+
+
+def test_partial_model_builder_skips_unchanged_and_shares_closed():
+    parser = IncrementalJSONParser()
+    builder = PartialModelBuilder(Trip, parser)
+    parser.feed('{"title": "East", "stops": [{"city": "Hangzhou"}')
+    first = builder.snapshot()
+    # no new value, no new snapshot
+    parser.feed(", ")
+    assert builder.snapshot() is None
+    parser.feed('{"city": "Su')
+    second = builder.snapshot()
+    parser.feed('zhou"}], "home": {"city": "Beijing"}}')
+    third = builder.snapshot()
+
+    assert [stop.city for stop in first.stops] == ["Hangzhou"]
+    assert [stop.city for stop in second.stops] == ["Hangzhou", "Su"]
+    assert [stop.city for stop in third.stops] == ["Hangzhou", "Suzhou"]
+    # the complete stop is built once, the last one again
+    assert third.stops[0] is second.stops[0]
+    assert third.stops[1] is not second.stops[1]
+    assert isinstance(third.home, Stop) and third.home.city == "Beijing"
+
+
+def test_parser_partial_strings_are_prefixes():
+    expected = 'é😀\\n"' * 200
+    text = json.dumps({"text": expected})
+    parser = IncrementalJSONParser()
+    for piece in split_randomly(text, 0):
+        parser.feed(piece)
+        partial = (parser.partial or {}).get("text", "")
+        # a split escape sequence or surrogate pair is held back
+        assert expected.startswith(partial)
+    assert parser.value["text"] == expected
+
+
+@pytest.mark.parametrize(
+    "text", ['{"a" 1}', '{"a": 1,]', "[1 2]", '{"a": 1}}']
+)
+def test_parser_rejects_invalid_json(text):
+    with pytest.raises(JSONStreamError):
+        parser = IncrementalJSONParser()
+        parser.feed(text)
+        parser.close()
+
+
+def test_tool_call_completed_before_finish_reason():
+    parser = ToolCallStreamParser()
+    chunks = [
+        make_chunk(
+            tool_calls=[
+                {
+                    "index": 0,
+                    "id": "call_0",
+                    "type": "function",
+                    "function": {"name": "search", "arguments": '{"q": '},
+                },
+            ],
+        ),
+        make_chunk(
+            tool_calls=[
+                {"index": 0, "function": {"arguments": '"hz"}'}},
+                {
+                    "index": 1,
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {"name": "now", "arguments": ""},
+                },
+            ],
+        ),
+        make_chunk(finish_reason="tool_calls"),
+    ]
+
+    assert parser.feed_chunk(chunks[0]) == []
+    assert parser.get(0).partial_arguments == {}
+    completed = parser.feed_chunk(chunks[1])
+    assert [c.id for c in completed] == ["call_0"]
+    assert completed[0].function.arguments == '{"q": "hz"}'
+    assert parser.feed_chunk(chunks[2]) == []
+
+    finished = parser.finish()
+    assert [c.function.name for c in finished] == ["now"]
+    assert finished[0].function.arguments == "{}"
+    assert [c.id for c in parser.tool_calls] == ["call_0", "call_1"]
+
+
+class Weather(BaseModel):
+    """Weather report."""
+
+    city: str
+    days: List[int]
+
+
+class FakeCompletions:
+    def __init__(self, chunks: List[ChatCompletionChunk]) -> None:
+        self.chunks = chunks
+        self.kwargs = None
+
+    async def create(self, **kwargs):
+        self.kwargs = kwargs
+
+        async def stream():
+            for chunk in self.chunks:
+                yield chunk
+
+        return stream()
+
+
+@pytest.mark.asyncio
+async def test_base_llm_streams_structured_output():
+    arguments = json.dumps({"city": "Hangzhou", "days": [1, 2]})
+    chunks = [
+        make_chunk(
+            tool_calls=[
+                {
+                    "index": 0,
+                    "id": "call_0",
+                    "type": "function",
+                    "function": {"name": "Weather", "arguments": piece},
+                },
+            ],
+        )
+        for piece in split_randomly(arguments, 0)
+    ]
+    completions = FakeCompletions(chunks)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    llm = BaseLLM(client=client)
+
+    outputs = [
+        output
+        async for output in llm.astream_unwrapped(
+            model="mock",
+            messages=[{"role": "user", "content": "weather"}],
+            response_model=Weather,
+        )
+    ]
+
+    assert completions.kwargs["tool_choice"]["function"]["name"] == "Weather"
+    assert outputs[-1] == Weather(city="Hangzhou", days=[1, 2])
+    # partial models are yielded while the arguments stream
+    assert len(outputs) > 2
+    assert all(isinstance(o, Weather) for o in outputs)
+    assert outputs[0].model_fields_set < {"city", "days"}
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+from openai.types.chat import ChatCompletionChunk
+
+from agentscope_bricks.utils.message_util import (
+    ChunkAccumulator,
+    merge_incremental_chunk,
+)
+
+
+def chunk(delta=None, finish_reason=None, usage=None, index=0):
+    choices = []
+    if delta is not None or finish_reason is not None:
+        choices.append(
+            {
+                "index": index,
+                "delta": delta or {},
+                "finish_reason": finish_reason,
+            },
+        )
+    return ChatCompletionChunk(
+        id="chat-1",
+        created=0,
+        model="qwen-max",
+        object="chat.completion.chunk",
+        choices=choices,
+        usage=usage,
+    )
+
+
+def tool_delta(index, id=None, name=None, arguments=None):
+    return {
+        "tool_calls": [
+            {
+                "index": index,
+                "id": id,
+                "type": "function" if id else None,
+                "function": {"name": name, "arguments": arguments},
+            },
+        ],
+    }
+
+
+def test_merge_content_and_usage():
+    chunks = [
+        chunk({"role": "assistant", "content": ""}),
+        *[chunk({"content": c}) for c in "hello world"],
+        chunk({}, finish_reason="stop"),
+        chunk(
+            usage={
+                "prompt_tokens": 5,
+                "completion_tokens": 11,
+                "total_tokens": 16,
+            },
+        ),
+    ]
+    merged = merge_incremental_chunk(chunks)
+    assert merged.choices[0].delta.role == "assistant"
+    assert merged.choices[0].delta.content == "hello world"
+    assert merged.choices[0].finish_reason == "stop"
+    assert merged.usage.total_tokens == 16
+    # the chunks are left untouched
+    assert chunks[1].choices[0].delta.content == "h"
+    assert merge_incremental_chunk([]) is None
+
+
+def test_accumulator_merges_parallel_tool_calls_at_any_point():
+    accumulator = ChunkAccumulator()
+    accumulator.add(chunk({"role": "assistant", "content": None}))
+    accumulator.add(chunk(tool_delta(0, "call_0", "search", '{"q": ')))
+    accumulator.add(chunk(tool_delta(1, "call_1", "weather", "")))
+    accumulator.add(chunk(tool_delta(0, arguments='"a"}')))
+
+    partial = accumulator.merged()
+    tool_calls = partial.choices[0].delta.tool_calls
+    assert [t.function.arguments for t in tool_calls] == ['{"q": "a"}', ""]
+
+    accumulator.add(chunk(tool_delta(1, arguments='{"city": "Hangzhou"}')))
+    accumulator.add(chunk({}, finish_reason="tool_calls"))
+    merged = accumulator.merged()
+    tool_calls = merged.choices[0].delta.tool_calls
+    assert [(t.index, t.id, t.function.name) for t in tool_calls] == [
+        (0, "call_0", "search"),
+        (1, "call_1", "weather"),
+    ]
+    assert tool_calls[1].function.arguments == '{"city": "Hangzhou"}'
+    assert merged.choices[0].delta.content is None
+    assert merged.choices[0].finish_reason == "tool_calls"
+    assert len(accumulator) == 6
+
+
+def test_accumulator_skips_tool_results_and_keeps_reasoning():
+    accumulator = ChunkAccumulator()
+    accumulator.add(chunk({"role": "assistant", "reasoning_content": "th"}))
+    accumulator.add(chunk({"reasoning_content": "ink"}))
+    accumulator.add(chunk({"role": "tool", "content": "tool result"}))
+    accumulator.add(chunk({"content": "answer"}, finish_reason="stop"))
+    delta = accumulator.merged().choices[0].delta
+    assert delta.reasoning_content == "think"
+    assert delta.content == "answer"
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import json
+
+import aiohttp
+import openai
+import pytest
+from openai import AsyncOpenAI
+
+from agentscope_bricks.models.embedding import TextEmbedding
+from agentscope_bricks.models.llm import BaseLLM
+from agentscope_bricks.utils.message_util import merge_incremental_chunk
+from agentscope_bricks.utils.schemas.oai_llm import Parameters
+from agentscope_bricks.utils.server_utils.mock_server import (
+    MockModelServer,
+    MockServerConfig,
+    MockToolCall,
+)
+
+
+def mock_llm(server):
+    return BaseLLM(
+        client=AsyncOpenAI(
+            api_key="sk-mock",
+            base_url=server.base_url,
+            max_retries=0,
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_chat_completions_stream_tool_calls_then_answer():
+    config = MockServerConfig(
+        ttft=0.01,
+        completion_tokens=10,
+        tokens_per_chunk=3,
+        tool_calls=[MockToolCall(name="weather", arguments={"city": "Paris"})],
+    )
+    async with MockModelServer(config) as server:
+        llm = mock_llm(server)
+        chunks = [
+            chunk
+            async for chunk in llm.astream(
+                model="mock",
+                messages=[{"role": "user", "content": "weather?"}],
+                parameters=Parameters(stream_options={"include_usage": True}),
+            )
+        ]
+        merged = merge_incremental_chunk(chunks)
+        tool_call = merged.choices[0].delta.tool_calls[0]
+        assert tool_call.function.name == "weather"
+        assert json.loads(tool_call.function.arguments) == {"city": "Paris"}
+        assert merged.choices[0].finish_reason == "tool_calls"
+        assert merged.usage.total_tokens > 0
+
+        response = await llm.arun(
+            model="mock",
+            messages=[
+                {"role": "user", "content": "weather?"},
+                {"role": "tool", "content": "sunny", "tool_call_id": "call_0"},
+            ],
+        )
+        assert response.choices[0].message.content == "tok " * 10
+        assert response.usage.completion_tokens == 10
+        assert server.stats.requests == {
+            "/compatible-mode/v1/chat/completions": 2,
+        }
+        assert server.stats.upstream_time >= 0.02
+
+
+@pytest.mark.asyncio
+async def test_embeddings_tasks_and_errors():
+    async with MockModelServer(
+        MockServerConfig(embedding_dimension=8),
+    ) as server:
+        embedding = TextEmbedding(
+            client=AsyncOpenAI(api_key="sk-mock", base_url=server.base_url),
+        )
+        response = await embedding.arun(["a", "b", "a"], model="mock")
+        vectors = [item.embedding for item in response.data]
+        assert len(vectors[0]) == 8
+        assert vectors[0] == vectors[2] != vectors[1]
+
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                server.dashscope_base_url
+                + "/services/aigc/video-generation/video-synthesis",
+                headers={"X-DashScope-Async": "enable"},
+                json={"model": "wan", "input": {"prompt": "a cat"}},
+            ) as submitted:
+                task_id = (await submitted.json())["output"]["task_id"]
+            async with session.get(
+                f"{server.dashscope_base_url}/tasks/{task_id}",
+            ) as fetched:
+                output = (await fetched.json())["output"]
+        assert output["task_status"] == "SUCCEEDED"
+        assert output["video_url"].endswith(".mp4")
+
+        server.config.error_rate = 1.0
+        with pytest.raises(openai.RateLimitError):
+            await mock_llm(server).arun(
+                model="mock",
+                messages=[{"role": "user", "content": "hi"}],
+            )
+        assert server.stats.errors == 1
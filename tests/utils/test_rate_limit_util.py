@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from agentscope_bricks.base.component import Component
+from agentscope_bricks.utils.rate_limit_util import (
+    AdaptiveConcurrencyConfig,
+    RateLimitConfig,
+    RateLimiter,
+    RateLimitTimeoutError,
+    get_rate_limit_stats,
+    set_rate_limit,
+)
+
+
+class SleepInput(BaseModel):
+    index: int
+
+
+class SleepOutput(BaseModel):
+    index: int
+
+
+class LimitedComponent(Component[SleepInput, SleepOutput]):
+    name = "limited_component"
+    description = "Component with at most two in-flight calls"
+    rate_limit = RateLimitConfig(max_concurrency=2)
+
+    in_flight = 0
+    peak = 0
+
+    async def _arun(self, args: SleepInput, **kwargs):
+        LimitedComponent.in_flight += 1
+        LimitedComponent.peak = max(
+            LimitedComponent.peak,
+            LimitedComponent.in_flight,
+        )
+        await asyncio.sleep(0.02)
+        LimitedComponent.in_flight -= 1
+        return SleepOutput(index=args.index)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_shared_across_instances():
+    set_rate_limit("component:limited_component", LimitedComponent.rate_limit)
+    LimitedComponent.peak = 0
+    components = [LimitedComponent() for _ in range(3)]
+
+    results = await asyncio.gather(
+        *[components[i % 3].arun(SleepInput(index=i)) for i in range(9)],
+    )
+
+    assert [r.index for r in results] == list(range(9))
+    assert LimitedComponent.peak == 2
+    stats = get_rate_limit_stats()["component:limited_component"]
+    assert stats["acquired"] == 9
+    assert stats["in_flight"] == 0
+    assert stats["queue_depth"] == 0
+    assert stats["max_wait"] > 0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_rate():
+    limiter = RateLimiter("bucket", rate=50, burst=1)
+    start = time.monotonic()
+    for _ in range(5):
+        async with limiter.acquire():
+            pass
+    # the first token is free, the following four wait 20ms each
+    assert time.monotonic() - start >= 0.07
+
+
+@pytest.mark.asyncio
+async def test_queue_deadline():
+    limiter = RateLimiter("deadline", max_concurrency=1)
+
+    async def hold():
+        async with limiter.acquire():
+            await asyncio.sleep(0.1)
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    with pytest.raises(RateLimitTimeoutError):
+        async with limiter.acquire(timeout=0.01):
+            pass
+    await holder
+
+    # the slot given up by the timed out waiter is not leaked
+    async with limiter.acquire(timeout=0.01):
+        pass
+    assert limiter.get_stats()["timeouts"] == 1
+
+    bucket = RateLimiter("bucket_deadline", rate=1, burst=1)
+    async with bucket.acquire():
+        pass
+    with pytest.raises(RateLimitTimeoutError):
+        async with bucket.acquire(timeout=0.01):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_token_is_refunded_when_slot_wait_times_out():
+    limiter = RateLimiter("refund", max_concurrency=1, rate=1, burst=2)
+
+    async def hold():
+        async with limiter.acquire():
+            await asyncio.sleep(0.1)
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    # the second token is reserved, then the slot wait times out
+    with pytest.raises(RateLimitTimeoutError):
+        async with limiter.acquire(timeout=0.01):
+            pass
+    await holder
+
+    # the refunded token is still available without waiting a second
+    async with limiter.acquire(timeout=0.01):
+        pass
+
+
+class OverloadError(Exception):
+    status_code = 429
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limit_decreases_on_overload_and_recovers():
+    limiter = RateLimiter(
+        "adaptive",
+        max_concurrency=8,
+        adaptive=AdaptiveConcurrencyConfig(latency_tolerance=None),
+    )
+    assert limiter.get_stats()["limit"] == 8
+
+    with pytest.raises(OverloadError):
+        async with limiter.acquire():
+            raise OverloadError()
+    stats = limiter.get_stats()
+    assert (stats["limit"], stats["overloads"]) == (4, 1)
+
+    # errors other than overloads keep the limit
+    with pytest.raises(ValueError):
+        async with limiter.acquire():
+            raise ValueError()
+    assert limiter.get_stats()["limit"] == 4
+
+    # one more slot per window of `limit` successes
+    for _ in range(5):
+        async with limiter.acquire():
+            pass
+    assert limiter.get_stats()["limit"] == 5
+    assert limiter.get_stats()["limit_increases"] == 1
+
+    with pytest.raises(ValueError):
+        RateLimiter("unbounded", adaptive=AdaptiveConcurrencyConfig())
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limit_queues_callers_in_order():
+    limiter = RateLimiter(
+        "adaptive_fifo",
+        max_concurrency=4,
+        adaptive=AdaptiveConcurrencyConfig(latency_tolerance=None),
+    )
+    limiter.record_overload()
+    limiter.record_overload()
+    assert limiter.get_stats()["limit"] == 1
+    order = []
+
+    async def call(i):
+        async with limiter.acquire():
+            order.append(i)
+            await asyncio.sleep(0.01)
+
+    tasks = [asyncio.create_task(call(i)) for i in range(5)]
+    await asyncio.sleep(0.005)
+    stats = limiter.get_stats()
+    assert (stats["in_flight"], stats["queue_depth"]) == (1, 4)
+    await asyncio.gather(*tasks)
+    assert order == list(range(5))
+    # the successes raised the limit again
+    assert limiter.get_stats()["limit"] > 1
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limit_decreases_on_latency_inflation():
+    limiter = RateLimiter(
+        "adaptive_latency",
+        max_concurrency=4,
+        adaptive=AdaptiveConcurrencyConfig(latency_tolerance=2.0),
+    )
+    for _ in range(3):
+        limiter.record_latency(0.01)
+    assert limiter.get_stats()["limit"] == 4
+    for _ in range(5):
+        limiter.record_latency(0.1)
+    stats = limiter.get_stats()
+    assert stats["limit"] < 4
+    assert stats["limit_decreases"] >= 1
+    assert stats["baseline_latency"] < stats["latency_ewma"]
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from openai.types.chat import ChatCompletion
+
+from agentscope_bricks.models.llm import BaseLLM
+from agentscope_bricks.utils.semantic_cache_util import (
+    SemanticCache,
+    get_query_text,
+)
+
+VOCABULARY = ["reset", "password", "refund", "order", "how", "can", "i"]
+
+
+class BagOfWordsEmbedding:
+    """Embed a text as the counts of the vocabulary words."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def arun(self, input, model, **kwargs):
+        self.calls += 1
+        words = input[0].lower().replace("?", "").split()
+        vector = [float(words.count(w)) for w in VOCABULARY]
+        return SimpleNamespace(data=[SimpleNamespace(embedding=vector)])
+
+
+class FailingEmbedding:
+    async def arun(self, input, model, **kwargs):
+        raise RuntimeError("embedding service unavailable")
+
+
+def test_get_query_text():
+    assert get_query_text([{"role": "user", "content": "hi"}]) == "hi"
+    assert (
+        get_query_text(
+            [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": "describe"},
+                        {"type": "image_url", "image_url": {"url": "x"}},
+                    ],
+                },
+            ],
+        )
+        == "describe"
+    )
+    assert get_query_text([{"role": "assistant", "content": "hi"}]) is None
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_hits_paraphrases_with_same_fingerprint():
+    cache = SemanticCache(BagOfWordsEmbedding(), threshold=0.8)
+    fingerprint = cache.make_fingerprint(
+        "qwen-max",
+        [{"role": "system", "content": "support"}],
+        {"temperature": 0},
+    )
+    other = cache.make_fingerprint(
+        "qwen-max",
+        [{"role": "system", "content": "sales"}],
+        {"temperature": 0},
+    )
+
+    response, vector = await cache.get("How can I reset password", fingerprint)
+    assert response is None
+    await cache.set(vector, fingerprint, {"answer": "reset it"})
+
+    hit, _ = await cache.get("How do I reset my password?", fingerprint)
+    assert hit == {"answer": "reset it"}
+    assert (await cache.get("How do I reset my password?", other))[0] is None
+    assert (await cache.get("refund order", fingerprint))[0] is None
+    # similarity of 0.77, just below the threshold
+    assert (await cache.get("reset password how", fingerprint))[0] is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 4
+    assert stats["near_misses"] == 1
+    assert stats["hit_rate"] == 0.2
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_evicts_by_size_and_age():
+    cache = SemanticCache(BagOfWordsEmbedding(), max_entries=2, ttl=0.05)
+    for text in ["reset password", "refund order", "how can i"]:
+        _, vector = await cache.get(text, "f" * 64)
+        await cache.set(vector, "f" * 64, text)
+
+    assert len(cache) == 2
+    assert cache.get_stats()["evictions"] == 1
+    assert (await cache.get("reset password", "f" * 64))[0] is None
+    assert (await cache.get("how can i", "f" * 64))[0] == "how can i"
+
+    await asyncio.sleep(0.06)
+    assert (await cache.get("how can i", "f" * 64))[0] is None
+    assert cache.get_stats()["expirations"] == 2
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_in_front_of_base_llm():
+    calls = 0
+
+    async def create(model, messages, **kwargs):
+        nonlocal calls
+        calls += 1
+        return ChatCompletion(
+            id=f"chat-{calls}",
+            created=0,
+            model=model,
+            object="chat.completion",
+            choices=[
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "answer"},
+                },
+            ],
+        )
+
+    client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create)),
+    )
+    llm = BaseLLM(
+        client=client,
+        semantic_cache=SemanticCache(BagOfWordsEmbedding(), threshold=0.8),
+    )
+
+    def ask(question):
+        return [
+            {"role": "system", "content": "support"},
+            {"role": "user", "content": question},
+        ]
+
+    first = await llm.arun("qwen-max", ask("How can I reset password?"))
+    second = await llm.arun("qwen-max", ask("How do I reset my password?"))
+    bypassed = await llm.arun(
+        "qwen-max",
+        ask("How do I reset my password?"),
+        use_cache=False,
+    )
+    assert second.id == first.id
+    assert bypassed.id != first.id
+    assert calls == 2
+
+    # errors of the embedding service do not fail the call
+    llm.semantic_cache = SemanticCache(FailingEmbedding())
+    await llm.arun("qwen-max", ask("How can I reset password?"))
+    assert llm.semantic_cache.get_stats()["errors"] == 1
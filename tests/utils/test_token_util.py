@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from agentscope_bricks.base.memory import MemoryOperation
+from agentscope_bricks.components.memory.local_memory import (
+    LocalMemory,
+    MemoryInput,
+)
+from agentscope_bricks.utils.schemas.oai_llm import OpenAIMessage
+from agentscope_bricks.utils.token_util import (
+    ContextTrimmer,
+    TokenCounter,
+    estimate_tokens,
+)
+
+
+class CharTokenizer:
+    """Exact tokenizer with one token per character."""
+
+    def encode(self, text):
+        return list(text)
+
+
+def message(role, content, **kwargs):
+    return {"role": role, "content": content, **kwargs}
+
+
+def test_estimate_tokens_is_cjk_aware():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("你好世界") == 4
+    assert estimate_tokens("hello world!") == 3
+    assert estimate_tokens("天气 weather") == 2 + 2
+
+
+def test_token_counter_caches_message_counts():
+    counter = TokenCounter(tokenizer=CharTokenizer())
+    messages = [message("user", "a" * 10), message("assistant", "b" * 20)]
+    assert counter.count_messages(messages) == 3 + (4 + 10) + (4 + 20)
+    assert counter.misses == 2
+
+    messages.append(message("user", "c" * 5))
+    counter.count_messages(messages)
+    # only the new message is tokenized
+    assert (counter.hits, counter.misses) == (2, 3)
+
+
+def test_trimmer_drops_oldest_turns_as_a_whole():
+    counter = TokenCounter(tokenizer=CharTokenizer())
+    tool_call = {
+        "id": "call_0",
+        "type": "function",
+        "function": {"name": "search", "arguments": "{}"},
+    }
+    messages = [
+        message("system", "sys"),
+        message("user", "q1" * 50),
+        message("assistant", "", tool_calls=[tool_call]),
+        message("tool", "r" * 100, tool_call_id="call_0"),
+        message("assistant", "a1" * 50),
+        message("user", "q2"),
+    ]
+    trimmer = ContextTrimmer(
+        max_context_tokens=200,
+        reserve_tokens=50,
+        counter=counter,
+    )
+    assert trimmer.trim(messages[:1] + messages[-1:]) == [
+        messages[0],
+        messages[-1],
+    ]
+
+    # the question is dropped with its tool call, tool result and answer
+    assert trimmer.trim(messages) == [messages[0], messages[5]]
+
+    messages[1:1] = [message("user", "q0"), message("assistant", "a0")]
+    trimmer.max_context_tokens = 390
+    trimmed = trimmer.trim(messages)
+    assert trimmed == [messages[0]] + messages[3:]
+    assert counter.count_messages(trimmed) <= 340
+    # max_tokens of the call overrides the reserved tokens
+    assert trimmer.trim(messages, {"max_tokens": 300}) == [
+        messages[0],
+        messages[-1],
+    ]
+
+
+def test_trimmer_condenses_before_dropping():
+    counter = TokenCounter(tokenizer=CharTokenizer())
+    messages = [
+        message("user", "x" * 300),
+        message("assistant", "y" * 300),
+        message("user", "latest"),
+    ]
+    trimmer = ContextTrimmer(
+        max_context_tokens=600,
+        reserve_tokens=100,
+        strategy="condense",
+        condensed_tokens=50,
+        counter=counter,
+    )
+
+    trimmed = trimmer.trim(messages)
+    assert len(trimmed) == 3
+    assert trimmed[0]["content"].startswith("x" * 50)
+    assert trimmed[0]["content"].endswith("[truncated]")
+    assert trimmed[1] is messages[1]
+    assert messages[0]["content"] == "x" * 300
+    with pytest.raises(ValueError):
+        ContextTrimmer(max_context_tokens=10, strategy="summarize")
+
+
+@pytest.mark.asyncio
+async def test_local_memory_enforces_token_limit():
+    memory = LocalMemory()
+    # 9 tokens per message plus 3 for the reply
+    memory.max_token_limit = 25
+    for i in range(5):
+        await memory.add(
+            MemoryInput(
+                operation_type=MemoryOperation.ADD,
+                run_id="run",
+                messages=[OpenAIMessage(role="user", content=f"{i}" * 20)],
+            ),
+        )
+    history = memory.chat_store.get_messages("run")
+    assert [m.content for m in history] == ["3" * 20, "4" * 20]
+
+
+@pytest.mark.asyncio
+async def test_local_memory_drops_whole_turns():
+    memory = LocalMemory()
+    assert memory.max_token_limit is None
+    # 14 tokens per message plus 3 for the reply
+    memory.max_token_limit = 50
+    for role, content in [
+        ("user", "q" * 40),
+        ("assistant", "a" * 40),
+        ("user", "p" * 40),
+        ("assistant", "b" * 40),
+    ]:
+        await memory.add(
+            MemoryInput(
+                operation_type=MemoryOperation.ADD,
+                run_id="run",
+                messages=[OpenAIMessage(role=role, content=content)],
+            ),
+        )
+    # the answer is not kept without its question
+    history = memory.chat_store.get_messages("run")
+    assert [m.content for m in history] == ["p" * 40, "b" * 40]
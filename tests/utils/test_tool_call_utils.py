@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import time
+
+import pytest
+from openai.types.chat import ChatCompletionChunk
+from pydantic import BaseModel
+
+from agentscope_bricks.base.component import Component
+from agentscope_bricks.utils.schemas.oai_llm import Parameters, UserMessage
+from agentscope_bricks.utils.tool_call_utils import (
+    EagerToolExecutor,
+    function_call_with_openai,
+)
+
+
+class SleepInput(BaseModel):
+    seconds: float
+
+
+class SleepOutput(BaseModel):
+    slept: float
+
+
+class SleepComponent(Component[SleepInput, SleepOutput]):
+    name = "sleep"
+    description = "Sleep for the given seconds"
+
+    async def _arun(self, args: SleepInput, **kwargs):
+        await asyncio.sleep(args.seconds)
+        return SleepOutput(slept=args.seconds)
+
+
+class NapComponent(SleepComponent):
+    name = "nap"
+
+
+def make_chunk(delta, finish_reason=None):
+    return ChatCompletionChunk(
+        id="chunk",
+        created=0,
+        model="mock",
+        object="chat.completion.chunk",
+        choices=[
+            {"index": 0, "delta": delta, "finish_reason": finish_reason},
+        ],
+    )
+
+
+def tool_delta(index, arguments, name=None):
+    tool_call = {"index": index, "function": {"arguments": arguments}}
+    if name:
+        tool_call.update(id=f"call_{index}", type="function")
+        tool_call["function"]["name"] = name
+    return {"role": "assistant", "tool_calls": [tool_call]}
+
+
+class SlowToolCallLLM:
+    """Stream a turn of a long tool call followed by a short one whose
+    arguments take `delay` seconds to stream, then a final answer."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.turns = 0
+
+    async def astream_unwrapped(self, model, messages, parameters, **kwargs):
+        self.turns += 1
+        if self.turns > 1:
+            yield make_chunk({"content": "done"}, finish_reason="stop")
+            return
+        yield make_chunk(
+            tool_delta(0, json.dumps({"seconds": 0.3}), name="sleep"),
+        )
+        arguments = json.dumps({"seconds": 0.05})
+        yield make_chunk(tool_delta(1, arguments[:5], name="nap"))
+        await asyncio.sleep(self.delay)
+        yield make_chunk(tool_delta(1, arguments[5:]))
+        yield make_chunk({}, finish_reason="tool_calls")
+
+
+async def run_loop(eager):
+    messages = [UserMessage(content="sleep and nap")]
+    start = time.monotonic()
+    async for _ in function_call_with_openai(
+        model="mock",
+        model_cls=SlowToolCallLLM(delay=0.2),
+        messages=messages,
+        parameters=Parameters(),
+        available_components={
+            "sleep": SleepComponent(),
+            "nap": NapComponent(),
+        },
+        eager_tool_execution=eager,
+    ):
+        pass
+    return messages, time.monotonic() - start
+
+
+@pytest.mark.asyncio
+async def test_eager_tool_execution_overlaps_streaming():
+    messages, eager_elapsed = await run_loop(eager=True)
+    _, lazy_elapsed = await run_loop(eager=False)
+
+    assistant, sleep, nap = messages[1:]
+    assert [t.id for t in assistant.tool_calls] == ["call_0", "call_1"]
+    assert (sleep.tool_call_id, sleep.name) == ("call_0", "sleep")
+    assert (nap.tool_call_id, nap.name) == ("call_1", "nap")
+    assert json.loads(nap.content) == {"slept": 0.05}
+    # the long tool ran while the short one was streamed
+    assert eager_elapsed < 0.45 < lazy_elapsed
+
+
+@pytest.mark.asyncio
+async def test_eager_executor_reports_latency_saved():
+    executor = EagerToolExecutor({"sleep": SleepComponent()})
+    arguments = json.dumps({"seconds": 0.1})
+    executor.feed_chunk(make_chunk(tool_delta(0, arguments, name="sleep")))
+    await asyncio.sleep(0.1)
+    # invalid arguments are left to the end of the turn
+    executor.feed_chunk(make_chunk(tool_delta(1, "{]", name="sleep")))
+    merged = make_chunk(
+        {
+            "role": "assistant",
+            "tool_calls": [
+                {
+                    "index": 0,
+                    "id": "call_0",
+                    "type": "function",
+                    "function": {"name": "sleep", "arguments": arguments},
+                },
+            ],
+        },
+        finish_reason="tool_calls",
+    )
+    messages = await executor.finish(merged)
+    assert len(messages) == 2
+    stats = executor.get_stats()
+    assert stats["tool_calls"] == 1
+    assert stats["started_early"] == 1
+    assert stats["latency_saved_ms"] > 50
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+import pytest
+from mcp.types import Tool as MCPTool
+from openai.types import CreateEmbeddingResponse
+from pydantic import BaseModel
+
+from agentscope_bricks.base.component import Component
+from agentscope_bricks.utils.schemas.oai_llm import Parameters, UserMessage
+from agentscope_bricks.utils.tool_call_utils import function_call_with_openai
+from agentscope_bricks.utils.tool_registry_util import ToolRegistry
+
+VOCABULARY = ["weather", "stock", "flight", "translate"]
+
+
+class KeywordEmbedding:
+    """Embed a text as the counts of the vocabulary words."""
+
+    def __init__(self):
+        self.inputs = []
+
+    async def arun(self, input, model, **kwargs):
+        self.inputs.extend(input)
+        return CreateEmbeddingResponse(
+            object="list",
+            model=model,
+            data=[
+                {
+                    "object": "embedding",
+                    "index": i,
+                    "embedding": [
+                        text.lower().count(word) + 0.01 for word in VOCABULARY
+                    ],
+                }
+                for i, text in enumerate(input)
+            ],
+            usage={"prompt_tokens": 0, "total_tokens": 0},
+        )
+
+
+class QueryInput(BaseModel):
+    query: str
+
+
+class QueryOutput(BaseModel):
+    result: str
+
+
+def make_tool(name, description):
+    class Tool(Component[QueryInput, QueryOutput]):
+        async def _arun(self, args, **kwargs):
+            return QueryOutput(result=name)
+
+    return Tool(name=name, description=description)
+
+
+TOOLS = {
+    "get_weather": make_tool("get_weather", "Weather forecast of a city"),
+    "get_stock": make_tool("get_stock", "Stock price of a company"),
+    "book_flight": make_tool("book_flight", "Book a flight ticket"),
+    "translate": make_tool("translate", "Translate a text"),
+}
+
+
+class FakeMCPServer:
+    def __init__(self):
+        self.listed = 0
+
+    async def list_tools(self):
+        self.listed += 1
+        return [
+            MCPTool(
+                name="stock_news",
+                description="Latest stock market news",
+                inputSchema={
+                    "type": "object",
+                    "properties": {"query": {"type": "string"}},
+                    "required": ["query"],
+                },
+            ),
+        ]
+
+
+@pytest.mark.asyncio
+async def test_schemas_are_serialized_once_and_tools_selected():
+    embedding = KeywordEmbedding()
+    registry = ToolRegistry(embedding, embedding_batch_size=3)
+    registry.register_many(TOOLS)
+    schemas = registry.schemas(["get_weather"])
+    assert schemas[0] == {
+        "type": "function",
+        "function": TOOLS["get_weather"].function_schema.model_dump(
+            exclude_none=True,
+        ),
+    }
+    # registering the same component again keeps the serialized schema
+    registry.register(TOOLS["get_weather"])
+    assert registry.schemas(["get_weather"])[0] is schemas[0]
+
+    assert await registry.select("Will the weather be sunny?", 1) == [
+        "get_weather",
+    ]
+    selected = await registry.select("Price of the ACME stock", 2)
+    assert len(selected) == 2 and selected[0] == "get_stock"
+    # the tools are embedded once, then only the queries
+    assert len(embedding.inputs) == len(TOOLS) + 2
+    assert registry.get_stats()["embedded_tools"] == len(TOOLS)
+
+
+@pytest.mark.asyncio
+async def test_function_call_loop_offers_top_k_and_caches_mcp_tools():
+    registry = ToolRegistry(KeywordEmbedding())
+    server = FakeMCPServer()
+    offered = []
+
+    class LLM:
+        async def astream_unwrapped(
+            self,
+            model,
+            messages,
+            parameters,
+            **kwargs,
+        ):
+            offered.append(
+                sorted(t["function"]["name"] for t in parameters.tools),
+            )
+            assert parameters.stream_options == {"include_usage": True}
+            return
+            yield
+
+    for question in ("Any stock news?", "Book me a flight"):
+        async for _ in function_call_with_openai(
+            model="mock",
+            model_cls=LLM(),
+            messages=[UserMessage(content=question)],
+            parameters=Parameters(),
+            available_components=TOOLS,
+            mcp_servers=[server],
+            tool_registry=registry,
+            tool_top_k=2,
+        ):
+            pass
+
+    assert offered[0] == ["get_stock", "stock_news"]
+    assert "book_flight" in offered[1] and len(offered[1]) == 2
+    assert server.listed == 1
+    assert registry.get_stats()["mcp_fetches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_top_k_without_embedding_model_fails_up_front():
+    class LLM:
+        async def astream_unwrapped(self, **kwargs):
+            raise AssertionError("the LLM must not be called")
+            yield
+
+    # fewer tools than top_k would not even need a selection
+    with pytest.raises(ValueError):
+        async for _ in function_call_with_openai(
+            model="mock",
+            model_cls=LLM(),
+            messages=[UserMessage(content="Any stock news?")],
+            available_components={"get_stock": TOOLS["get_stock"]},
+            tool_registry=ToolRegistry(),
+            tool_top_k=2,
+        ):
+            pass